@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Benchmark CLI - Einstieg für 'main.py bench <suite> [args]'
+"""
+
+import sys
+
+SUITES = {
+    'micro': 'benchmarks.micro',
+    'hot-loop': 'benchmarks.hot_loop',
+    'pipeline': 'benchmarks.pipeline',
+}
+
+
+def main(argv=None):
+    """Leitet an die main() der gewählten Suite weiter"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in SUITES:
+        print(f"usage: main.py bench {{{','.join(SUITES)}}} [args]")
+        return 2
+
+    import importlib
+    suite = importlib.import_module(SUITES[argv[0]])
+    return suite.main(argv[1:]) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
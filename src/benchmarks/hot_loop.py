@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Hot-Loop Benchmark - Standard vs. Optimized Reader von PedalEnhancer
+Speist js_events über eine PipeSource ein und misst Latenz und GC-Läufe pro Event.
+Braucht weder /dev/uinput noch echte Pedale.
+
+Usage:
+    cd src && python3 -m benchmarks.hot_loop --events 20000
+"""
+
+import argparse
+import gc
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from device.calibration import PedalCalibrator
+from device.io_backends import PipeSource
+from device.pedal_enhancer import PedalEnhancer, JS_EVENT_FMT, JS_EVENT_AXIS
+
+
+class LatencySink:
+    """Ersetzt UInput: stempelt jeden SYN und meldet ihn über eine Pipe zurück"""
+
+    def __init__(self, events, notify_fd):
+        self.stamps = array('q', bytes(8 * events))
+        self.count = 0
+        self.notify_fd = notify_fd
+
+    def write(self, event_type, code, value):
+        pass
+
+    def syn(self):
+        if self.count < len(self.stamps):
+            self.stamps[self.count] = time.perf_counter_ns()
+            self.count += 1
+            os.write(self.notify_fd, b'.')
+
+
+def percentile(sorted_values, pct):
+    """Percentile aus bereits sortierter Liste"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100.0))
+    return sorted_values[index]
+
+
+def run(optimized, events):
+    """Ein Durchlauf: Ping-Pong pro Event, damit keine Queue die Latenz verfälscht"""
+    calibrator = PedalCalibrator()
+    calibrator.enabled = True
+    calibrator.set_pedal_setting('gas', 'deadzone', 3.0)
+    calibrator.set_pedal_setting('brake', 'curve', PedalCalibrator.CURVE_EXPONENTIAL)
+
+    notify_r, notify_w = os.pipe()
+    sink = LatencySink(events, notify_w)
+    source = PipeSource()
+    enhancer = PedalEnhancer('pipe', calibrator=calibrator, optimized=optimized, source=source, sink=sink)
+
+    collections = [0, 0, 0]
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            collections[info['generation']] += 1
+
+    gc.callbacks.append(on_gc)
+    enhancer.start()
+    writer_fd = source.write_fd
+
+    sent = array('q', bytes(8 * events))
+    started = time.perf_counter()
+    try:
+        for i in range(events):
+            value = (i * 37) % 65534 - 32767
+            data = struct.pack(JS_EVENT_FMT, i & 0xFFFFFFFF, value, JS_EVENT_AXIS, i % 3)
+            sent[i] = time.perf_counter_ns()
+            os.write(writer_fd, data)
+            os.read(notify_r, 1)
+    finally:
+        elapsed = time.perf_counter() - started
+        gc.callbacks.remove(on_gc)
+        enhancer.stop()
+        source.close()
+        os.close(notify_r)
+        os.close(notify_w)
+
+    latencies = sorted((sink.stamps[i] - sent[i]) / 1000.0 for i in range(sink.count))
+    return {
+        'mode': 'optimized' if optimized else 'standard',
+        'events': sink.count,
+        'events_per_s': round(sink.count / elapsed),
+        'gc_collections_per_100k': [round(c * 100000 / max(1, sink.count), 1) for c in collections],
+        'latency_us': {
+            'p50': round(percentile(latencies, 50), 1),
+            'p99': round(percentile(latencies, 99), 1),
+            'p99.9': round(percentile(latencies, 99.9), 1),
+            'max': round(latencies[-1], 1) if latencies else 0,
+        }
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PedalEnhancer hot-loop benchmark")
+    parser.add_argument('--events', type=int, default=20000, help="Events pro Modus")
+    parser.add_argument('--json', action='store_true', help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    results = [run(False, args.events), run(True, args.events)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        lat = result['latency_us']
+        print(f"{result['mode']:>9}: {result['events_per_s']:>7} ev/s  "
+              f"gc/100k {result['gc_collections_per_100k']}  "
+              f"p50 {lat['p50']}µs  p99 {lat['p99']}µs  p99.9 {lat['p99.9']}µs  max {lat['max']}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Micro Benchmark - Pro-Event Hot-Funktionen von Kalibrierung, Decode und Ausgabe
+Misst ns/Call (timeit-Stil: GC aus, bestes von N Wiederholungen) und den
+transienten Heap pro Call über den vollen 16-Bit Eingabebereich, für alle
+Kombinationen aus Deadzone, Min/Max, Invert und Kurve.
+
+--check vergleicht jede optimierte Kalibrier-Implementierung (CANDIDATES)
+exhaustiv mit der Referenz-Rechnung calibrate_value().
+
+Usage:
+    cd src && python3 -m benchmarks.micro
+    cd src && python3 main.py bench micro --check
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import statistics
+import struct
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from device.calibration import PedalCalibrator, PEDAL_NAMES, TABLE_OFFSET
+from device.pedal_enhancer import JS_EVENT_FMT, JS_EVENT_SIZE, JS_EVENT_AXIS
+from device.io_backends import UInputFrameSink, EV_ABS, EV_SYN, SYN_REPORT
+
+# Settings-Raster (min >= max deckt den "Range aus" Zweig ab)
+DEADZONES = (0.0, 5.0, 15.0)
+RANGES = ((0.0, 100.0), (10.0, 90.0), (30.0, 70.0), (60.0, 40.0))
+INVERTS = (False, True)
+CURVES = (PedalCalibrator.CURVE_LINEAR,
+          PedalCalibrator.CURVE_EXPONENTIAL,
+          PedalCalibrator.CURVE_LOGARITHMIC)
+
+FULL_RANGE = range(-TABLE_OFFSET, TABLE_OFFSET)
+DECODE_BATCH = 64
+ALLOC_SAMPLE = 1024
+PEDAL = 'brake'
+
+# Achsen der Pedale im virtuellen Device (ABS_X/Y/Z)
+ABS_X, ABS_Y, ABS_Z = 0x00, 0x01, 0x02
+
+
+def settings_grid():
+    """Alle Settings-Kombinationen als Dicts"""
+    for deadzone, (min_val, max_val), invert, curve in itertools.product(DEADZONES, RANGES, INVERTS, CURVES):
+        yield {'deadzone': deadzone, 'min': min_val, 'max': max_val, 'invert': invert, 'curve': curve}
+
+
+def settings_label(settings):
+    return (f"dz{settings['deadzone']:g} {settings['min']:g}-{settings['max']:g}"
+            f"{' inv' if settings['invert'] else ''} {settings['curve']}")
+
+
+def make_calibrator(settings):
+    calibrator = PedalCalibrator()
+    calibrator.enabled = True
+    for name, value in settings.items():
+        calibrator.set_pedal_setting(PEDAL, name, value)
+    return calibrator
+
+
+# Optimierte Implementierungen: Name → Factory(calibrator, pedal) → value → kalibrierter Wert
+# Neue Implementierungen hier eintragen, --check prüft sie gegen calibrate_value()
+def _table_candidate(calibrator, pedal):
+    calibrator.compile(pedal)
+    table = calibrator.tables[PEDAL_NAMES.index(pedal)]
+    return lambda value: table[value + TABLE_OFFSET]
+
+
+CANDIDATES = {
+    'table': _table_candidate,
+}
+
+
+def measure(loop, inputs, repeat):
+    """
+    Misst eine Loop-Funktion (führt den Call für jedes Input aus)
+
+    Returns:
+        Dict mit best/median ns pro Call und transienten Heap-Bytes pro Call
+    """
+    count = len(inputs)
+    timings = []
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            loop(inputs)
+            timings.append((time.perf_counter_ns() - start) / count)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Heap-Spitze über einen Ausschnitt: alles wird pro Call wieder frei,
+    # die Spitze ist also der größte Bedarf eines einzelnen Calls
+    sample = inputs[:ALLOC_SAMPLE]
+    tracemalloc.start()
+    try:
+        loop(sample[:1])
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        loop(sample)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'calls': count,
+        'ns_per_call': round(min(timings), 1),
+        'ns_per_call_median': round(statistics.median(timings), 1),
+        'alloc_bytes_per_call': max(0, peak)
+    }
+
+
+def loop_overhead(values):
+    for value in values:
+        pass
+
+
+def bench_conversions(values, repeat):
+    """_raw_to_percentage / _percentage_to_raw"""
+    calibrator = PedalCalibrator()
+    to_percentage = calibrator._raw_to_percentage
+    to_raw = calibrator._percentage_to_raw
+    percentages = [to_percentage(value) for value in values]
+
+    def raw_to_percentage(inputs):
+        for value in inputs:
+            to_percentage(value)
+
+    def percentage_to_raw(inputs):
+        for percentage in inputs:
+            to_raw(percentage)
+
+    return [
+        dict(name='loop_overhead', **measure(loop_overhead, values, repeat)),
+        dict(name='_raw_to_percentage', **measure(raw_to_percentage, values, repeat)),
+        dict(name='_percentage_to_raw', **measure(percentage_to_raw, percentages, repeat)),
+    ]
+
+
+def bench_decode(values, repeat):
+    """js_event Decode: Referenz (struct.unpack) vs. Batch-Varianten"""
+    events = [struct.pack(JS_EVENT_FMT, i, value, JS_EVENT_AXIS, i % 3) for i, value in enumerate(values)]
+    batches = [b''.join(events[i:i + DECODE_BATCH]) for i in range(0, len(events), DECODE_BATCH)]
+    js_struct = struct.Struct(JS_EVENT_FMT)
+    unpack = struct.unpack
+
+    def struct_unpack(inputs):
+        for data in inputs:
+            unpack(JS_EVENT_FMT, data)
+
+    def struct_unpack_from(inputs):
+        unpack_from = js_struct.unpack_from
+        for batch in inputs:
+            for offset in range(0, len(batch), JS_EVENT_SIZE):
+                unpack_from(batch, offset)
+
+    def memoryview_cast(inputs):
+        # Wie der optimierte Reader: Werte direkt aus einer int16 Sicht
+        for batch in inputs:
+            shorts = memoryview(batch).cast('h')
+            for offset in range(0, len(batch), JS_EVENT_SIZE):
+                batch[offset + 6]
+                batch[offset + 7]
+                shorts[(offset >> 1) + 2]
+
+    per_batch = len(events) / len(batches)
+    results = [dict(name='decode struct.unpack', **measure(struct_unpack, events, repeat))]
+    for name, loop in (('decode Struct.unpack_from', struct_unpack_from),
+                       ('decode memoryview', memoryview_cast)):
+        result = measure(loop, batches, repeat)
+        # Pro Event statt pro Batch
+        result['calls'] = len(events)
+        result['ns_per_call'] = round(result['ns_per_call'] / per_batch, 1)
+        result['ns_per_call_median'] = round(result['ns_per_call_median'] / per_batch, 1)
+        result['alloc_bytes_per_call'] = round(result['alloc_bytes_per_call'] / per_batch, 1)
+        results.append(dict(name=name, **result))
+    return results
+
+
+def bench_output(values, repeat):
+    """
+    Frame-Ausgabe (3 Achsen + SYN) nach /dev/null: ein write(2) pro Event
+    (wie evdev.UInput.write) vs. UInputFrameSink (ein write(2) pro Frame)
+    """
+    frames = values[::3]
+    fd = os.open(os.devnull, os.O_WRONLY)
+    try:
+        try:
+            from evdev import _uinput
+            write_event = _uinput.write
+        except ImportError:
+            # Gleiche Syscall-Anzahl wie evdev: ein input_event pro write(2)
+            event = struct.Struct('llHHi')
+
+            def write_event(fd, event_type, code, value):
+                os.write(fd, event.pack(0, 0, event_type, code, value))
+
+        def per_event(inputs):
+            for value in inputs:
+                write_event(fd, EV_ABS, ABS_X, value)
+                write_event(fd, EV_ABS, ABS_Y, value)
+                write_event(fd, EV_ABS, ABS_Z, value)
+                write_event(fd, EV_SYN, SYN_REPORT, 0)
+
+        sink = UInputFrameSink(fd)
+        write, syn = sink.write, sink.syn
+
+        def frame_sink(inputs):
+            for value in inputs:
+                write(EV_ABS, ABS_X, value)
+                write(EV_ABS, ABS_Y, value)
+                write(EV_ABS, ABS_Z, value)
+                syn()
+
+        return [
+            dict(name='output write per event', **measure(per_event, frames, repeat)),
+            dict(name='output UInputFrameSink', **measure(frame_sink, frames, repeat)),
+        ]
+    finally:
+        os.close(fd)
+
+
+def bench_calibration(values, repeat, candidates):
+    """calibrate_value() und Kandidaten für jede Settings-Kombination"""
+    results = []
+    for settings in settings_grid():
+        calibrator = make_calibrator(settings)
+        calibrate = calibrator.calibrate_value
+        label = settings_label(settings)
+
+        def reference(inputs):
+            for value in inputs:
+                calibrate(value, PEDAL)
+
+        results.append(dict(name='calibrate_value', settings=label, **measure(reference, values, repeat)))
+
+        for candidate_name in candidates:
+            lookup = CANDIDATES[candidate_name](calibrator, PEDAL)
+
+            def candidate(inputs):
+                for value in inputs:
+                    lookup(value)
+
+            results.append(dict(name=candidate_name, settings=label, **measure(candidate, values, repeat)))
+    return results
+
+
+def check_equivalence(candidates=None, verbose=False):
+    """
+    Exhaustiver Vergleich gegen calibrate_value() über alle Settings und alle int16 Werte
+
+    Returns:
+        Liste der Abweichungen (leer = äquivalent)
+    """
+    failures = []
+    for candidate_name in candidates or CANDIDATES:
+        for settings in settings_grid():
+            calibrator = make_calibrator(settings)
+            lookup = CANDIDATES[candidate_name](calibrator, PEDAL)
+            for value in FULL_RANGE:
+                expected = calibrator.calibrate_value(value, PEDAL)
+                actual = lookup(value)
+                if actual != expected:
+                    failures.append({
+                        'candidate': candidate_name,
+                        'settings': settings_label(settings),
+                        'value': value,
+                        'expected': expected,
+                        'actual': actual
+                    })
+                    break
+            if verbose:
+                print(f"  {candidate_name}: {settings_label(settings)} "
+                      f"{'FAIL' if failures and failures[-1]['settings'] == settings_label(settings) else 'ok'}")
+    return failures
+
+
+def summarize(results):
+    """Kalibrier-Ergebnisse pro Implementierung zusammenfassen (über alle Settings)"""
+    summary = {}
+    for result in results:
+        if 'settings' not in result:
+            continue
+        summary.setdefault(result['name'], []).append(result['ns_per_call'])
+    return {name: {'min': min(ns), 'median': round(statistics.median(ns), 1), 'max': max(ns)}
+            for name, ns in summary.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bench micro', description="Calibrator and decode microbenchmarks")
+    parser.add_argument('--stride', type=int, default=1, help="Nur jeden n-ten Eingabewert messen")
+    parser.add_argument('--repeat', type=int, default=3, help="Wiederholungen (bestes zählt)")
+    parser.add_argument('--candidates', nargs='*', choices=sorted(CANDIDATES), default=sorted(CANDIDATES),
+                        help="Optimierte Implementierungen, die mitgemessen werden")
+    parser.add_argument('--skip-calibration', action='store_true', help="Nur Konvertierung und Decode")
+    parser.add_argument('--check', action='store_true', help="Exhaustiver Äquivalenz-Check statt Benchmark")
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--json', action='store_true', help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        failures = check_equivalence(args.candidates, args.verbose)
+        for failure in failures:
+            print(f"MISMATCH {failure['candidate']} [{failure['settings']}] value={failure['value']}: "
+                  f"expected {failure['expected']}, got {failure['actual']}")
+        combos = len(list(settings_grid()))
+        print(f"{len(args.candidates)} candidate(s) × {combos} settings × {len(FULL_RANGE)} values: "
+              f"{'FAILED' if failures else 'equivalent'}")
+        return 1 if failures else 0
+
+    values = list(FULL_RANGE)[::max(1, args.stride)]
+    results = (bench_conversions(values, args.repeat) + bench_decode(values, args.repeat)
+               + bench_output(values, args.repeat))
+    if not args.skip_calibration:
+        results += bench_calibration(values, args.repeat, args.candidates)
+
+    report = {
+        'meta': {
+            'python': sys.version.split()[0],
+            'values': len(values),
+            'repeat': args.repeat
+        },
+        'results': results,
+        'summary': summarize(results)
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    for result in results:
+        label = f"{result['name']} [{result['settings']}]" if 'settings' in result else result['name']
+        print(f"{label:<58} {result['ns_per_call']:>8.1f} ns/call  "
+              f"(median {result['ns_per_call_median']:.1f})  {result['alloc_bytes_per_call']:>6} B/call")
+    for name, stats in report['summary'].items():
+        print(f"{name:<58} min {stats['min']} / median {stats['median']} / max {stats['max']} ns/call")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark - Replay von Pedal-Traces durch die komplette Engine
+Spielt synthetische oder aufgezeichnete js_events über eine PipeSource in
+PedalEnhancer bzw. VirtualRacingDevice ein und misst am CaptureSink.
+Braucht weder /dev/uinput noch echte Pedale.
+
+Pro Target × Kalibrierung (aus, linear, exponential, logarithmic):
+- events/s bei Sättigung (Trace wird so schnell wie möglich eingespeist)
+- CPU-Zeit pro 1000 Events
+- Output-Writes pro Input-Event
+- zusätzliche Latenz (read → uinput write) als Perzentile
+
+Usage:
+    cd src && python3 -m benchmarks.pipeline run --output base.json
+    cd src && python3 -m benchmarks.pipeline run --baseline base.json
+    cd src && python3 -m benchmarks.pipeline compare base.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from device.calibration import PedalCalibrator
+from device.io_backends import PipeSource, CaptureSink
+from device.pedal_enhancer import PedalEnhancer, JS_EVENT_FMT, JS_EVENT_SIZE, JS_EVENT_AXIS, JS_EVENT_INIT
+from device.session_recorder import SessionReader, SESSION_SUFFIX
+from device.telemetry import COUNTER_EVENTS_IN
+from device.virtual_device_v3 import VirtualRacingDevice
+
+TARGETS = ('pedals', 'pedals-legacy', 'pedals-1khz', 'racing')
+
+# Resampling-Ziele: Ausgaberate in Hz (Writes hängen vom Timer ab, nicht von der Trace)
+RESAMPLED_TARGETS = {'pedals-1khz': 1000}
+DEFAULT_TARGETS = ('pedals', 'racing')
+CALIBRATIONS = ('off',
+                PedalCalibrator.CURVE_LINEAR,
+                PedalCalibrator.CURVE_EXPONENTIAL,
+                PedalCalibrator.CURVE_LOGARITHMIC)
+SYNTHETIC_TRACES = ('sweep', 'stomp', 'noise')
+
+# Anzahl Pedal-Achsen, die beide Targets ausgeben
+PEDAL_AXES = 3
+
+# Kennzahlen für den Vergleich: (Schlüssel, True = größer ist besser)
+COMPARE_METRICS = (
+    ('events_per_s', True),
+    ('cpu_ms_per_1k', False),
+    ('latency_us.p50', False),
+    ('latency_us.p99', False),
+)
+DEFAULT_THRESHOLD = 10.0
+
+
+def synthetic_trace(kind, events):
+    """
+    Erzeugt einen synthetischen Trace als js_event Bytes
+
+    - sweep: alle Pedale fahren gleichmäßig über den vollen Bereich
+    - stomp: Bremse voll rein/raus, Gas teilweise, Kupplung ruht
+    - noise: Sensor-Rauschen um feste Positionen
+    """
+    data = bytearray()
+    seed = 12345
+    for i in range(events):
+        number = i % PEDAL_AXES
+        if kind == 'sweep':
+            value = (i * 37) % 65534 - 32767
+        elif kind == 'stomp':
+            phase = (i // 300) % 2
+            value = (32767 if phase else -32767) if number == 1 else (0 if number == 0 else -32767)
+        else:
+            seed = (seed * 1103515245 + 12345) & 0x7FFFFFFF
+            value = (-16000, 4000, -30000)[number] + seed % 257 - 128
+        data += struct.pack(JS_EVENT_FMT, i & 0xFFFFFFFF, value, JS_EVENT_AXIS, number)
+    return bytes(data)
+
+
+def load_trace(trace, events):
+    """
+    Lädt einen Trace
+
+    Args:
+        trace: Name eines synthetischen Traces, Pfad zu einer Aufnahme
+               (.pcrec, Rohwerte) oder zu einem rohen js_event Dump
+               (z.B. cat /dev/input/js1 > pedals.js)
+        events: Länge synthetischer Traces
+
+    Returns:
+        (bytes, erwartete Pedal-Writes)
+    """
+    if trace in SYNTHETIC_TRACES:
+        data = synthetic_trace(trace, events)
+    elif trace.endswith(SESSION_SUFFIX):
+        with SessionReader(trace) as reader:
+            data = reader.to_js_events()
+    else:
+        with open(trace, 'rb') as f:
+            data = f.read()
+        data = data[:len(data) - len(data) % JS_EVENT_SIZE]
+
+    expected = 0
+    for _, _, event_type, number in struct.iter_unpack(JS_EVENT_FMT, data):
+        if (event_type & ~JS_EVENT_INIT) == JS_EVENT_AXIS and number < PEDAL_AXES:
+            expected += 1
+    return data, expected
+
+
+def make_calibrator(calibration):
+    """Calibrator für ein Szenario (alle Pedale mit derselben Kurve)"""
+    calibrator = PedalCalibrator()
+    if calibration == 'off':
+        return calibrator
+
+    calibrator.enabled = True
+    for pedal in ('gas', 'brake', 'clutch'):
+        calibrator.set_pedal_setting(pedal, 'deadzone', 2.0)
+        calibrator.set_pedal_setting(pedal, 'max', 95.0)
+        calibrator.set_pedal_setting(pedal, 'curve', calibration)
+    return calibrator
+
+
+def make_target(target, calibrator, source, sink):
+    """
+    Baut das zu messende Objekt
+
+    Returns:
+        (Objekt mit start()/stop(), Latenz-Histogramm der Pedal-Pipeline, Extra-Quellen)
+    """
+    if target == 'racing':
+        wheelbase = PipeSource()
+        device = VirtualRacingDevice('pipe', 'pipe', calibrator=calibrator,
+                                     wheelbase_source=wheelbase, pedals_source=source, sink=sink)
+        return device, device.latency['pedals'], [wheelbase]
+
+    enhancer = PedalEnhancer('pipe', calibrator=calibrator, optimized=(target != 'pedals-legacy'),
+                             source=source, sink=sink, output_rate=RESAMPLED_TARGETS.get(target))
+    return enhancer, enhancer.latency, []
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_scenario(target, calibration, data, expected, timeout):
+    """Ein Durchlauf: Trace komplett einspeisen und warten, bis alles am Sink ist"""
+    source = PipeSource()
+    sink = CaptureSink()
+    calibrator = make_calibrator(calibration)
+    device, latency, extra_sources = make_target(target, calibrator, source, sink)
+
+    if not device.start():
+        raise RuntimeError(f"{target}: start failed")
+
+    feeder = threading.Thread(target=source.feed_bytes, args=(data,), daemon=True)
+
+    cpu_start = cpu_seconds()
+    started = time.perf_counter()
+    feeder.start()
+
+    deadline = started + timeout
+    events = len(data) // JS_EVENT_SIZE
+    if target in RESAMPLED_TARGETS:
+        # Fertig, wenn alles gelesen ist und der nächste Tick den letzten Frame geschrieben hat
+        while device.counters[COUNTER_EVENTS_IN] < events and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        time.sleep(2.0 / RESAMPLED_TARGETS[target])
+        complete = device.counters[COUNTER_EVENTS_IN] >= events
+    else:
+        while sink.writes < expected and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        complete = sink.writes >= expected
+
+    elapsed = time.perf_counter() - started
+    cpu = cpu_seconds() - cpu_start
+
+    device.stop()
+    source.close_writer()
+    feeder.join(timeout=1)
+    source.close()
+    for extra in extra_sources:
+        extra.close()
+
+    latency_snapshot = latency.snapshot()
+    return {
+        'target': target,
+        'calibration': calibration,
+        'events': events,
+        'writes': sink.writes,
+        'complete': complete,
+        'events_per_s': round(events / elapsed) if elapsed > 0 else 0,
+        'cpu_ms_per_1k': round(cpu * 1000.0 * 1000 / max(1, events), 3),
+        'writes_per_event': round(sink.writes / max(1, events), 3),
+        'latency_us': {
+            'p50': round(latency_snapshot['p50_us'], 1),
+            'p99': round(latency_snapshot['p99_us'], 1),
+            'p99_9': round(latency_snapshot['p99_9_us'], 1),
+            'max': round(latency_snapshot['max_us'], 1),
+        }
+    }
+
+
+def run_suite(targets, calibrations, trace, events, timeout):
+    """Alle Szenarien nacheinander"""
+    data, expected = load_trace(trace, events)
+    results = []
+    for target in targets:
+        for calibration in calibrations:
+            results.append(run_scenario(target, calibration, data, expected, timeout))
+
+    return {
+        'meta': {
+            'trace': trace,
+            'events': len(data) // JS_EVENT_SIZE,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results
+    }
+
+
+def _metric(result, key):
+    value = result
+    for part in key.split('.'):
+        value = value[part]
+    return value
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Vergleicht zwei Läufe
+
+    Args:
+        threshold: Erlaubte Verschlechterung in Prozent
+
+    Returns:
+        Liste von Dicts pro Szenario und Kennzahl mit change_pct und regression
+    """
+    base_results = {(r['target'], r['calibration']): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        base = base_results.get((result['target'], result['calibration']))
+        if base is None:
+            continue
+
+        for key, higher_is_better in COMPARE_METRICS:
+            old = _metric(base, key)
+            new = _metric(result, key)
+            if old == 0:
+                continue
+            change = (new - old) * 100.0 / old
+            worse = -change if higher_is_better else change
+            rows.append({
+                'target': result['target'],
+                'calibration': result['calibration'],
+                'metric': key,
+                'baseline': old,
+                'current': new,
+                'change_pct': round(change, 1),
+                'regression': worse > threshold
+            })
+    return rows
+
+
+def print_results(report):
+    for result in report['results']:
+        lat = result['latency_us']
+        flag = '' if result['complete'] else '  (incomplete)'
+        print(f"{result['target']:>13} {result['calibration']:>11}: "
+              f"{result['events_per_s']:>7} ev/s  {result['cpu_ms_per_1k']:>7.2f} ms cpu/1k  "
+              f"{result['writes_per_event']:.2f} w/ev  "
+              f"p50 {lat['p50']}µs  p99 {lat['p99']}µs  p99.9 {lat['p99_9']}µs{flag}")
+
+
+def warn_mismatch(baseline, current):
+    """Vergleiche sind nur bei gleichem Trace aussagekräftig"""
+    for key in ('trace', 'events', 'python'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"warning: {key} differs ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+
+
+def print_comparison(rows):
+    regressions = [row for row in rows if row['regression']]
+    for row in rows:
+        marker = 'REGRESSION' if row['regression'] else ''
+        print(f"{row['target']:>13} {row['calibration']:>11} {row['metric']:>15}: "
+              f"{row['baseline']} → {row['current']} ({row['change_pct']:+.1f}%) {marker}")
+    print(f"{len(regressions)} regression(s)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay benchmark for the enhancer pipeline")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Benchmark ausführen")
+    run_parser.add_argument('--trace', default='sweep',
+                            help=f"{'/'.join(SYNTHETIC_TRACES)} oder Pfad zu einem js_event Dump")
+    run_parser.add_argument('--events', type=int, default=5000, help="Länge synthetischer Traces")
+    run_parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(DEFAULT_TARGETS))
+    run_parser.add_argument('--calibrations', nargs='+', choices=CALIBRATIONS, default=list(CALIBRATIONS))
+    run_parser.add_argument('--timeout', type=float, default=60.0, help="Max. Sekunden pro Szenario")
+    run_parser.add_argument('--output', help="Ergebnis als JSON in diese Datei schreiben")
+    run_parser.add_argument('--json', action='store_true', help="Ergebnis als JSON ausgeben")
+    run_parser.add_argument('--baseline', help="Mit diesem JSON-Ergebnis vergleichen")
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help="Erlaubte Verschlechterung in Prozent")
+
+    compare_parser = commands.add_parser('compare', help="Zwei JSON-Ergebnisse vergleichen")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="Erlaubte Verschlechterung in Prozent")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        warn_mismatch(baseline, current)
+        regressions = print_comparison(compare(baseline, current, args.threshold))
+        return 1 if regressions else 0
+
+    report = run_suite(args.targets, args.calibrations, args.trace, args.events, args.timeout)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_results(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        warn_mismatch(baseline, report)
+        regressions = print_comparison(compare(baseline, report, args.threshold))
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
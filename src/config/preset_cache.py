@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Preset Cache - Vorkompilierte Kalibrierung für sofortigen Preset-Wechsel
+Lookup-Tabellen werden pro Pedal-Einstellung einmal gebaut und in einem
+binären Side-Cache neben dem Preset-Verzeichnis abgelegt (Schlüssel: Hash
+der Einstellungen). Ein Wechsel ist danach nur noch ein Tausch der Tabellen.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from config.presets import atomic_write
+from device.calibration import PedalCalibrator, PEDAL_NAMES, TABLE_SIZE
+
+# Bei Änderungen an der Kalibrier-Rechnung erhöhen (alte Tabellen ungültig)
+TABLE_FORMAT_VERSION = 1
+TABLE_BYTES = 4 * TABLE_SIZE
+
+# Kompilierte Presets im Speicher (je ~768 KB), ältere kommen aus dem Side-Cache
+MAX_CACHED_PRESETS = 16
+
+
+class CompiledPreset:
+    """Ein Preset mit fertigen Tabellen (read-only nach dem Bauen)"""
+
+    __slots__ = ('filename', 'name', 'hash', 'settings', 'tables')
+
+    def __init__(self, filename, name, content_hash, settings, tables):
+        self.filename = filename
+        self.name = name
+        self.hash = content_hash
+        self.settings = settings
+        self.tables = tables
+
+
+def table_key(settings):
+    """Hash einer Pedal-Einstellung (gleiche Einstellungen teilen sich eine Tabelle)"""
+    canonical = json.dumps([TABLE_FORMAT_VERSION, settings], sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class PresetCache:
+    """
+    Hält kompilierte Presets für einen PresetManager
+
+    Thread-safe: get() darf aus dem Button-Watcher und dem Control-Loop
+    gleichzeitig aufgerufen werden.
+    """
+
+    def __init__(self, preset_manager, cache_dir=None, max_presets=MAX_CACHED_PRESETS):
+        self.preset_manager = preset_manager
+        if cache_dir is None:
+            preset_dir = preset_manager.preset_dir
+            cache_dir = preset_dir.with_name(f".{preset_dir.name}.cache")
+        self.cache_dir = cache_dir
+        self.max_presets = max_presets
+        self.presets = OrderedDict()
+        self.lock = threading.Lock()
+        self.builder = PedalCalibrator()
+        self.tables_built = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get(self, filename):
+        """
+        Kompiliertes Preset (baut/lädt Tabellen bei Bedarf)
+
+        Returns:
+            CompiledPreset oder None, wenn das Preset fehlt oder ungültig ist
+        """
+        with self.lock:
+            self.preset_manager.refresh_index()
+            entry = self.preset_manager.index.get(filename)
+            if not entry or entry.get('invalid'):
+                return None
+
+            compiled = self.presets.get(filename)
+            if compiled is not None and compiled.hash == entry['hash']:
+                self.presets.move_to_end(filename)
+                return compiled
+
+            preset_data = self.preset_manager.load_preset(filename)
+            if preset_data is None:
+                return None
+
+            calibrator = PedalCalibrator()
+            self.preset_manager.apply_preset_to_calibrator(preset_data, calibrator)
+            settings = calibrator.snapshot()['settings']
+            tables = tuple(self._table(settings[pedal]) for pedal in PEDAL_NAMES)
+
+            compiled = CompiledPreset(filename, entry['name'], entry['hash'], settings, tables)
+            self.presets[filename] = compiled
+            while len(self.presets) > self.max_presets:
+                self.presets.popitem(last=False)
+            return compiled
+
+    def list_presets(self):
+        """PresetManager.list_presets() (thread-safe)"""
+        with self.lock:
+            return self.preset_manager.list_presets()
+
+    def filenames(self):
+        """Dateinamen aller gültigen Presets in Listen-Reihenfolge"""
+        return [preset['filename'] for preset in self.list_presets()]
+
+    def warm(self, pause=0.0):
+        """
+        Baut fehlende Tabellen aller Presets in den Side-Cache
+
+        Gedacht für einen Hintergrund-Thread der Engine. Gebaut wird ohne den
+        Cache-Lock und eine Tabelle nach der anderen: nach jeder neu gebauten
+        Tabelle (~70 ms Python) schläft warm() pause Sekunden, damit der
+        Reader nicht gegen eine ganze Serie von Tabellen um den GIL kämpft.
+        """
+        for filename in self.filenames():
+            with self.lock:
+                preset_data = self.preset_manager.load_preset(filename)
+            if preset_data is None:
+                continue
+
+            calibrator = PedalCalibrator()
+            self.preset_manager.apply_preset_to_calibrator(preset_data, calibrator)
+            for pedal_settings in calibrator.snapshot()['settings'].values():
+                built = self.tables_built
+                self._table(pedal_settings)
+                if pause and self.tables_built != built:
+                    time.sleep(pause)
+
+            # Tabellen liegen jetzt im Side-Cache, get() lädt sie nur noch
+            self.get(filename)
+
+    def _table(self, settings):
+        """Tabelle aus dem Side-Cache laden oder bauen und ablegen"""
+        path = os.path.join(self.cache_dir, f"{table_key(settings)}.tbl")
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) == TABLE_BYTES:
+                table = array('i')
+                table.frombytes(data)
+                return table
+        except OSError:
+            pass
+
+        table = self.builder._build_table(settings)
+        self.tables_built += 1
+
+        # Nie halbe Tabellen im Cache, fsync unnötig (Tabellen lassen sich neu bauen)
+        try:
+            atomic_write(path, table.tobytes(), sync=False)
+        except OSError as e:
+            print(f"Error writing table cache: {e}")
+
+        return table
@@ -1,12 +1,129 @@
 #!/usr/bin/env python3
 """
 Preset Manager - Speichern/Laden von Kalibrierungs-Presets
+Metadaten (Name, Beschreibung, mtime, Größe, Hash) liegen in einem Index
+neben dem Preset-Verzeichnis, Auflisten kostet damit nur einen Directory-Scan.
+Presets werden beim Laden einmal validiert und normalisiert, geschrieben wird
+atomar (Temp-Datei + fsync + rename).
 """
 
+import hashlib
 import json
 import os
 from pathlib import Path
 
+from device.calibration import AUTO_MAX_DEADZONE, PedalCalibrator, PEDAL_NAMES
+
+# Index-Format, bei Änderungen erhöhen (alter Index wird verworfen)
+INDEX_VERSION = 2
+
+CURVES = (PedalCalibrator.CURVE_LINEAR, PedalCalibrator.CURVE_EXPONENTIAL, PedalCalibrator.CURVE_LOGARITHMIC)
+
+# Prozent-Einstellungen mit erlaubtem Bereich (Deadzone wie GUI-Slider und Auto-Kalibrierung,
+# bei 100% würde der Calibrator durch (100 - deadzone) teilen)
+PERCENT_SETTINGS = {
+    'deadzone': (0.0, AUTO_MAX_DEADZONE),
+    'min': (0.0, 100.0),
+    'max': (0.0, 100.0)
+}
+
+
+def atomic_write(path, content, sync=True):
+    """
+    Schreibt eine Datei atomar: Leser sehen die alte oder die neue Version, nie eine halbe
+
+    Args:
+        path: Ziel-Datei
+        content: Bytes
+        sync: Daten und Verzeichnis-Eintrag per fsync auf die Platte bringen
+    """
+    path = str(path)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    if sync:
+        dir_fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def normalize_pedal_settings(pedal_name, settings):
+    """
+    Prüft die Einstellungen eines Pedals und bringt sie in die typisierte Form
+
+    Fehlende Werte bekommen den Default, unbekannte Schlüssel werden verworfen.
+
+    Returns:
+        Dict mit float deadzone/min/max, str curve, bool invert
+
+    Raises:
+        ValueError: bei falschen Typen oder Werten außerhalb des Bereichs
+    """
+    if not isinstance(settings, dict):
+        raise ValueError(f"{pedal_name}: settings must be an object")
+
+    normalized = dict(PedalCalibrator().settings[pedal_name])
+
+    for setting_name, (low, high) in PERCENT_SETTINGS.items():
+        if setting_name not in settings:
+            continue
+        value = settings[setting_name]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{pedal_name}.{setting_name}: expected a number, got {value!r}")
+        value = float(value)
+        if not low <= value <= high:
+            raise ValueError(f"{pedal_name}.{setting_name}: {value} outside {low:g}-{high:g}")
+        normalized[setting_name] = value
+
+    if 'curve' in settings:
+        if settings['curve'] not in CURVES:
+            raise ValueError(f"{pedal_name}.curve: unknown curve {settings['curve']!r}")
+        normalized['curve'] = settings['curve']
+
+    if 'invert' in settings:
+        if not isinstance(settings['invert'], bool):
+            raise ValueError(f"{pedal_name}.invert: expected true/false, got {settings['invert']!r}")
+        normalized['invert'] = settings['invert']
+
+    return normalized
+
+
+def normalize_preset(data, default_name=""):
+    """
+    Prüft ein Preset und normalisiert es (einmal beim Laden/Speichern)
+
+    Danach enthält es name, description und alle Pedale mit gültigen,
+    typisierten Werten - nachgelagerter Code muss nichts mehr prüfen.
+
+    Raises:
+        ValueError: bei ungültigem Preset
+    """
+    if not isinstance(data, dict):
+        raise ValueError("preset must be an object")
+
+    preset = {
+        'name': str(data.get('name', default_name)),
+        'description': str(data.get('description', ''))
+    }
+    for pedal in PEDAL_NAMES:
+        preset[pedal] = normalize_pedal_settings(pedal, data.get(pedal, {}))
+
+    return preset
+
 class PresetManager:
     """Verwaltet Kalibrierungs-Presets"""
 
@@ -21,11 +138,24 @@ class PresetManager:
         # Create presets directory if it doesn't exist
         self.preset_dir.mkdir(exist_ok=True)
 
+        # Metadaten-Index: presets/ → .presets.index.json daneben
+        self.index_path = self.preset_dir.with_name(f".{self.preset_dir.name}.index.json")
+        self.index = None
+
+        # Wheel-Button → Preset ('next', 'prev' oder Dateiname)
+        self.bindings_path = self.preset_dir.with_name(f".{self.preset_dir.name}.bindings.json")
+
+        # Spiel-Prozess → Preset (automatischer Wechsel)
+        self.games_path = self.preset_dir.with_name(f".{self.preset_dir.name}.games.json")
+
         # Create only stock preset
         self.create_stock_preset()
 
     def create_stock_preset(self):
         """Create stock preset (no calibration)"""
+        if (self.preset_dir / "stock.json").exists():
+            return
+
         stock_preset = {
             "name": "Stock",
             "description": "No calibration",
@@ -51,8 +181,10 @@ class PresetManager:
             return False
 
         try:
-            with open(filepath, 'w') as f:
-                json.dump(preset_data, f, indent=2)
+            preset_data = normalize_preset(preset_data, default_name=filename)
+            content = json.dumps(preset_data, indent=2).encode()
+            atomic_write(filepath, content)
+            self._update_index_entry(filepath, content, preset_data)
             return True
         except Exception as e:
             print(f"Error saving preset: {e}")
@@ -66,7 +198,7 @@ class PresetManager:
             filename: Dateiname (ohne .json)
 
         Returns:
-            Preset-Dict oder None
+            Normalisiertes Preset-Dict (siehe normalize_preset) oder None
         """
         filepath = self.preset_dir / f"{filename}.json"
 
@@ -75,29 +207,175 @@ class PresetManager:
 
         try:
             with open(filepath, 'r') as f:
-                return json.load(f)
+                return normalize_preset(json.load(f), default_name=filename)
         except Exception as e:
             print(f"Error loading preset: {e}")
             return None
 
     def list_presets(self):
-        """Listet alle verfügbaren Presets"""
-        presets = []
+        """
+        Listet alle verfügbaren Presets (aus dem Index)
 
-        for filepath in self.preset_dir.glob("*.json"):
-            try:
-                with open(filepath, 'r') as f:
-                    data = json.load(f)
-                    presets.append({
-                        'filename': filepath.stem,
-                        'name': data.get('name', filepath.stem),
-                        'description': data.get('description', '')
-                    })
-            except:
-                pass
+        Nur neue oder geänderte Dateien (mtime/Größe) werden gelesen.
+
+        Returns:
+            Liste von Dicts mit filename, name, description, mtime_ns, size, hash
+        """
+        self.refresh_index()
+
+        presets = []
+        for filename, entry in sorted(self.index.items()):
+            if entry.get('invalid'):
+                continue
+            presets.append({
+                'filename': filename,
+                'name': entry['name'],
+                'description': entry['description'],
+                'mtime_ns': entry['mtime_ns'],
+                'size': entry['size'],
+                'hash': entry['hash']
+            })
 
         return presets
 
+    def refresh_index(self):
+        """
+        Gleicht den Index per os.scandir mit dem Verzeichnis ab
+
+        Returns:
+            True, wenn sich etwas geändert hat
+        """
+        if self.index is None:
+            self.index = self._load_index()
+
+        seen = set()
+        changed = False
+
+        with os.scandir(self.preset_dir) as entries:
+            for dir_entry in entries:
+                if not dir_entry.name.endswith('.json') or not dir_entry.is_file():
+                    continue
+
+                filename = dir_entry.name[:-len('.json')]
+                seen.add(filename)
+                stat = dir_entry.stat()
+                entry = self.index.get(filename)
+                if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                    continue
+
+                self.index[filename] = self._read_entry(Path(dir_entry.path))
+                changed = True
+
+        for filename in [name for name in self.index if name not in seen]:
+            del self.index[filename]
+            changed = True
+
+        if changed:
+            self._save_index()
+
+        return changed
+
+    def _read_entry(self, filepath):
+        """Liest ein Preset einmal und baut den Index-Eintrag"""
+        with open(filepath, 'rb') as f:
+            content = f.read()
+            stat = os.fstat(f.fileno())
+
+        try:
+            data = normalize_preset(json.loads(content), default_name=filepath.stem)
+        except ValueError as e:
+            print(f"Error loading preset {filepath.name}: {e}")
+            data = None
+
+        return self._make_entry(filepath.stem, stat, content, data)
+
+    def _make_entry(self, filename, stat, content, data):
+        entry = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'hash': hashlib.sha256(content).hexdigest()
+        }
+
+        if data is None:
+            # Kaputte Datei: merken, damit sie erst nach einer Änderung neu gelesen wird
+            entry.update(name=filename, description='', invalid=True)
+        else:
+            entry.update(name=data['name'], description=data['description'])
+
+        return entry
+
+    def _update_index_entry(self, filepath, content, data):
+        """Trägt ein gerade geschriebenes Preset ohne erneutes Lesen ein"""
+        if self.index is None:
+            return
+        self.index[filepath.stem] = self._make_entry(filepath.stem, filepath.stat(), content, data)
+        self._save_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION and isinstance(data.get('presets'), dict):
+                return data['presets']
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+
+    def _save_index(self):
+        try:
+            # Ohne fsync: der Index lässt sich jederzeit aus den Presets neu bauen
+            atomic_write(self.index_path, json.dumps({'version': INDEX_VERSION, 'presets': self.index}).encode(), sync=False)
+        except OSError as e:
+            # Index ist nur ein Cache
+            print(f"Error saving preset index: {e}")
+
+    def load_bindings(self):
+        """
+        Lädt die Button-Belegung für den Preset-Wechsel
+
+        Returns:
+            Dict Button-Nummer (int) → 'next', 'prev' oder Preset-Dateiname
+        """
+        try:
+            with open(self.bindings_path, 'r') as f:
+                data = json.load(f)
+            return {int(button): str(action) for button, action in data.items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def save_bindings(self, bindings):
+        """Speichert die Button-Belegung"""
+        try:
+            content = json.dumps({str(button): action for button, action in bindings.items()}, indent=2)
+            atomic_write(self.bindings_path, content.encode())
+            return True
+        except OSError as e:
+            print(f"Error saving bindings: {e}")
+            return False
+
+    def load_games(self):
+        """
+        Lädt die Zuordnung Spiel → Preset
+
+        Returns:
+            Dict Prozess-Name (oder Kürzel wie 'acc') → Preset-Dateiname
+        """
+        try:
+            with open(self.games_path, 'r') as f:
+                data = json.load(f)
+            return {str(game): str(filename) for game, filename in data.items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def save_games(self, games):
+        """Speichert die Zuordnung Spiel → Preset"""
+        try:
+            atomic_write(self.games_path, json.dumps(games, indent=2).encode())
+            return True
+        except OSError as e:
+            print(f"Error saving game presets: {e}")
+            return False
+
     def delete_preset(self, filename):
         """Löscht ein Preset"""
         filepath = self.preset_dir / f"{filename}.json"
@@ -105,6 +383,8 @@ class PresetManager:
         try:
             if filepath.exists():
                 filepath.unlink()
+                if self.index is not None and self.index.pop(filename, None) is not None:
+                    self._save_index()
                 return True
         except Exception as e:
             print(f"Error deleting preset: {e}")
@@ -112,12 +392,10 @@ class PresetManager:
         return False
 
     def apply_preset_to_calibrator(self, preset_data, calibrator):
-        """Wendet ein Preset auf einen Calibrator an"""
-        for pedal in ['gas', 'brake', 'clutch']:
-            if pedal in preset_data:
-                pedal_settings = preset_data[pedal]
-                for setting_name, value in pedal_settings.items():
-                    calibrator.set_pedal_setting(pedal, setting_name, value)
+        """Wendet ein (per load_preset normalisiertes) Preset auf einen Calibrator an"""
+        for pedal in PEDAL_NAMES:
+            for setting_name, value in preset_data[pedal].items():
+                calibrator.set_pedal_setting(pedal, setting_name, value)
 
     def get_preset_from_calibrator(self, calibrator, name="Custom", description=""):
         """Erstellt ein Preset-Dict aus einem Calibrator"""
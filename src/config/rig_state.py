@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Rig State - Zuletzt benutzte Pedale, Preset und Engine-Zustand
+Liegt als .pedalc0re.state.json neben presets/ und wird bei START/STOP und
+beim Schließen geschrieben. Beim nächsten Programmstart liest der Warm-Start
+(device.warm_start) die Datei, bevor die GUI steht, und startet die Engine
+direkt mit der gespeicherten Identität - ohne Scan und Klassifizierung.
+"""
+
+import json
+from pathlib import Path
+
+from config.presets import atomic_write, normalize_pedal_settings
+from device.calibration import PEDAL_NAMES
+
+# Format, bei Änderungen erhöhen (alter Zustand wird ignoriert)
+STATE_VERSION = 1
+
+# Identität eines Devices (siehe device.scanner.device_identity)
+IDENTITY_KEYS = ('path', 'name', 'bustype', 'vendor', 'product')
+
+# Engine-Optionen, die gespeichert werden (PedalEnhancer kwargs)
+STATE_OPTIONS = ('optimized', 'realtime', 'output_rate', 'direct_output', 'watchdog_ms', 'input_format')
+
+
+def default_state_path():
+    """.pedalc0re.state.json im Projektverzeichnis (neben presets/)"""
+    return Path(__file__).parent.parent.parent / ".pedalc0re.state.json"
+
+
+def _identity(data):
+    if not isinstance(data, dict) or not all(isinstance(data.get(key), str) for key in IDENTITY_KEYS):
+        return None
+    return {key: data[key] for key in IDENTITY_KEYS}
+
+
+def load_rig_state(path=None):
+    """
+    Lädt und prüft den gespeicherten Zustand
+
+    Returns:
+        Dict mit 'pedals' (Identität oder None), 'preset', 'running',
+        'options' und 'calibration' (Calibrator-Snapshot) oder None
+        wenn keine oder eine ungültige Datei existiert
+    """
+    path = path or default_state_path()
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Error loading rig state: {e}")
+        return None
+
+    try:
+        if data.get('version') != STATE_VERSION:
+            return None
+
+        calibration = data.get('calibration') or {}
+        settings = calibration.get('settings') or {}
+        options = data.get('options') or {}
+        preset = data.get('preset')
+        return {
+            'pedals': _identity(data.get('pedals')),
+            'preset': preset if isinstance(preset, str) else None,
+            'running': data.get('running') is True,
+            'options': {key: options[key] for key in STATE_OPTIONS if key in options},
+            'calibration': {
+                'enabled': calibration.get('enabled') is True,
+                'settings': {pedal: normalize_pedal_settings(pedal, settings.get(pedal, {})) for pedal in PEDAL_NAMES}
+            }
+        }
+    except (AttributeError, ValueError) as e:
+        print(f"Error loading rig state: {e}")
+        return None
+
+
+def save_rig_state(pedals, preset, running, options, calibration, path=None):
+    """
+    Speichert den Zustand (atomar)
+
+    Args:
+        pedals: Identität der Pedale (device_identity) oder None
+        preset: Dateiname des aktiven Presets oder None
+        running: Engine lief (Warm-Start beim nächsten Programmstart)
+        options: Engine-Optionen des letzten Starts
+        calibration: Calibrator-Snapshot
+    """
+    state = {
+        'version': STATE_VERSION,
+        'pedals': _identity(pedals),
+        'preset': preset,
+        'running': bool(running),
+        'options': {key: options[key] for key in STATE_OPTIONS if key in (options or {})},
+        'calibration': calibration
+    }
+    try:
+        atomic_write(path or default_state_path(), json.dumps(state, indent=2).encode())
+        return True
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Error saving rig state: {e}")
+        return False
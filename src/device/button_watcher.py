@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Button Watcher - Meldet Button-Drücke eines js Devices (z.B. Wheelbase)
+Liest parallel zum Spiel mit, js Devices erlauben mehrere Leser.
+"""
+
+import os
+import select
+import struct
+import threading
+
+from device.io_backends import JoystickSource, JS_EVENT_FMT, JS_EVENT_SIZE
+
+JS_EVENT_BUTTON = 0x01
+READ_BATCH = 16
+POLL_TIMEOUT_MS = 100
+
+
+class ButtonWatcher:
+    """Ruft on_press(button) für jeden Button-Druck auf (nicht für INIT-Events)"""
+
+    def __init__(self, path, on_press, source=None):
+        self.path = path
+        self.on_press = on_press
+        self.source = source if source else JoystickSource(path)
+        self.is_running = False
+        self.thread = None
+
+    def start(self):
+        if self.is_running:
+            return False
+
+        try:
+            self.source.open()
+        except OSError as ex:
+            print(f"Button watcher: cannot open {self.path}: {ex}")
+            return False
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="button-watcher")
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.is_running = False
+        if self.thread:
+            self.thread.join(timeout=1)
+            self.thread = None
+        self.source.close()
+
+    def _loop(self):
+        fd = self.source.fileno()
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+
+        while self.is_running:
+            if not poller.poll(POLL_TIMEOUT_MS):
+                continue
+
+            try:
+                data = os.read(fd, JS_EVENT_SIZE * READ_BATCH)
+            except BlockingIOError:
+                continue
+            except OSError:
+                # Device abgezogen
+                break
+
+            for _, value, event_type, number in struct.iter_unpack(JS_EVENT_FMT, data[:len(data) - len(data) % JS_EVENT_SIZE]):
+                if event_type == JS_EVENT_BUTTON and value == 1:
+                    try:
+                        self.on_press(number)
+                    except Exception as ex:
+                        print(f"Button watcher: {ex}")
+
+        self.is_running = False
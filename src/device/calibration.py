@@ -4,7 +4,145 @@ Pedal Calibration Engine
 Transformiert rohe Pedal-Werte mit Deadzone, Kurven, Range, Invert
 """
 
+import copy
 import math
+import time
+from array import array
+
+# Pedal-Namen in js Achsen-Reihenfolge (Achse 0 = Gas, 1 = Bremse, 2 = Kupplung)
+PEDAL_NAMES = ('gas', 'brake', 'clutch')
+
+# Lookup-Tabellen decken den kompletten int16 Bereich ab
+TABLE_OFFSET = 32768
+TABLE_SIZE = 65536
+
+# Auto-Kalibrierung: Ruhepositions-Histogramm (256 Bins über int16)
+AUTO_HISTOGRAM_SHIFT = 8
+AUTO_HISTOGRAM_BINS = TABLE_SIZE >> AUTO_HISTOGRAM_SHIFT
+# Zweite Differenzen bis ~1% gelten als Rauschen, größere als Bewegung
+AUTO_NOISE_STEP = 655
+# Mindestens so viel Pedalweg (%) und so viele Samples für einen Vorschlag
+AUTO_MIN_TRAVEL = 20.0
+AUTO_MIN_SAMPLES = 20
+AUTO_NOISE_SIGMAS = 3.0
+AUTO_MAX_DEADZONE = 20.0
+
+
+def _to_percentage(value):
+    return ((value + 32767) / 65534) * 100.0
+
+
+class AutoCalibration:
+    """
+    Lernt Min/Max, Ruheposition und Rauschen pro Achse aus dem Live-Stream
+
+    update() ist O(1) und wird vom Reader pro Event aufgerufen:
+    - laufendes Min/Max
+    - Ruheposition als Histogramm der Verweildauer pro Wert
+    - Rausch-Varianz (Welford) über die zweite Differenz aufeinanderfolgender
+      Samples, damit gleichmäßige Bewegung nicht als Rauschen zählt
+    """
+
+    def __init__(self, axes=len(PEDAL_NAMES)):
+        self.axes = axes
+        self.started = time.monotonic()
+        self.samples = array('Q', bytes(8 * axes))
+        self.minimum = array('i', [32767] * axes)
+        self.maximum = array('i', [-32768] * axes)
+        self.last_value = array('i', bytes(4 * axes))
+        self.last_step = array('i', bytes(4 * axes))
+        self.last_time = array('q', bytes(8 * axes))
+        self.histograms = [array('Q', bytes(8 * AUTO_HISTOGRAM_BINS)) for _ in range(axes)]
+        self.noise_count = array('Q', bytes(8 * axes))
+        self.noise_mean = array('d', bytes(8 * axes))
+        self.noise_m2 = array('d', bytes(8 * axes))
+
+    def update(self, axis, value, time_ns):
+        """Ein Sample (Rohwert) einer Achse"""
+        if axis >= self.axes:
+            return
+
+        count = self.samples[axis]
+        if value < self.minimum[axis]:
+            self.minimum[axis] = value
+        if value > self.maximum[axis]:
+            self.maximum[axis] = value
+
+        if count:
+            # Verweildauer (µs) dem vorherigen Wert gutschreiben
+            last = self.last_value[axis]
+            self.histograms[axis][(last + TABLE_OFFSET) >> AUTO_HISTOGRAM_SHIFT] += (time_ns - self.last_time[axis]) // 1000
+
+            step = value - last
+            if count > 1:
+                curvature = step - self.last_step[axis]
+                if -AUTO_NOISE_STEP <= curvature <= AUTO_NOISE_STEP:
+                    n = self.noise_count[axis] + 1
+                    delta = curvature - self.noise_mean[axis]
+                    self.noise_mean[axis] += delta / n
+                    self.noise_m2[axis] += delta * (curvature - self.noise_mean[axis])
+                    self.noise_count[axis] = n
+            self.last_step[axis] = step
+
+        self.last_value[axis] = value
+        self.last_time[axis] = time_ns
+        self.samples[axis] = count + 1
+
+    def propose(self, now_ns=None):
+        """
+        Schlägt Einstellungen pro Pedal vor
+
+        Returns:
+            Dict pedal_name → {'min', 'max', 'deadzone', 'invert', 'rest', 'noise', 'samples'}
+            oder None, wenn das Pedal nicht weit genug bewegt wurde
+        """
+        now_ns = now_ns if now_ns is not None else time.monotonic_ns()
+        proposal = {}
+
+        for axis, pedal_name in enumerate(PEDAL_NAMES[:self.axes]):
+            samples = self.samples[axis]
+            low = _to_percentage(self.minimum[axis])
+            high = _to_percentage(self.maximum[axis])
+            if samples < AUTO_MIN_SAMPLES or high - low < AUTO_MIN_TRAVEL:
+                proposal[pedal_name] = None
+                continue
+
+            # Aktueller Wert ruht seit dem letzten Event
+            histogram = self.histograms[axis].tolist()
+            histogram[(self.last_value[axis] + TABLE_OFFSET) >> AUTO_HISTOGRAM_SHIFT] += \
+                max(0, now_ns - self.last_time[axis]) // 1000
+            rest_bin = histogram.index(max(histogram))
+            rest_value = (rest_bin << AUTO_HISTOGRAM_SHIFT) - TABLE_OFFSET + (1 << (AUTO_HISTOGRAM_SHIFT - 1))
+            rest = min(max(_to_percentage(rest_value), low), high)
+
+            # Zweite Differenz von weißem Rauschen hat die sechsfache Varianz
+            noise_count = self.noise_count[axis]
+            variance = self.noise_m2[axis] / (noise_count - 1) if noise_count > 1 else 0.0
+            noise = math.sqrt(variance / 6.0) / 65534 * 100.0
+
+            # Ruht das Pedal oben, ist es invertiert (Invert wirkt vor der Range)
+            invert = rest - low > high - rest
+            if invert:
+                low, high, rest = 100.0 - high, 100.0 - low, 100.0 - rest
+
+            # Abrunden: Vollgas erreicht sicher 100%, Rest fängt die Deadzone
+            range_min = math.floor(low * 10) / 10
+            range_max = math.floor(high * 10) / 10
+            deadzone = (max(0.0, rest - range_min) + AUTO_NOISE_SIGMAS * noise) / (range_max - range_min) * 100.0
+            deadzone = min(AUTO_MAX_DEADZONE, math.ceil(deadzone * 10) / 10)
+
+            proposal[pedal_name] = {
+                'min': range_min,
+                'max': range_max,
+                'deadzone': deadzone,
+                'invert': invert,
+                'rest': round(rest, 2),
+                'noise': round(noise, 3),
+                'samples': samples
+            }
+
+        return proposal
+
 
 class PedalCalibrator:
     """
@@ -43,6 +181,16 @@ class PedalCalibrator:
 
         self.enabled = False
 
+        # Kompilierte Lookup-Tabellen pro Achse (None = nicht kompiliert)
+        # Die Liste wird nur in-place geändert, der Reader hält eine Referenz
+        self.tables = [None, None, None]
+
+        # Wird bei jeder Änderung erhöht (für Snapshot-Sync zur Engine)
+        self.version = 0
+
+        # Laufende Auto-Kalibrierung (AutoCalibration), vom Reader gefüttert
+        self.auto_calibration = None
+
     def calibrate_value(self, value, pedal_name):
         """
         Kalibriert einen einzelnen Pedal-Wert
@@ -157,15 +305,158 @@ class PedalCalibrator:
         # Zurück zu 0-100%
         return result * 100.0
 
+    def compile(self, pedal_name=None):
+        """
+        Kompiliert Lookup-Tabellen (raw → kalibriert) für den Hot-Path
+
+        Ergebnis ist bit-identisch zu calibrate_value(), kostet aber pro
+        Event nur einen Array-Zugriff statt Float-Rechnung.
+
+        Args:
+            pedal_name: Nur dieses Pedal kompilieren (Standard: alle ungültigen)
+        """
+        for index, name in enumerate(PEDAL_NAMES):
+            if pedal_name is not None and name != pedal_name:
+                continue
+            if pedal_name is None and self.tables[index] is not None:
+                continue
+            self.tables[index] = self._build_table(self.settings[name])
+
+    def _build_table(self, settings):
+        """Baut eine Tabelle mit derselben Rechenreihenfolge wie calibrate_value()"""
+        invert = settings['invert']
+        min_val = settings['min']
+        max_val = settings['max']
+        deadzone = settings['deadzone']
+        curve_type = settings['curve']
+        use_range = min_val < max_val
+        sqrt = math.sqrt
+
+        table = array('i', bytes(4 * TABLE_SIZE))
+        index = 0
+        for value in range(-TABLE_OFFSET, TABLE_SIZE - TABLE_OFFSET):
+            percentage = ((value + 32767) / 65534) * 100.0
+            if invert:
+                percentage = 100.0 - percentage
+
+            if use_range:
+                if percentage < min_val:
+                    percentage = 0.0
+                elif percentage > max_val:
+                    percentage = 100.0
+                else:
+                    percentage = ((percentage - min_val) / (max_val - min_val)) * 100.0
+
+            if percentage < deadzone:
+                percentage = 0.0
+            else:
+                percentage = ((percentage - deadzone) / (100.0 - deadzone)) * 100.0
+
+            normalized = percentage / 100.0
+            if curve_type == self.CURVE_EXPONENTIAL:
+                normalized = normalized ** 2
+            elif curve_type == self.CURVE_LOGARITHMIC:
+                normalized = 0 if normalized <= 0 else sqrt(normalized)
+
+            table[index] = int(((normalized * 100.0) / 100.0) * 65534 - 32767)
+            index += 1
+
+        return table
+
+    def _invalidate(self, pedal_name):
+        """Verwirft die kompilierte Tabelle eines Pedals"""
+        if pedal_name in PEDAL_NAMES:
+            self.tables[PEDAL_NAMES.index(pedal_name)] = None
+        self.version += 1
+
     def set_pedal_setting(self, pedal_name, setting_name, value):
         """Setzt eine Einstellung für ein Pedal"""
         if pedal_name in self.settings and setting_name in self.settings[pedal_name]:
             self.settings[pedal_name][setting_name] = value
+            self._invalidate(pedal_name)
 
     def get_pedal_settings(self, pedal_name):
         """Gibt alle Einstellungen für ein Pedal zurück"""
         return self.settings.get(pedal_name, {})
 
+    def snapshot(self):
+        """Kopie aller Einstellungen (picklebar, z.B. für die Engine-Pipe)"""
+        return {
+            'enabled': self.enabled,
+            'settings': copy.deepcopy(self.settings)
+        }
+
+    def apply_snapshot(self, snapshot, compile=True):
+        """
+        Übernimmt einen Snapshot
+
+        Nur geänderte Werte werden gesetzt, damit unveränderte Pedale
+        ihre kompilierte Tabelle behalten.
+
+        Args:
+            snapshot: Dict aus snapshot()
+            compile: Ungültige Tabellen sofort neu bauen
+        """
+        for pedal_name, pedal_settings in snapshot['settings'].items():
+            current = self.settings.get(pedal_name, {})
+            for setting_name, value in pedal_settings.items():
+                if current.get(setting_name) != value:
+                    self.set_pedal_setting(pedal_name, setting_name, value)
+        self.enabled = snapshot['enabled']
+
+        if compile:
+            self.compile()
+
+    def activate(self, settings, tables):
+        """
+        Wechselt auf vorkompilierte Einstellungen (z.B. aus dem PresetCache)
+
+        Die Tabellen werden per Slice-Zuweisung in einem Schritt getauscht,
+        der Reader sieht also entweder alle alten oder alle neuen Tabellen.
+
+        Args:
+            settings: Dict pedal_name → Einstellungen (wird nicht verändert)
+            tables: Tabellen in PEDAL_NAMES Reihenfolge
+        """
+        self.settings = copy.deepcopy(settings)
+        self.tables[:] = tables
+        self.version += 1
+
+    def start_auto_calibration(self):
+        """Beginnt eine Auto-Kalibrierung (Samples kommen über auto_calibration.update())"""
+        self.auto_calibration = AutoCalibration()
+        return self.auto_calibration
+
+    def stop_auto_calibration(self):
+        """
+        Beendet die Auto-Kalibrierung
+
+        Returns:
+            Vorschlag aus AutoCalibration.propose() oder None, falls keine lief
+        """
+        auto_calibration = self.auto_calibration
+        self.auto_calibration = None
+        return auto_calibration.propose() if auto_calibration else None
+
+    def apply_auto_calibration(self, proposal):
+        """
+        Übernimmt einen Vorschlag (Pedale ohne Vorschlag bleiben unverändert)
+
+        Returns:
+            Liste der geänderten Pedale
+        """
+        applied = []
+        for pedal_name, values in proposal.items():
+            if not values or pedal_name not in self.settings:
+                continue
+            for setting_name in ('min', 'max', 'deadzone', 'invert'):
+                if self.settings[pedal_name][setting_name] != values[setting_name]:
+                    self.set_pedal_setting(pedal_name, setting_name, values[setting_name])
+            applied.append(pedal_name)
+
+        self.compile()
+        return applied
+
     def reset_pedal(self, pedal_name):
         """Setzt Pedal auf Standardwerte zurück"""
         if pedal_name in self.settings:
@@ -176,8 +467,9 @@ class PedalCalibrator:
                 'curve': self.CURVE_LINEAR,
                 'invert': False
             }
+            self._invalidate(pedal_name)
 
     def reset_all(self):
         """Setzt alle Pedale zurück"""
-        for pedal in ['gas', 'brake', 'clutch']:
+        for pedal in PEDAL_NAMES:
             self.reset_pedal(pedal)
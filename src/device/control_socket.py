@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Control Socket - Unix-Socket API der laufenden Engine (JSON Lines)
+Eine Anfrage pro Zeile, z.B. {"cmd": "preset", "name": "acc"}, Antwort ebenfalls
+eine Zeile: {"ok": true, "result": ...} bzw. {"ok": false, "error": "..."}.
+Läuft in einem eigenen Thread, Anfragen sind auf MAX_REQUEST_BYTES begrenzt.
+
+CLI: main.py ctl <cmd> [args]   (ping, status, stats, presets, preset <name>,
+                                 set <pedal> <setting> <value>, pause, resume, latency,
+                                 diagnostics, analytics)
+"""
+
+import json
+import os
+import selectors
+import socket
+import sys
+import threading
+
+MAX_REQUEST_BYTES = 4096
+MAX_CLIENTS = 8
+CLIENT_TIMEOUT = 2.0
+STOP_POLL_INTERVAL = 0.5
+
+# resume legt ggf. erst das virtuelle Device an
+REQUEST_TIMEOUT = 10.0
+
+
+def default_socket_path():
+    """$PEDALC0RE_SOCKET, sonst $XDG_RUNTIME_DIR/pedalc0re.sock (Fallback: /tmp/pedalc0re-<uid>.sock)"""
+    if os.environ.get('PEDALC0RE_SOCKET'):
+        return os.environ['PEDALC0RE_SOCKET']
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "pedalc0re.sock")
+    return f"/tmp/pedalc0re-{os.getuid()}.sock"
+
+
+class ControlServer:
+    """
+    Nimmt JSON-Line Anfragen an und beantwortet sie über handler(request) → result
+
+    Der Handler läuft im Server-Thread, Fehler (Exceptions) gehen als
+    {"ok": false} an den Client zurück.
+    """
+
+    def __init__(self, handler, path=None, max_clients=MAX_CLIENTS):
+        self.handler = handler
+        self.path = path if path else default_socket_path()
+        self.max_clients = max_clients
+        self.server = None
+        self.thread = None
+        self.is_running = False
+
+    def start(self):
+        if self.is_running:
+            return False
+
+        if not self._claim_path():
+            return False
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        except OSError as ex:
+            print(f"Control socket: cannot bind {self.path}: {ex}")
+            server.close()
+            return False
+        finally:
+            os.umask(old_umask)
+
+        server.listen(self.max_clients)
+        server.setblocking(False)
+        self.server = server
+        self.is_running = True
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="control-socket")
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.is_running = False
+        if self.thread:
+            self.thread.join(timeout=STOP_POLL_INTERVAL + 1)
+            self.thread = None
+        if self.server:
+            self.server.close()
+            self.server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _claim_path(self):
+        """Räumt einen verwaisten Socket weg, verweigert bei laufender zweiter Engine"""
+        if not os.path.exists(self.path):
+            return True
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+            print(f"Control socket: {self.path} is in use by another engine")
+            return False
+        except OSError:
+            os.unlink(self.path)
+            return True
+        finally:
+            probe.close()
+
+    def _loop(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.server, selectors.EVENT_READ)
+        buffers = {}
+
+        try:
+            while self.is_running:
+                for key, _ in selector.select(STOP_POLL_INTERVAL):
+                    if key.fileobj is self.server:
+                        self._accept(selector, buffers)
+                    elif not self._read(key.fileobj, buffers):
+                        selector.unregister(key.fileobj)
+                        buffers.pop(key.fileobj, None)
+                        key.fileobj.close()
+        finally:
+            for client in list(buffers):
+                client.close()
+            selector.close()
+
+    def _accept(self, selector, buffers):
+        try:
+            client, _ = self.server.accept()
+        except OSError:
+            return
+
+        if len(buffers) >= self.max_clients:
+            client.close()
+            return
+
+        client.settimeout(CLIENT_TIMEOUT)
+        buffers[client] = bytearray()
+        selector.register(client, selectors.EVENT_READ)
+
+    def _read(self, client, buffers):
+        """Liest verfügbare Daten, beantwortet komplette Zeilen. False = Verbindung schließen"""
+        try:
+            data = client.recv(MAX_REQUEST_BYTES)
+        except OSError:
+            return False
+        if not data:
+            return False
+
+        buffer = buffers[client]
+        buffer += data
+
+        while True:
+            end = buffer.find(b'\n')
+            if end < 0:
+                if len(buffer) > MAX_REQUEST_BYTES:
+                    self._send(client, {'ok': False, 'error': "request too large"})
+                    return False
+                return True
+
+            line = bytes(buffer[:end])
+            del buffer[:end + 1]
+            if line.strip() and not self._send(client, self._dispatch(line)):
+                return False
+
+    def _dispatch(self, line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or not isinstance(request.get('cmd'), str):
+                raise ValueError("expected {\"cmd\": ...}")
+            return {'ok': True, 'result': self.handler(request)}
+        except Exception as ex:
+            return {'ok': False, 'error': str(ex) or type(ex).__name__}
+
+    def _send(self, client, response):
+        try:
+            client.sendall(json.dumps(response).encode() + b'\n')
+            return True
+        except OSError:
+            return False
+
+
+class ControlClient:
+    """Verbindung zur Engine (z.B. für Skripte oder Stream-Deck Plugins)"""
+
+    def __init__(self, path=None, timeout=REQUEST_TIMEOUT):
+        self.path = path if path else default_socket_path()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(self.path)
+        self.reader = self.sock.makefile('rb')
+
+    def request(self, cmd, **args):
+        """
+        Schickt eine Anfrage
+
+        Returns:
+            result der Engine
+
+        Raises:
+            RuntimeError: Engine hat mit ok=false geantwortet
+        """
+        self.sock.sendall(json.dumps(dict(args, cmd=cmd)).encode() + b'\n')
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("engine closed the control socket")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise RuntimeError(response.get('error', "request failed"))
+        return response.get('result')
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parse_value(text):
+    """CLI-Wert: JSON (5, true, "linear") oder einfach der Text"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    """'main.py ctl <cmd> [args]' - eine Anfrage, Ergebnis als JSON auf stdout"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv:
+        print("usage: main.py ctl {ping,status,stats,presets,preset <name>,"
+              "set <pedal> <setting> <value>,pause,resume,latency,diagnostics,analytics}")
+        return 2
+
+    cmd, args = argv[0], argv[1:]
+    if cmd == 'preset' and len(args) == 1:
+        request = {'name': args[0]}
+    elif cmd == 'set' and len(args) == 3:
+        request = {'pedal': args[0], 'setting': args[1], 'value': _parse_value(args[2])}
+    elif not args:
+        request = {}
+    else:
+        print(f"ctl: unexpected arguments for {cmd}: {' '.join(args)}")
+        return 2
+
+    try:
+        with ControlClient() as client:
+            result = client.request(cmd, **request)
+    except (OSError, ConnectionError) as ex:
+        print(f"ctl: engine not reachable ({ex})")
+        return 1
+    except RuntimeError as ex:
+        print(f"ctl: {ex}")
+        return 1
+
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Diagnostics - Fehlerzähler und Ring-Puffer der letzten Diagnose-Einträge
+Jeder Fehlerpfad ruft record(code, detail): der Zähler code (Index in
+COUNTER_NAMES) steigt und ein Eintrag (Zeit, Code, Pipeline, Detail wie
+errno oder Byte-Anzahl) landet im vorab allokierten Ring.
+
+record() formatiert nichts, macht keine I/O und nimmt keine Locks - im
+Normalbetrieb wird es gar nicht aufgerufen. Formatiert wird erst beim
+Auslesen (dump/format_record, z.B. über 'main.py ctl diagnostics').
+"""
+
+import errno
+import itertools
+import time
+from array import array
+
+from device.telemetry import (
+    COUNTER_NAMES, COUNTER_WRITE_ERRORS, COUNTER_SHORT_READS, COUNTER_READER_ERRORS, COUNTER_DEVICE_ERRORS
+)
+
+# Einträge im Ring (Zweierpotenz)
+RING_SIZE = 256
+
+# Pipeline-Namen wie bei LatencyHistogram
+PIPELINE_PEDALS = 0
+PIPELINE_WHEELBASE = 1
+PIPELINE_NAMES = ('pedals', 'wheelbase')
+
+# Detail ist bei diesen Codes eine errno, bei SHORT_READS die gelesene Länge
+ERRNO_CODES = (COUNTER_WRITE_ERRORS, COUNTER_READER_ERRORS, COUNTER_DEVICE_ERRORS)
+
+# Zähler, die nur auf Fehler-/Störungspfaden steigen
+ERROR_COUNTERS = ('reader_restarts', 'write_errors', 'read_again', 'short_reads', 'reader_errors', 'device_errors',
+                  'syn_dropped')
+
+
+def error_number(ex):
+    """errno einer Exception (0 wenn keine)"""
+    return getattr(ex, 'errno', None) or 0
+
+
+class DiagnosticLog:
+    """
+    Zähler + Ring der letzten RING_SIZE Einträge
+
+    Schreiben dürfen mehrere Threads (Reader, Watchdog, Control-Loop): der
+    Slot kommt aus einem itertools.count, dessen next() unter dem GIL atomar ist.
+    """
+
+    def __init__(self, counters=None, size=RING_SIZE):
+        if size & (size - 1):
+            raise ValueError(f"ring size must be a power of two, got {size}")
+        self.counters = counters if counters is not None else array('Q', bytes(8 * len(COUNTER_NAMES)))
+        self.mask = size - 1
+        self.slots = itertools.count()
+        self.times = array('Q', bytes(8 * size))
+        self.codes = array('B', bytes(size))
+        self.pipelines = array('B', bytes(size))
+        self.details = array('q', bytes(8 * size))
+
+    def record(self, code, detail=0, pipeline=PIPELINE_PEDALS):
+        """Zählt code hoch und merkt sich den Eintrag (Hot-Path tauglich)"""
+        slot = next(self.slots) & self.mask
+        self.times[slot] = time.monotonic_ns()
+        self.codes[slot] = code
+        self.pipelines[slot] = pipeline
+        self.details[slot] = detail
+        self.counters[code] += 1
+
+    def dump(self, limit=None):
+        """
+        Einträge, älteste zuerst (picklebar)
+
+        Returns:
+            Liste von Dicts mit time_ns, age_ms, code, pipeline, detail (+ error bei errno-Codes)
+        """
+        now = time.monotonic_ns()
+        slots = sorted((slot for slot in range(self.mask + 1) if self.times[slot]), key=self.times.__getitem__)
+        if limit:
+            slots = slots[-limit:]
+
+        records = []
+        for slot in slots:
+            code = self.codes[slot]
+            record = {
+                'time_ns': self.times[slot],
+                'age_ms': round((now - self.times[slot]) / 1e6, 1),
+                'code': COUNTER_NAMES[code],
+                'pipeline': PIPELINE_NAMES[self.pipelines[slot]],
+                'detail': self.details[slot]
+            }
+            if code in ERRNO_CODES and record['detail']:
+                record['error'] = errno.errorcode.get(record['detail'], str(record['detail']))
+            records.append(record)
+        return records
+
+    def error_counts(self):
+        """Stand der ERROR_COUNTERS"""
+        return {name: self.counters[COUNTER_NAMES.index(name)] for name in ERROR_COUNTERS}
+
+
+def format_record(record):
+    """Eine Zeile pro Eintrag, z.B. '  1532.4 ms ago  pedals  write_errors  EAGAIN'"""
+    if 'error' in record:
+        detail = record['error']
+    elif record['code'] == COUNTER_NAMES[COUNTER_SHORT_READS]:
+        detail = f"{record['detail']} bytes"
+    else:
+        detail = str(record['detail']) if record['detail'] else ""
+    return f"{record['age_ms']:>10.1f} ms ago  {record['pipeline']:<8} {record['code']:<16} {detail}".rstrip()
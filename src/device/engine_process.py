@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Engine Process - Führt PedalEnhancer in einem eigenen Prozess aus
+Die GUI teilt sich so keinen GIL mehr mit dem Input-Pfad: Kalibrierung geht
+per Control-Pipe hinein, Live-Werte kommen über Shared Memory zurück.
+"""
+
+import fcntl
+import multiprocessing
+import os
+import queue
+import sys
+import itertools
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+from device.calibration import PEDAL_NAMES
+from device.telemetry import (
+    COUNTER_NAMES, STATE_SIZE, TELEMETRY_LOCK_PATH, TELEMETRY_NAME, TELEMETRY_PATH, state_views, write_header
+)
+
+# Shared Memory ist gleichzeitig die öffentliche Telemetrie (/dev/shm/pedalc0re),
+# Layout siehe device.telemetry
+
+STATUS_STOPPED = 0
+STATUS_RUNNING = 1
+STATUS_PAUSED = 2
+STATUS_FAILED = 3
+
+STATUS_NAMES = {
+    STATUS_STOPPED: 'stopped',
+    STATUS_RUNNING: 'running',
+    STATUS_PAUSED: 'paused',
+    STATUS_FAILED: 'failed'
+}
+
+# Engine kompiliert Tabellen erst, wenn sich die Kalibrierung beruhigt hat
+COMPILE_DELAY = 0.25
+CONTROL_POLL_INTERVAL = 0.1
+
+# Preset-Tabellen im Hintergrund erst bauen, wenn die Pedale eine Weile laufen,
+# und zwischen zwei gebauten Tabellen den GIL für den Reader freigeben
+PRESET_WARM_DELAY = 2.0
+PRESET_WARM_PAUSE = 0.1
+
+# Control-Socket Befehle (siehe device.control_socket), 'ping' beantwortet der Socket-Thread
+SOCKET_COMMANDS = ('status', 'stats', 'presets', 'preset', 'set', 'pause', 'resume', 'latency', 'diagnostics',
+                   'analytics')
+CONTROL_REQUEST_TIMEOUT = 5.0
+
+
+def _create_state():
+    """
+    Legt /dev/shm/pedalc0re an
+
+    Erst der flock auf TELEMETRY_LOCK_PATH macht zum Besitzer. Ein vorhandener
+    Block ohne Lock-Halter stammt von einer abgestürzten Engine und wird
+    übernommen; hält eine laufende Engine den Lock, bleibt ihr Block unangetastet.
+
+    Returns:
+        (SharedMemory, fd des Locks - offen halten bis shutdown())
+
+    Raises:
+        RuntimeError: wenn eine andere Engine den Block besitzt
+    """
+    lock_fd = os.open(TELEMETRY_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(lock_fd)
+        raise RuntimeError(f"{TELEMETRY_PATH} is in use by another running engine")
+
+    try:
+        try:
+            shm = shared_memory.SharedMemory(name=TELEMETRY_NAME, create=True, size=STATE_SIZE)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name=TELEMETRY_NAME)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=TELEMETRY_NAME, create=True, size=STATE_SIZE)
+        write_header(shm.buf)
+    except BaseException:
+        os.close(lock_fd)
+        raise
+    return shm, lock_fd
+
+
+class EngineProcess:
+    """GUI-seitiger Proxy für die Engine im Kindprozess"""
+
+    def __init__(self, pedals_path, name="Enhanced Pedals", options=None):
+        self.pedals_path = pedals_path
+        self.device_name = name
+        self.options = options or {}
+        self.process = None
+        self.conn = None
+        self.shm = None
+        self.state_lock = None
+        self.views = None
+        self.calibration_key = None
+        self.request_ids = itertools.count(1)
+
+    def start(self, calibrator=None, options=None, timeout=10.0, preset=None):
+        """
+        Startet den Engine-Prozess (falls nötig) und darin den Enhancer
+
+        Args:
+            calibrator: GUI-Calibrator, dessen Snapshot vorab gesendet wird
+            options: PedalEnhancer kwargs für diesen Start (Standard: self.options),
+                     dazu 'watchdog_ms' (Reader-Watchdog Budget, None = aus)
+            preset: Preset, das vor dem Snapshot aktiviert wird (vorkompilierte
+                    Tabellen, der Snapshot ändert dann nur Abweichungen)
+
+        Returns:
+            Status-Dict der Engine oder None bei Fehler/Timeout
+        """
+        if self.is_alive():
+            if calibrator:
+                self.sync_calibration(calibrator)
+            return self.resume(options)
+
+        ctx = multiprocessing.get_context('spawn')
+        try:
+            self.shm, self.state_lock = _create_state()
+        except (OSError, RuntimeError) as e:
+            print(f"Error starting engine: {e}")
+            return None
+        self.views = state_views(self.shm.buf)
+
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=engine_main,
+            args=(child_conn, self.shm.name, self.pedals_path, self.device_name, self.options),
+            name="pedalc0re-engine",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+        if preset:
+            self.activate_preset(preset)
+        if calibrator:
+            self.sync_calibration(calibrator)
+
+        return self.request('resume', options, timeout=timeout)
+
+    def request(self, command, payload=None, timeout=2.0):
+        """
+        Sendet ein Kommando und wartet auf die Antwort der Engine
+
+        Jede Anfrage trägt eine id: verspätete Antworten früherer (abgelaufener)
+        Anfragen werden verworfen statt der nächsten Anfrage zugeordnet.
+
+        Returns:
+            Antwort oder None bei Fehler in der Engine/Timeout
+        """
+        if not self.is_alive():
+            return None
+
+        request_id = next(self.request_ids)
+        deadline = time.monotonic() + timeout
+        try:
+            self.conn.send((request_id, command, payload))
+            while self.conn.poll(max(0.0, deadline - time.monotonic())):
+                reply_id, reply = self.conn.recv()
+                if reply_id != request_id:
+                    continue
+                if isinstance(reply, Exception):
+                    print(f"Error in engine ({command}): {reply}")
+                    return None
+                return reply
+        except (OSError, EOFError):
+            pass
+
+        return None
+
+    def latency(self):
+        """Latenz-Snapshots der Engine (Dict pro Pipeline) oder None"""
+        return self.request('latency')
+
+    def diagnostics(self):
+        """Fehlerzähler und letzte Diagnose-Einträge ({'errors', 'records'}) oder None"""
+        return self.request('diagnostics')
+
+    def analytics(self):
+        """Statistiken der laufenden Session (siehe SessionAnalytics.summary) oder None"""
+        return self.request('analytics')
+
+    def pause(self):
+        """Stoppt den Reader, das virtuelle Device bleibt registriert"""
+        return self.request('pause')
+
+    def resume(self, options=None):
+        """Startet den Reader wieder (Device wird wiederverwendet)"""
+        return self.request('resume', options, timeout=5.0)
+
+    def start_recording(self, path):
+        """Zeichnet ab jetzt alle Pedal-Events in path auf (siehe SessionRecorder)"""
+        return self.request('record_start', path)
+
+    def stop_recording(self):
+        """Beendet die Aufnahme, liefert {'path', 'records', 'dropped'} oder None"""
+        return self.request('record_stop', timeout=5.0)
+
+    def start_auto_calibration(self):
+        """Engine beginnt Min/Max/Ruhe/Rauschen aus dem Live-Stream zu lernen"""
+        return self.request('autocal_start')
+
+    def finish_auto_calibration(self):
+        """Beendet die Auto-Kalibrierung, liefert den Vorschlag (siehe AutoCalibration.propose)"""
+        return self.request('autocal_stop')
+
+    def activate_preset(self, filename):
+        """
+        Wechselt in der Engine auf ein vorkompiliertes Preset
+
+        Returns:
+            {'filename', 'name', 'settings', 'generation'} oder None
+        """
+        return self.request('preset', filename)
+
+    def current_preset(self):
+        """Aktives Preset und Einstellungen der Engine (nach Wheel-Button oder Control-Socket)"""
+        return self.request('preset_current')
+
+    def preset_generation(self):
+        """Zählt bei Preset-Wechsel/Änderungen in der Engine (aus dem Shared Memory)"""
+        if not self.views or not self.is_alive():
+            return 0
+        return self.views[0][1]
+
+    def set_bindings(self, device_path, buttons):
+        """
+        Wheel-Buttons für den Preset-Wechsel
+
+        Args:
+            device_path: js Device, dessen Buttons beobachtet werden (None = aus)
+            buttons: Dict Button-Nummer → 'next', 'prev' oder Preset-Dateiname
+        """
+        return self.request('bindings', {'device': device_path, 'buttons': buttons})
+
+    def sync_calibration(self, calibrator):
+        """Schickt einen Kalibrierungs-Snapshot, falls sich etwas geändert hat"""
+        key = (calibrator.version, calibrator.enabled)
+        if key == self.calibration_key or not self.is_alive():
+            return
+
+        try:
+            self.conn.send((None, 'calibration', calibrator.snapshot()))
+            self.calibration_key = key
+        except OSError:
+            pass
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def status(self):
+        """Engine-Status aus dem Shared Memory (STATUS_*)"""
+        if not self.views or not self.is_alive():
+            return STATUS_STOPPED
+        return self.views[0][0]
+
+    def read_state(self):
+        """
+        Liest die Live-Werte der Engine (ohne IPC-Roundtrip)
+
+        Returns:
+            Dict mit 'raw', 'out' (Listen pro Pedal) und 'counters'
+        """
+        if not self.views:
+            return None
+
+        _, raw, out, counters, _ = self.views
+        return {
+            'raw': raw.tolist(),
+            'out': out.tolist(),
+            'counters': dict(zip(COUNTER_NAMES, counters.tolist()))
+        }
+
+    def shutdown(self):
+        """Beendet Engine und Device, gibt das Shared Memory frei"""
+        if self.is_alive():
+            try:
+                self.conn.send((None, 'stop', None))
+            except OSError:
+                pass
+            self.process.join(timeout=3)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1)
+
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+        if self.shm:
+            for view in self.views:
+                view.release()
+            self.views = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+        if self.state_lock is not None:
+            os.close(self.state_lock)
+            self.state_lock = None
+
+        self.process = None
+        self.calibration_key = None
+
+
+def engine_main(conn, shm_name, pedals_path, device_name, options):
+    """Einstiegspunkt des Engine-Prozesses"""
+    from config.preset_cache import PresetCache
+    from config.presets import PresetManager, normalize_pedal_settings
+    from device.button_watcher import ButtonWatcher
+    from device.calibration import PedalCalibrator
+    from device.control_socket import ControlServer
+    from device.diagnostics import DiagnosticLog
+    from device.latency import LatencyHistogram, format_latency_snapshot
+    from device.metrics_exporter import MetricsExporter, metrics_config, render_metrics
+    from device.pedal_enhancer import PedalEnhancer
+    from device.session_analytics import SUMMARY_SUFFIX, SessionAnalytics, format_summary
+    from device.session_recorder import SessionRecorder, default_session_path
+    from device.virtual_device_manager import VirtualDeviceManager
+    from device.watchdog import DEFAULT_BUDGET_MS, ReaderWatchdog
+
+    # Kurzer GIL-Switch, damit Tabellen-Kompilierung den Reader nicht blockiert
+    sys.setswitchinterval(0.0005)
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = state_views(shm.buf)
+    status, raw, out, counters, sequence = views
+
+    calibrator = PedalCalibrator()
+    latency = LatencyHistogram('pedals')   # über PAUSE/RESUME hinweg
+    diagnostics = DiagnosticLog(counters)
+    device_manager = VirtualDeviceManager(diagnostics)
+    analytics = SessionAnalytics(out, sequence, status)   # eigener Thread, nie im Reader
+    enhancer = None
+    watchdog = None
+    recorder = None
+    reused = False
+    compile_at = None
+
+    # Preset-Wechsel kommen auch aus dem Button-Watcher Thread
+    calibration_lock = threading.Lock()
+    preset_cache = PresetCache(PresetManager())
+    warm_thread = None
+    current_preset = None
+    button_watcher = None
+    bindings = {}
+
+    def warm_presets():
+        # Erst wenn die Pedale laufen, dann Tabelle für Tabelle mit Pausen
+        time.sleep(PRESET_WARM_DELAY)
+        preset_cache.warm(pause=PRESET_WARM_PAUSE)
+
+    def finish_session():
+        # Zusammenfassung nur, wenn die Pedale seit dem letzten Mal liefen
+        analytics.stop()
+        if analytics.running_ns:
+            summary_path = default_session_path(SUMMARY_SUFFIX)
+            if analytics.write_summary(summary_path):
+                print(f"Session {format_summary(analytics.summary())}\nSummary written to {summary_path}")
+        analytics.reset()
+
+    def start_warm_thread():
+        nonlocal warm_thread
+        warm_thread = threading.Thread(target=warm_presets, daemon=True, name="preset-warm")
+        warm_thread.start()
+
+    def preset_info():
+        """Aktives Preset und aktuelle Einstellungen (auch nach Änderungen über den Control-Socket)"""
+        return {
+            'filename': current_preset.filename if current_preset else None,
+            'name': current_preset.name if current_preset else None,
+            'settings': calibrator.snapshot()['settings'],
+            'generation': status[1]
+        }
+
+    def activate_preset(filename):
+        nonlocal current_preset
+        compiled = preset_cache.get(filename)
+        if compiled is None:
+            return None
+        with calibration_lock:
+            calibrator.activate(compiled.settings, compiled.tables)
+            current_preset = compiled
+            status[1] += 1
+        return preset_info()
+
+    def on_button(button):
+        action = bindings.get(button)
+        if action is None:
+            return
+        if action in ('next', 'prev'):
+            filenames = preset_cache.filenames()
+            if not filenames:
+                return
+            current = current_preset.filename if current_preset else None
+            index = filenames.index(current) if current in filenames else -1
+            action = filenames[(index + (1 if action == 'next' else -1)) % len(filenames)]
+        activate_preset(action)
+
+    def engine_status():
+        report = None
+        if enhancer and enhancer.realtime:
+            # Reader setzt den Report direkt nach dem Start
+            deadline = time.monotonic() + 0.5
+            while enhancer.realtime_report is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            report = enhancer.realtime_report
+
+        return {
+            'running': bool(enhancer and enhancer.is_running),
+            'reused': reused,
+            'js_node': device_manager.get_js_node(device_name),
+            'realtime': report,
+            'watchdog': watchdog.report() if watchdog else None
+        }
+
+    def engine_stats():
+        return {
+            'status': STATUS_NAMES.get(status[0], 'unknown'),
+            'preset': current_preset.filename if current_preset else None,
+            'enabled': calibrator.enabled,
+            'raw': dict(zip(PEDAL_NAMES, raw.tolist())),
+            'out': dict(zip(PEDAL_NAMES, out.tolist())),
+            'counters': dict(zip(COUNTER_NAMES, counters.tolist())),
+            'latency': latency.snapshot(),
+            'watchdog': watchdog.report() if watchdog else None
+        }
+
+    def set_setting(request):
+        """Einzelne Einstellung (wie ein GUI-Slider), Tabelle folgt verzögert"""
+        pedal = request.get('pedal')
+        setting = request.get('setting')
+        if pedal not in PEDAL_NAMES:
+            raise ValueError(f"unknown pedal {pedal!r}")
+        if setting not in calibrator.settings[pedal]:
+            raise ValueError(f"unknown setting {setting!r}")
+
+        settings = dict(calibrator.settings[pedal], **{setting: request.get('value')})
+        settings = normalize_pedal_settings(pedal, settings)
+        with calibration_lock:
+            calibrator.set_pedal_setting(pedal, setting, settings[setting])
+            status[1] += 1
+        return settings
+
+    def handle(command, payload):
+        """Führt ein Kommando im Control-Loop aus (aus Pipe oder Control-Socket)"""
+        nonlocal enhancer, watchdog, recorder, reused, compile_at, options, bindings, button_watcher
+
+        if command == 'calibration':
+            # Sofort wirksam (Referenz-Rechnung), Tabellen folgen verzögert
+            with calibration_lock:
+                calibrator.apply_snapshot(payload, compile=False)
+            compile_at = time.monotonic() + COMPILE_DELAY
+
+        elif command == 'set':
+            result = set_setting(payload)
+            compile_at = time.monotonic() + COMPILE_DELAY
+            return result
+
+        elif command == 'resume':
+            if warm_thread is None:
+                # Fehlende Tabellen aller Presets im Hintergrund vorbauen (verzögert, gedrosselt)
+                start_warm_thread()
+
+            # Optionen erst übernehmen, wenn der Enhancer sie akzeptiert hat
+            requested = options if payload is None else payload
+            if enhancer is None:
+                with calibration_lock:
+                    calibrator.compile()
+                reused = device_manager.is_registered(device_name)
+                enhancer_options = dict(requested)
+                watchdog_ms = enhancer_options.pop('watchdog_ms', DEFAULT_BUDGET_MS)
+                enhancer = PedalEnhancer(
+                    pedals_path,
+                    name=device_name,
+                    calibrator=calibrator,
+                    device_manager=device_manager,
+                    **enhancer_options
+                )
+                options = requested
+                enhancer.attach_state(raw, out, counters, sequence)
+                enhancer.latency = latency
+                enhancer.diagnostics = diagnostics
+                if recorder:
+                    enhancer.record_event = recorder.record
+                if enhancer.start():
+                    status[0] = STATUS_RUNNING
+                    analytics.start()
+                    if watchdog_ms:
+                        watchdog = ReaderWatchdog(enhancer, watchdog_ms)
+                        watchdog.start()
+                else:
+                    enhancer = None
+                    status[0] = STATUS_FAILED
+            else:
+                options = requested
+            return engine_status()
+
+        elif command == 'pause':
+            if watchdog:
+                watchdog.stop()
+                watchdog = None
+            if enhancer:
+                enhancer.stop()
+                enhancer = None
+            status[0] = STATUS_PAUSED
+            finish_session()
+            return engine_status()
+
+        elif command == 'status':
+            return engine_status()
+
+        elif command == 'stats':
+            return engine_stats()
+
+        elif command == 'record_start':
+            if recorder is None:
+                recorder = SessionRecorder(payload)
+                recorder.start()
+            if enhancer:
+                enhancer.record_event = recorder.record
+            return recorder.stats()
+
+        elif command == 'record_stop':
+            if enhancer:
+                enhancer.record_event = None
+            stats = recorder.stop() if recorder else None
+            recorder = None
+            return stats
+
+        elif command == 'autocal_start':
+            calibrator.start_auto_calibration()
+            return True
+
+        elif command == 'autocal_stop':
+            return calibrator.stop_auto_calibration()
+
+        elif command == 'preset':
+            return activate_preset(payload)
+
+        elif command == 'preset_current':
+            return preset_info()
+
+        elif command == 'presets':
+            return [{'filename': preset['filename'], 'name': preset['name']} for preset in preset_cache.list_presets()]
+
+        elif command == 'bindings':
+            if button_watcher:
+                button_watcher.stop()
+                button_watcher = None
+            bindings = dict(payload['buttons'])
+            if payload['device'] and bindings:
+                button_watcher = ButtonWatcher(payload['device'], on_button)
+                if not button_watcher.start():
+                    button_watcher = None
+            return button_watcher is not None
+
+        elif command == 'latency':
+            return {latency.name: latency.snapshot()}
+
+        elif command == 'diagnostics':
+            return {'errors': diagnostics.error_counts(), 'records': diagnostics.dump()}
+
+        elif command == 'analytics':
+            return analytics.summary()
+
+        return None
+
+    # Control-Socket: Anfragen laufen im Control-Loop, der Socket-Thread wartet nur
+    control_requests = queue.SimpleQueue()
+    wake_read, wake_write = os.pipe()
+
+    def control_request(request):
+        command = request['cmd']
+        if command == 'ping':
+            return 'pong'
+        if command not in SOCKET_COMMANDS:
+            raise ValueError(f"unknown command {command!r}")
+
+        payload = request if command == 'set' else request.get('name')
+        done = threading.Event()
+        reply = []
+        control_requests.put((command, payload, reply, done))
+        os.write(wake_write, b'\0')
+        if not done.wait(CONTROL_REQUEST_TIMEOUT):
+            raise TimeoutError(f"engine busy ({command})")
+
+        result = reply[0]
+        if isinstance(result, Exception):
+            raise result
+        if command == 'preset' and result is None:
+            raise ValueError(f"unknown or invalid preset {payload!r}")
+        return result
+
+    def run_control_requests():
+        os.read(wake_read, 64)
+        while not control_requests.empty():
+            command, payload, reply, done = control_requests.get()
+            try:
+                reply.append(handle(command, payload))
+            except Exception as ex:
+                reply.append(ex)
+            done.set()
+
+    control_server = ControlServer(control_request)
+    control_server.start()
+
+    # Prometheus Textfile (nur mit $PEDALC0RE_METRICS_FILE)
+    metrics_path, metrics_interval = metrics_config()
+    metrics_exporter = None
+    if metrics_path:
+        def collect_metrics():
+            return render_metrics(
+                dict(zip(COUNTER_NAMES, counters.tolist())),
+                latency,
+                preset=current_preset.filename if current_preset else None,
+                status=STATUS_NAMES.get(status[0]),
+                statuses=tuple(STATUS_NAMES.values())
+            )
+
+        metrics_exporter = MetricsExporter(metrics_path, collect_metrics, metrics_interval)
+        metrics_exporter.start()
+
+    try:
+        while True:
+            if compile_at and time.monotonic() >= compile_at:
+                compile_at = None
+                try:
+                    with calibration_lock:
+                        calibrator.compile()
+                except Exception as ex:
+                    print(f"Error compiling calibration: {ex}")
+            if enhancer:
+                # Reader tot und (noch) nicht neu gestartet, oder Watchdog hat aufgegeben
+                failed = not enhancer.is_running or (watchdog is not None and watchdog.failed)
+                status[0] = STATUS_FAILED if failed else STATUS_RUNNING
+
+            ready = wait([conn, wake_read], CONTROL_POLL_INTERVAL)
+            if wake_read in ready:
+                run_control_requests()
+            if conn not in ready:
+                continue
+
+            request_id, command, payload = conn.recv()
+            if command == 'stop':
+                break
+
+            # Fehler eines Kommandos beenden nie die Engine (wie run_control_requests)
+            try:
+                reply = handle(command, payload)
+            except Exception as ex:
+                print(f"Error in engine command {command!r}: {ex}")
+                reply = RuntimeError(f"{type(ex).__name__}: {ex}")
+            if request_id is not None:
+                conn.send((request_id, reply))
+
+    except (EOFError, KeyboardInterrupt):
+        # GUI-Prozess ist weg
+        pass
+
+    finally:
+        if watchdog:
+            watchdog.stop()
+        if enhancer:
+            enhancer.stop()
+        if recorder:
+            recorder.stop()
+        if button_watcher:
+            button_watcher.stop()
+        control_server.stop()
+        os.close(wake_read)
+        os.close(wake_write)
+        device_manager.close_all()
+        status[0] = STATUS_STOPPED
+        if metrics_exporter:
+            metrics_exporter.stop()
+
+        # Session seit dem letzten PAUSE (falls ohne STOP beendet)
+        finish_session()
+
+        # Latenz-Zusammenfassung beim Beenden
+        if latency.count:
+            print(f"Latency {format_latency_snapshot(latency.snapshot())}")
+        for view in views:
+            view.release()
+        shm.close()
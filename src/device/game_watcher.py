@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Game Watcher - Erkennt Start/Ende von Spiel-Prozessen für den automatischen Preset-Wechsel
+Bevorzugt event-basiert über den Netlink Proc Connector (braucht CAP_NET_ADMIN),
+sonst ein günstiger Scan von /proc, der nur neue PIDs liest.
+"""
+
+import os
+import socket
+import struct
+import threading
+
+# Prozess-Namen bekannter Sims (wie in /proc/<pid>/comm, Proton/Wine)
+KNOWN_GAMES = {
+    'acc': "AC2-Win64-Shipping.exe",
+    'iracing': "iRacingSim64DX11.exe",
+    'raceroom': "RRRE64.exe",
+    'ams2': "AMS2AVX.exe",
+    'rf2': "rFactor2.exe",
+    'ac': "acs.exe"
+}
+
+# Kernel kürzt comm auf 15 Zeichen (TASK_COMM_LEN - 1)
+COMM_LENGTH = 15
+
+# Fallback: /proc alle SCAN_INTERVAL Sekunden, junge PIDs werden RECHECK_SCANS mal
+# erneut gelesen (Launcher starten das Spiel oft per exec im selben Prozess)
+SCAN_INTERVAL = 2.0
+RECHECK_SCANS = 3
+
+# Netlink Proc Connector (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_DONE = 3
+
+NLMSG_HDR_FMT = '=IHHII'
+CN_MSG_FMT = '=IIIIHH'
+PROC_EVENT_FMT = '=IIQii'
+PROC_EVENT_OFFSET = struct.calcsize(NLMSG_HDR_FMT) + struct.calcsize(CN_MSG_FMT)
+RECV_TIMEOUT = 1.0
+
+
+def process_key(name):
+    """Vergleichsschlüssel für einen Prozess-Namen (gekürzt wie comm, ohne Groß/Klein)"""
+    name = KNOWN_GAMES.get(name.lower(), name)
+    return name[:COMM_LENGTH].lower()
+
+
+def read_comm(pid):
+    try:
+        with open(f"/proc/{pid}/comm", 'rb') as f:
+            return f.read().decode(errors='replace').rstrip('\n')
+    except OSError:
+        return None
+
+
+class GameWatcher:
+    """
+    Beobachtet laufende Prozesse und merkt sich das zuletzt gestartete Spiel
+
+    Läuft in einem eigenen Thread. Abfragen über active/generation sind
+    thread-safe (einfache Zuweisungen), z.B. aus einem GUI Poll.
+    """
+
+    def __init__(self, games, use_netlink=True, scan_interval=SCAN_INTERVAL):
+        self.games = {}
+        self.use_netlink = use_netlink
+        self.scan_interval = scan_interval
+        self.mode = None
+        self.is_running = False
+        self.thread = None
+        self.wakeup = threading.Event()
+
+        # pid → Schlüssel der laufenden Spiele (Startreihenfolge)
+        self.running = {}
+        self.active = None
+        self.generation = 0
+
+        # Fallback-Scan: pid → (comm, verbleibende Nachprüfungen)
+        self.known = {}
+
+        self.set_games(games)
+
+    def set_games(self, games):
+        """
+        Setzt die Zuordnung Prozess → Preset
+
+        Args:
+            games: Dict Prozess-Name (oder Schlüssel aus KNOWN_GAMES) → Preset-Dateiname
+        """
+        self.games = {process_key(name): preset for name, preset in games.items()}
+        self.known = {}
+
+    def preset(self):
+        """Preset des aktiven Spiels oder None"""
+        return self.games.get(self.active) if self.active else None
+
+    def start(self):
+        if self.is_running:
+            return False
+
+        sock = self._open_netlink() if self.use_netlink else None
+        self.mode = 'netlink' if sock else 'scan'
+
+        self.is_running = True
+        target = self._netlink_loop if sock else self._scan_loop
+        args = (sock,) if sock else ()
+        self.thread = threading.Thread(target=target, args=args, daemon=True, name="game-watcher")
+        self.thread.start()
+        return True
+
+    def stop(self):
+        self.is_running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=RECV_TIMEOUT + 1)
+            self.thread = None
+
+    def _started(self, pid, comm):
+        key = process_key(comm)
+        if key in self.games and pid not in self.running:
+            self.running[pid] = key
+            self._update()
+
+    def _exited(self, pid):
+        if self.running.pop(pid, None) is not None:
+            self._update()
+
+    def _update(self):
+        active = next(reversed(self.running.values()), None)
+        if active != self.active:
+            self.active = active
+            self.generation += 1
+
+    def _scan(self):
+        """Ein /proc Durchlauf: nur neue (und junge) PIDs werden gelesen"""
+        try:
+            pids = {int(name) for name in os.listdir('/proc') if name.isdigit()}
+        except OSError:
+            return
+
+        for pid in [pid for pid in self.known if pid not in pids]:
+            del self.known[pid]
+        for pid in [pid for pid in self.running if pid not in pids]:
+            self._exited(pid)
+
+        for pid in pids:
+            entry = self.known.get(pid)
+            if entry is not None and entry[1] <= 0:
+                continue
+            comm = read_comm(pid)
+            if comm is None:
+                continue
+            self.known[pid] = (comm, entry[1] - 1 if entry else RECHECK_SCANS)
+            self._started(pid, comm)
+
+    def _scan_loop(self):
+        self._scan()
+        while self.is_running:
+            self.wakeup.wait(self.scan_interval)
+            if self.is_running:
+                self._scan()
+
+    def _open_netlink(self):
+        """Abonniert exec/exit Events, None wenn nicht erlaubt oder nicht verfügbar"""
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        except (OSError, AttributeError):
+            return None
+
+        try:
+            sock.bind((0, CN_IDX_PROC))
+            self._send_control(sock, PROC_CN_MCAST_LISTEN)
+            sock.settimeout(RECV_TIMEOUT)
+            return sock
+        except OSError as ex:
+            print(f"Game watcher: proc connector unavailable ({ex}), scanning /proc")
+            sock.close()
+            return None
+
+    def _send_control(self, sock, op):
+        payload = struct.pack('=I', op)
+        cn_msg = struct.pack(CN_MSG_FMT, CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0)
+        length = struct.calcsize(NLMSG_HDR_FMT) + len(cn_msg) + len(payload)
+        header = struct.pack(NLMSG_HDR_FMT, length, NLMSG_DONE, 0, 0, sock.getsockname()[0])
+        sock.send(header + cn_msg + payload)
+
+    def _netlink_loop(self, sock):
+        event = struct.Struct(PROC_EVENT_FMT)
+        try:
+            # Bereits laufende Spiele (Events gibt es nur für neue Prozesse)
+            self._scan()
+            while self.is_running:
+                try:
+                    data = sock.recv(4096)
+                except socket.timeout:
+                    continue
+                except OSError as ex:
+                    # z.B. ENOBUFS bei sehr vielen Events: einmal neu scannen
+                    print(f"Game watcher: {ex}")
+                    self.known = {}
+                    self._scan()
+                    continue
+
+                if len(data) < PROC_EVENT_OFFSET + event.size:
+                    continue
+
+                what, _, _, pid, tgid = event.unpack_from(data, PROC_EVENT_OFFSET)
+                if what == PROC_EVENT_EXEC:
+                    comm = read_comm(tgid)
+                    if comm is not None:
+                        self._started(tgid, comm)
+                elif what == PROC_EVENT_EXIT and pid == tgid:
+                    self._exited(tgid)
+        finally:
+            try:
+                self._send_control(sock, PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            sock.close()
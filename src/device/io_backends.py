@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+I/O Backends - Austauschbare Input-Quellen und Output-Sinks für die Engine
+
+Quellen liefern einen nicht-blockierenden fd, aus dem die Engine selbst liest:
+- JoystickSource: /dev/input/js* (js_event, 8 Bytes)
+- EvdevSource:    /dev/input/event* (input_event, CLOCK_MONOTONIC Timestamps)
+- PipeSource:     os.pipe() mit geskripteten js_events (Tests/Benchmarks)
+
+Sinks brauchen nur write(type, code, value) und syn() - genau wie evdev.UInput,
+das damit selbst der uinput-Sink ist. UInputFrameSink schreibt einen ganzen
+Frame mit einem write(2) auf den uinput fd, CaptureSink sammelt Events im Speicher.
+"""
+
+import ctypes
+import fcntl
+import glob
+import os
+import struct
+from array import array
+
+from device.latency import set_clock_monotonic
+
+# Event-Formate
+FORMAT_JS = 'js'
+FORMAT_EVDEV = 'evdev'
+
+# js_event: __u32 time (ms), __s16 value, __u8 type, __u8 number
+JS_EVENT_FMT = 'IhBB'
+JS_EVENT_SIZE = struct.calcsize(JS_EVENT_FMT)
+JS_EVENT_AXIS = 0x02
+JS_EVENT_INIT = 0x80
+
+# input_event: struct timeval (2x long), __u16 type, __u16 code, __s32 value
+EVDEV_EVENT_FMT = 'llHHi'
+EVDEV_EVENT_SIZE = struct.calcsize(EVDEV_EVENT_FMT)
+EVDEV_TYPE_OFFSET = struct.calcsize('ll')
+EVDEV_CODE_OFFSET = EVDEV_TYPE_OFFSET + 2
+EVDEV_VALUE_OFFSET = EVDEV_TYPE_OFFSET + 4
+
+# Aus <linux/input-event-codes.h> (ohne python-evdev nutzbar)
+EV_SYN = 0x00
+EV_ABS = 0x03
+SYN_REPORT = 0
+SYN_DROPPED = 3
+ABS_CNT = 0x40
+
+# Events pro Frame im UInputFrameSink (ohne SYN_REPORT)
+UINPUT_FRAME_EVENTS = 16
+
+# ioctl Nummern aus <linux/input.h>
+_IOC_WRITE = 1
+_IOC_READ = 2
+INPUT_ABSINFO_FMT = 'iiiiii'   # value, minimum, maximum, fuzz, flat, resolution
+INPUT_ABSINFO_SIZE = struct.calcsize(INPUT_ABSINFO_FMT)
+INPUT_MASK_FMT = 'IIQ'         # type, codes_size, codes_ptr
+INPUT_MASK_SIZE = struct.calcsize(INPUT_MASK_FMT)
+
+# Event-Typen, die komplett maskiert werden (SYN/ABS werden gezielt freigegeben)
+MASKABLE_TYPES = (0x01, 0x02, 0x04, 0x05, 0x11, 0x12, 0x15)   # KEY, REL, MSC, SW, LED, SND, FF
+
+
+def _eviocgbit(event_type, length):
+    return (_IOC_READ << 30) | (length << 16) | (ord('E') << 8) | (0x20 + event_type)
+
+
+def _eviocgabs(code):
+    return (_IOC_READ << 30) | (INPUT_ABSINFO_SIZE << 16) | (ord('E') << 8) | (0x40 + code)
+
+
+def _eviocsmask():
+    return (_IOC_WRITE << 30) | (INPUT_MASK_SIZE << 16) | (ord('E') << 8) | 0x93
+
+
+def event_path_for_js(js_path):
+    """
+    Findet den event* Node zum selben Gerät wie ein js* Node
+
+    Returns:
+        z.B. '/dev/input/event7' oder None
+    """
+    js_name = os.path.basename(js_path)
+    nodes = sorted(glob.glob(f"/sys/class/input/{js_name}/device/event*"))
+    if nodes:
+        return f"/dev/input/{os.path.basename(nodes[0])}"
+    return None
+
+
+def default_input_format(js_path):
+    """
+    Standard-Format für ein js Device: FORMAT_EVDEV, wenn der zugehörige
+    event* Node lesbar ist (Kernel-Filter, Resync nach SYN_DROPPED), sonst FORMAT_JS
+    """
+    event_path = event_path_for_js(js_path)
+    return FORMAT_EVDEV if event_path and os.access(event_path, os.R_OK) else FORMAT_JS
+
+
+class JoystickSource:
+    """Liest js_events von einem /dev/input/js* Device"""
+
+    event_format = FORMAT_JS
+    event_size = JS_EVENT_SIZE
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def open(self):
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        return self.fd
+
+    def fileno(self):
+        return self.fd
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class EvdevSource:
+    """
+    Liest input_events von einem /dev/input/event* Device
+
+    Achsen werden wie beim Joystick-Treiber nummeriert (aufsteigende ABS-Codes)
+    und vom Geräte-Bereich auf -32767..32767 skaliert, damit Kalibrierung und
+    Ausgabe identisch zum js-Pfad bleiben.
+    """
+
+    event_format = FORMAT_EVDEV
+    event_size = EVDEV_EVENT_SIZE
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.monotonic_clock = False
+
+        # Pro Achse (js-Nummerierung)
+        self.axis_codes = []
+        self.axis_min = array('i')
+        self.axis_span = array('i')
+
+        # ABS-Code → Achsen-Index (-1 = unbenutzt), Liste statt Dict für den Hot-Path
+        self.code_to_axis = array('b', [-1] * ABS_CNT)
+
+        # Resync nach SYN_DROPPED (read_abs_values): Puffer und ioctl Nummern vorab
+        self.absinfo = bytearray(INPUT_ABSINFO_SIZE)
+        self.abs_values = array('i')
+        self.absinfo_requests = []
+
+    def open(self):
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        self.monotonic_clock = set_clock_monotonic(self.fd)
+        self._read_axes()
+        return self.fd
+
+    def _read_axes(self):
+        """Liest unterstützte ABS-Achsen und deren Bereich per ioctl"""
+        bits = bytearray((ABS_CNT + 7) // 8)
+        fcntl.ioctl(self.fd, _eviocgbit(EV_ABS, len(bits)), bits)
+
+        self.axis_codes = [code for code in range(ABS_CNT) if bits[code // 8] & (1 << (code % 8))]
+        self.axis_min = array('i')
+        self.axis_span = array('i')
+        self.code_to_axis = array('b', [-1] * ABS_CNT)
+
+        for index, code in enumerate(self.axis_codes):
+            value, minimum, maximum, fuzz, flat, resolution = self.read_absinfo(code)
+            self.axis_min.append(minimum)
+            self.axis_span.append(max(1, maximum - minimum))
+            self.code_to_axis[code] = index
+
+        self.abs_values = array('i', bytes(4 * len(self.axis_codes)))
+        self.absinfo_requests = [_eviocgabs(code) for code in self.axis_codes]
+
+    def read_absinfo(self, code):
+        """EVIOCGABS: aktueller Zustand einer Achse (value, min, max, fuzz, flat, resolution)"""
+        absinfo = bytearray(INPUT_ABSINFO_SIZE)
+        fcntl.ioctl(self.fd, _eviocgabs(code), absinfo)
+        return struct.unpack(INPUT_ABSINFO_FMT, absinfo)
+
+    def read_abs_values(self, axes):
+        """
+        EVIOCGABS für die ersten axes Achsen in einem Durchlauf (Resync nach SYN_DROPPED)
+
+        Returns:
+            array('i') mit den aktuellen Geräte-Werten (wird beim nächsten Aufruf überschrieben)
+
+        Raises:
+            OSError: Device weg (ENODEV) o.ä.
+        """
+        absinfo = self.absinfo
+        values = self.abs_values
+        for axis in range(min(axes, len(values))):
+            fcntl.ioctl(self.fd, self.absinfo_requests[axis], absinfo)
+            values[axis] = struct.unpack_from('i', absinfo)[0]
+        return values
+
+    def mask_events(self, axes):
+        """
+        EVIOCSMASK: Kernel liefert nur noch EV_SYN und die ersten axes Achsen
+
+        Alles andere (Buttons, MSC_SCAN, weitere Sensor-Achsen) verwirft schon
+        der Kernel, der Reader wacht dafür nicht mehr auf. EV_SYN filtert der
+        Kernel ohnehin nie (SYN_REPORT/SYN_DROPPED kommen immer). Braucht Linux 4.4+.
+
+        Returns:
+            True, wenn die Maske gesetzt wurde
+        """
+        abs_codes = bytearray((ABS_CNT + 7) // 8)
+        for code in self.axis_codes[:axes]:
+            abs_codes[code // 8] |= 1 << (code % 8)
+        # Eintrag für EV_SYN ist die Maske der Event-Typen (Bit = Typ, nicht SYN-Code)
+        event_types = bytearray(1)
+        event_types[0] = (1 << EV_SYN) | (1 << EV_ABS)
+
+        masks = [(EV_SYN, event_types), (EV_ABS, abs_codes)] + [(event_type, None) for event_type in MASKABLE_TYPES]
+        try:
+            for event_type, codes in masks:
+                # codes_size 0 = alle Codes des Typs maskieren
+                buffer = (ctypes.c_char * len(codes)).from_buffer(codes) if codes else None
+                request = struct.pack(INPUT_MASK_FMT, event_type, len(codes) if codes else 0,
+                                      ctypes.addressof(buffer) if buffer is not None else 0)
+                fcntl.ioctl(self.fd, _eviocsmask(), request)
+        except OSError as ex:
+            print(f"EVIOCSMASK not supported on {self.path}: {ex}")
+            return False
+        return True
+
+    def to_js_value(self, axis, value):
+        """Skaliert einen Geräte-Wert auf den js Bereich (-32767..32767)"""
+        scaled = (value - self.axis_min[axis]) * 65534 // self.axis_span[axis] - 32767
+        return -32767 if scaled < -32767 else (32767 if scaled > 32767 else scaled)
+
+    def fileno(self):
+        return self.fd
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class PipeSource:
+    """
+    In-Memory Quelle: js_events über eine Pipe (kein Device nötig)
+
+    Der Test/Benchmark schreibt mit feed()/feed_bytes() auf das Schreibende,
+    die Engine liest wie von einem echten js Device.
+    """
+
+    event_format = FORMAT_JS
+    event_size = JS_EVENT_SIZE
+
+    def __init__(self):
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+
+    def open(self):
+        return self.read_fd
+
+    def fileno(self):
+        return self.read_fd
+
+    def feed(self, events):
+        """
+        Schreibt js_events in die Pipe
+
+        Args:
+            events: Iterable von (number, value) oder (number, value, time_ms, type)
+        """
+        data = bytearray()
+        for event in events:
+            number, value = event[0], event[1]
+            time_ms = event[2] if len(event) > 2 else 0
+            event_type = event[3] if len(event) > 3 else JS_EVENT_AXIS
+            data += struct.pack(JS_EVENT_FMT, time_ms & 0xFFFFFFFF, value, event_type, number)
+        self.feed_bytes(data)
+
+    def feed_bytes(self, data):
+        """Schreibt rohe Bytes (blockiert, wenn die Pipe voll ist)"""
+        view = memoryview(data)
+        while view:
+            written = os.write(self.write_fd, view)
+            view = view[written:]
+
+    def close_writer(self):
+        if self.write_fd is not None:
+            os.close(self.write_fd)
+            self.write_fd = None
+
+    def close(self):
+        self.close_writer()
+        if self.read_fd is not None:
+            os.close(self.read_fd)
+            self.read_fd = None
+
+
+class UInputFrameSink:
+    """
+    Direkter uinput Writer: puffert Events eines Frames, syn() schreibt alles auf einmal
+
+    Das Device selbst legt weiterhin python-evdev an, hier wird nur dessen
+    fd beschrieben. Der Frame-Puffer ist vorab allokiert, Timestamps bleiben
+    0 (der Kernel setzt sie beim Einspeisen).
+    """
+
+    def __init__(self, fd, max_events=UINPUT_FRAME_EVENTS):
+        self.fd = fd
+        self.max_events = max_events
+        # +1 für SYN_REPORT
+        self.buffer = bytearray(EVDEV_EVENT_SIZE * (max_events + 1))
+        self.pack_into = struct.Struct('HHi').pack_into
+        # Vorberechnet: Offset von type/code/value für Event n, Sicht auf die ersten n Events
+        self.offsets = [n * EVDEV_EVENT_SIZE + EVDEV_TYPE_OFFSET for n in range(max_events + 1)]
+        view = memoryview(self.buffer)
+        self.frames = [view[:n * EVDEV_EVENT_SIZE] for n in range(max_events + 2)]
+        self.count = 0
+
+    def write(self, event_type, code, value):
+        count = self.count
+        if count == self.max_events:
+            # Frame voll: vorzeitig (ohne SYN) schreiben
+            os.write(self.fd, self.frames[count])
+            count = 0
+        self.pack_into(self.buffer, self.offsets[count], event_type, code, value)
+        self.count = count + 1
+
+    def syn(self):
+        count = self.count
+        self.pack_into(self.buffer, self.offsets[count], EV_SYN, SYN_REPORT, 0)
+        self.count = 0
+        os.write(self.fd, self.frames[count + 1])
+
+    def close(self):
+        # fd gehört dem UInput (VirtualDeviceManager)
+        pass
+
+
+class CaptureSink:
+    """
+    In-Memory Sink mit UInput-Schnittstelle (write/syn/close)
+
+    Zählt immer Writes und Frames und merkt sich den letzten Wert pro Code.
+    Einzelne Events werden nur mit keep_events=True gespeichert.
+    """
+
+    def __init__(self, keep_events=False, on_syn=None):
+        self.writes = 0
+        self.frames = 0
+        self.state = {}
+        self.events = [] if keep_events else None
+        self.on_syn = on_syn
+
+    def write(self, event_type, code, value):
+        self.writes += 1
+        self.state[code] = value
+        if self.events is not None:
+            self.events.append((event_type, code, value))
+
+    def syn(self):
+        self.frames += 1
+        if self.on_syn:
+            self.on_syn()
+
+    def close(self):
+        pass
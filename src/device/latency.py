@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Latency Histogram - Lock-freies HDR-artiges Histogramm für den Hot-Path
+Feste Log-Linear-Buckets (16 pro Zweierpotenz, ~6% Auflösung) über ns-Werte.
+Genau ein Thread schreibt, beliebig viele dürfen Snapshots lesen.
+"""
+
+import fcntl
+import struct
+import time
+from array import array
+
+# 16 Sub-Buckets pro Zweierpotenz
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+LINEAR_LIMIT = 2 * SUB_BUCKETS
+
+# Werte ab 2^40 ns (~18 min) landen im letzten Bucket
+MAX_VALUE_BITS = 40
+BUCKET_COUNT = (MAX_VALUE_BITS - SUB_BUCKET_BITS) * SUB_BUCKETS + SUB_BUCKETS
+
+# EVIOCSCLOCKID = _IOW('E', 0xa0, int) aus <linux/input.h>
+EVIOCSCLOCKID = 0x400445a0
+CLOCK_MONOTONIC = time.CLOCK_MONOTONIC
+
+
+def bucket_index(value):
+    """Bucket-Index für einen Wert in ns"""
+    if value < LINEAR_LIMIT:
+        return value if value > 0 else 0
+
+    shift = value.bit_length() - (SUB_BUCKET_BITS + 1)
+    index = (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+    return index if index < BUCKET_COUNT else BUCKET_COUNT - 1
+
+
+def bucket_upper_bound(index):
+    """Größter Wert (ns), der noch in diesen Bucket fällt"""
+    if index < LINEAR_LIMIT:
+        return index
+
+    shift = index // SUB_BUCKETS - 1
+    sub = index % SUB_BUCKETS + SUB_BUCKETS
+    return ((sub + 1) << shift) - 1
+
+
+def set_clock_monotonic(fd):
+    """
+    Stellt Event-Timestamps eines evdev Devices auf CLOCK_MONOTONIC um
+
+    Danach sind input_event Zeiten direkt mit time.monotonic_ns() vergleichbar.
+
+    Returns:
+        True bei Erfolg
+    """
+    try:
+        fcntl.ioctl(fd, EVIOCSCLOCKID, struct.pack('i', CLOCK_MONOTONIC))
+        return True
+    except OSError:
+        return False
+
+
+class LatencyHistogram:
+    """Histogramm für Latenzen in ns (ein Writer, lock-frei)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.buckets = array('Q', bytes(8 * BUCKET_COUNT))
+        self.count = 0
+        self.max_value = 0
+
+    def record(self, value):
+        """Zeichnet einen Wert in ns auf (nur vom Writer-Thread aufrufen)"""
+        if value < LINEAR_LIMIT:
+            index = value if value > 0 else 0
+        else:
+            shift = value.bit_length() - (SUB_BUCKET_BITS + 1)
+            index = (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+            if index >= BUCKET_COUNT:
+                index = BUCKET_COUNT - 1
+
+        self.buckets[index] += 1
+        self.count += 1
+        if value > self.max_value:
+            self.max_value = value
+
+    def reset(self):
+        """Setzt alle Buckets zurück"""
+        for index in range(BUCKET_COUNT):
+            self.buckets[index] = 0
+        self.count = 0
+        self.max_value = 0
+
+    def percentile(self, pct, buckets=None):
+        """
+        Wert (ns) unter dem pct Prozent aller Samples liegen
+
+        Args:
+            pct: 0-100
+            buckets: Optional bereits kopierte Buckets (konsistenter Snapshot)
+        """
+        buckets = buckets if buckets is not None else self.buckets.tolist()
+        total = sum(buckets)
+        if total == 0:
+            return 0
+
+        threshold = total * pct / 100.0
+        running = 0
+        for index, bucket_count in enumerate(buckets):
+            running += bucket_count
+            if running >= threshold:
+                # Bucket-Obergrenze, aber nie über dem echten Maximum
+                return min(bucket_upper_bound(index), self.max_value)
+
+        return self.max_value
+
+    def snapshot(self):
+        """
+        Kopie des aktuellen Zustands (picklebar)
+
+        Returns:
+            Dict mit count, max, Perzentilen in µs und den belegten Buckets
+        """
+        buckets = self.buckets.tolist()
+        return {
+            'name': self.name,
+            'count': sum(buckets),
+            'max_us': self.max_value / 1000.0,
+            'p50_us': self.percentile(50, buckets) / 1000.0,
+            'p99_us': self.percentile(99, buckets) / 1000.0,
+            'p99_9_us': self.percentile(99.9, buckets) / 1000.0,
+            'buckets': {bucket_upper_bound(i): c for i, c in enumerate(buckets) if c}
+        }
+
+
+def format_latency_snapshot(snapshot):
+    """Einzeilige Zusammenfassung, z.B. für den Log beim Beenden"""
+    return (f"{snapshot['name']}: n={snapshot['count']} "
+            f"p50={snapshot['p50_us']:.1f}µs p99={snapshot['p99_us']:.1f}µs "
+            f"p99.9={snapshot['p99_9_us']:.1f}µs max={snapshot['max_us']:.1f}µs")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter - Engine-Metriken als Prometheus Textfile (node_exporter textfile collector)
+Ein Hintergrund-Thread (nice 19, kein SCHED_IDLE) rendert alle interval
+Sekunden Zähler und Latenz-Histogramm der Engine und ersetzt die Datei
+atomar per rename. Gelesen wird ohne Locks: die Zähler sind einzelne
+uint64 im Telemetrie-Block, die Buckets werden per tolist() kopiert.
+
+Aktivieren über die Umgebung der Engine:
+    PEDALC0RE_METRICS_FILE=/var/lib/node_exporter/textfile_collector/pedalc0re.prom
+    PEDALC0RE_METRICS_INTERVAL=15   (Sekunden, Standard DEFAULT_INTERVAL)
+"""
+
+import os
+import threading
+import time
+
+from config.presets import atomic_write
+from device.diagnostics import ERROR_COUNTERS
+from device.latency import BUCKET_COUNT, bucket_upper_bound
+from device.realtime import apply_background
+
+DEFAULT_INTERVAL = 15.0
+MIN_INTERVAL = 1.0
+
+# Prometheus Buckets (le) in Sekunden, fein im typischen Bereich (10 µs - 1 ms)
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+
+
+def metrics_config():
+    """
+    Pfad und Intervall aus $PEDALC0RE_METRICS_FILE / $PEDALC0RE_METRICS_INTERVAL
+
+    Returns:
+        (path oder None, interval in Sekunden)
+    """
+    path = os.environ.get('PEDALC0RE_METRICS_FILE') or None
+    try:
+        interval = float(os.environ.get('PEDALC0RE_METRICS_INTERVAL', DEFAULT_INTERVAL))
+    except ValueError:
+        print(f"Metrics: invalid PEDALC0RE_METRICS_INTERVAL, using {DEFAULT_INTERVAL:.0f} s")
+        interval = DEFAULT_INTERVAL
+    return path, max(MIN_INTERVAL, interval)
+
+
+def _bucket_slots():
+    """Histogramm-Bucket → Index in LATENCY_BUCKETS (len = nur +Inf)"""
+    slots = []
+    for index in range(BUCKET_COUNT):
+        upper = bucket_upper_bound(index) / 1e9
+        slots.append(next((slot for slot, le in enumerate(LATENCY_BUCKETS) if upper <= le), len(LATENCY_BUCKETS)))
+    return slots
+
+
+BUCKET_SLOTS = _bucket_slots()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics(counters, latency, preset=None, status=None, statuses=()):
+    """
+    Textfile-Inhalt (Prometheus exposition format 0.0.4)
+
+    Args:
+        counters: Dict COUNTER_NAMES → Wert
+        latency: LatencyHistogram der Pipeline
+        preset: Dateiname des aktiven Presets oder None
+        status: Name des Engine-Status
+        statuses: alle Status-Namen (State-Set, genau einer ist 1)
+    """
+    pipeline = f'pipeline="{_label(latency.name)}"'
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP pedalc0re_{name} {help_text}")
+        lines.append(f"# TYPE pedalc0re_{name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"pedalc0re_{name}{suffix}{{{labels}}} {value}")
+
+    events_in = counters['events_in']
+    events_out = counters['events_out']
+    metric('events_in_total', 'counter', "Input events read from the pedals.",
+           [('', pipeline, events_in)])
+    metric('events_out_total', 'counter', "Axis events written to the virtual device.",
+           [('', pipeline, events_out)])
+    metric('events_suppressed_total', 'counter',
+           "Input events not forwarded as an axis write (buttons, SYN, unrouted axes, coalesced frames).",
+           [('', pipeline, max(0, events_in - events_out))])
+    metric('errors_total', 'counter', "Errors on the input/output path by type.",
+           [('', f'{pipeline},type="{name}"', counters[name]) for name in ERROR_COUNTERS
+            if name != 'reader_restarts'])
+    metric('reader_restarts_total', 'counter', "Pedal reader restarts by the watchdog.",
+           [('', pipeline, counters['reader_restarts'])])
+
+    heartbeat = counters['heartbeat_ns']
+    if heartbeat:
+        metric('reader_heartbeat_age_seconds', 'gauge', "Time since the pedal reader last woke up.",
+               [('', pipeline, f"{max(0, time.monotonic_ns() - heartbeat) / 1e9:.6f}")])
+
+    # Kumulative Buckets; _sum aus den Bucket-Obergrenzen (~6% genau)
+    buckets = latency.buckets.tolist()
+    per_slot = [0] * (len(LATENCY_BUCKETS) + 1)
+    total_ns = 0
+    for index, count in enumerate(buckets):
+        if count:
+            per_slot[BUCKET_SLOTS[index]] += count
+            total_ns += count * bucket_upper_bound(index)
+    samples = []
+    cumulative = 0
+    for le, count in zip(LATENCY_BUCKETS, per_slot):
+        cumulative += count
+        samples.append(('_bucket', f'{pipeline},le="{le:g}"', cumulative))
+    cumulative += per_slot[-1]
+    samples.append(('_bucket', f'{pipeline},le="+Inf"', cumulative))
+    samples.append(('_sum', pipeline, f"{total_ns / 1e9:.9f}"))
+    samples.append(('_count', pipeline, cumulative))
+    metric('latency_seconds', 'histogram', "Read to uinput write latency.", samples)
+
+    if statuses:
+        metric('engine_status', 'gauge', "Engine state (1 = current).",
+               [('', f'status="{_label(name)}"', int(name == status)) for name in statuses])
+    if preset:
+        metric('active_preset', 'gauge', "Preset active in the engine.",
+               [('', f'preset="{_label(preset)}"', 1)])
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Schreibt collect() alle interval Sekunden nach path (atomar, ohne fsync)
+
+    stop() schreibt ein letztes Mal, damit der Endzustand (z.B. 'stopped')
+    im Textfile steht.
+    """
+
+    def __init__(self, path, collect, interval=DEFAULT_INTERVAL):
+        self.path = path
+        self.collect = collect
+        self.interval = interval
+        self.thread = None
+        self.wakeup = threading.Event()
+        self.writes = 0
+        self.last_error = None
+
+    def start(self):
+        if self.thread:
+            return False
+        self.wakeup.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="metrics-exporter")
+        self.thread.start()
+        return True
+
+    def stop(self):
+        if not self.thread:
+            return
+        self.wakeup.set()
+        self.thread.join(timeout=2)
+        self.thread = None
+        self.write()
+
+    def write(self):
+        try:
+            atomic_write(self.path, self.collect().encode(), sync=False)
+            self.writes += 1
+            self.last_error = None
+        except Exception as ex:
+            # Nur Änderungen melden, sonst jede Runde dieselbe Zeile
+            if str(ex) != self.last_error:
+                print(f"Metrics: cannot write {self.path}: {ex}")
+            self.last_error = str(ex)
+
+    def _loop(self):
+        apply_background()
+        self.write()
+        while not self.wakeup.wait(self.interval):
+            self.write()
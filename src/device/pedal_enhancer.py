@@ -4,11 +4,29 @@ Pedal Enhancer - Fügt Dummy-Buttons zu Pedalen hinzu
 Transformiert js1 (Simsonn Pedale) → js2 (Enhanced Pedals mit Buttons)
 """
 
+import gc
+import select
 import struct
 import threading
 import time
 import os
-from evdev import UInput, AbsInfo, ecodes as e
+from array import array
+from evdev import AbsInfo, ecodes as e
+from device.calibration import PEDAL_NAMES, TABLE_OFFSET
+from device.io_backends import (
+    JoystickSource, EvdevSource, UInputFrameSink, event_path_for_js, FORMAT_EVDEV, FORMAT_JS, ABS_CNT, EV_SYN, SYN_REPORT,
+    SYN_DROPPED, EVDEV_EVENT_SIZE, EVDEV_TYPE_OFFSET, EVDEV_CODE_OFFSET, EVDEV_VALUE_OFFSET
+)
+from device.latency import LatencyHistogram
+from device.realtime import apply_realtime
+from device.diagnostics import DiagnosticLog, error_number
+from device.telemetry import (
+    COUNTER_EVENTS_IN, COUNTER_EVENTS_OUT, COUNTER_HEARTBEAT, COUNTER_NAMES, COUNTER_READER_RESTARTS,
+    COUNTER_WRITE_ERRORS, COUNTER_READ_AGAIN, COUNTER_SHORT_READS, COUNTER_READER_ERRORS, COUNTER_DEVICE_ERRORS,
+    COUNTER_SYN_DROPPED
+)
+from device.timerfd import TimerFd
+from device.virtual_device_manager import VirtualDeviceManager
 
 # Joystick event format
 JS_EVENT_FMT = 'IhBB'
@@ -17,13 +35,25 @@ JS_EVENT_BUTTON = 0x01
 JS_EVENT_AXIS = 0x02
 JS_EVENT_INIT = 0x80
 
+# Optimized mode: Events pro readv() und Poll-Timeout (für sauberes Stoppen)
+JS_READ_BATCH = 64
+EVDEV_READ_BATCH = 64
+# Reader wacht auch ohne Events so oft auf (Heartbeat für den Watchdog)
+POLL_TIMEOUT_MS = 10
+# Neustart wartet nur kurz auf einen hängenden Reader (der endet beim Aufwachen)
+RESTART_JOIN_TIMEOUT = 0.005
+
 
 class PedalEnhancer:
     """
     Liest Simsonn Pedale (js1) und erstellt Enhanced Version (js2) mit Dummy-Buttons
     """
 
-    def __init__(self, pedals_path, name="Simsonn Enhanced Pedals", calibrator=None):
+    def __init__(self, pedals_path, name="Simsonn Enhanced Pedals", calibrator=None, device_manager=None,
+                 optimized=False, gc_threshold=None,
+                 realtime=False, rt_priority=50, cpu_affinity=None, lock_memory=True,
+                 source=None, sink=None, output_rate=None, input_format=FORMAT_JS,
+                 direct_output=False):
         self.pedals_path = pedals_path
         self.device_name = name
         self.uinput = None
@@ -31,8 +61,89 @@ class PedalEnhancer:
         self.reader_thread = None
         self.calibrator = calibrator
 
+        # Reader-Loops laufen, solange ihre Generation aktuell ist (stop/Neustart erhöhen sie),
+        # failure hält die Ursache, falls der Reader mit einer Exception endet
+        self.reader_target = None
+        self.reader_generation = 0
+        self.failure = None
+
+        # I/O Backends: ohne Angabe js Device (pedals_path) → uinput Device
+        # Eine übergebene Quelle gehört dem Aufrufer und wird nicht geschlossen
+        self.source = source
+        self.sink = sink
+        self.active_source = None
+
+        # FORMAT_EVDEV: event* Node zum js Device lesen (Kernel-Filter per EVIOCSMASK)
+        self.input_format = input_format
+
+        # Direkter uinput Writer: ein write(2) pro Frame statt pro Event (UInputFrameSink)
+        self.direct_output = direct_output
+
+        # Fixed-rate Ausgabe (Hz): letzter Zustand wird per timerfd getaktet
+        # geschrieben statt 1:1 pro Input-Event (None = Passthrough)
+        self.output_rate = output_rate
+
+        # Optionaler Aufnahme-Hook: record_event(time_ns, axis, raw, out)
+        self.record_event = None
+
+        # Optimized mode: allokationsfreier Hot-Loop mit eingefrorenem GC
+        self.optimized = optimized
+        self.gc_threshold = gc_threshold
+        self._saved_gc_threshold = None
+
+        # Real-time mode: SCHED_FIFO / CPU-Pinning / mlockall für den Reader
+        self.realtime = realtime
+        self.rt_priority = rt_priority
+        self.cpu_affinity = cpu_affinity
+        self.lock_memory = lock_memory
+        self.realtime_report = None
+
+        # Live-State: letzte Roh-/Ausgabewerte pro Achse, Zähler und
+        # Seqlock (seq, update_ns), per attach_state() z.B. auf Shared Memory umlenkbar
+        self.raw_values = array('i', bytes(4 * len(PEDAL_NAMES)))
+        self.out_values = array('i', bytes(4 * len(PEDAL_NAMES)))
+        self.counters = array('Q', bytes(8 * len(COUNTER_NAMES)))
+        self.sequence = array('Q', bytes(16))
+
+        # Latenz read → uinput write in ns (HDR-Histogramm, nur der Reader schreibt)
+        self.latency = LatencyHistogram('pedals')
+
+        # Fehlerzähler + Ring der letzten Fehler (zählt in self.counters)
+        self.diagnostics = DiagnosticLog(self.counters)
+
+        # Geteilter Manager hält das Device über STOP/START am Leben,
+        # ohne Manager gehört das Device nur diesem Enhancer
+        self.owns_device_manager = device_manager is None
+        self.device_manager = device_manager if device_manager else VirtualDeviceManager(self.diagnostics)
+
+    def attach_state(self, raw_values, out_values, counters, sequence=None):
+        """
+        Lenkt den Live-State auf externe Puffer um (z.B. Shared Memory)
+
+        Args:
+            raw_values: int32 Sequenz, eine Zelle pro Pedal
+            out_values: int32 Sequenz, eine Zelle pro Pedal
+            counters: uint64 Sequenz, eine Zelle pro COUNTER_NAMES Eintrag
+            sequence: uint64 Sequenz [seq, update_ns] für den Seqlock (siehe device.telemetry)
+        """
+        self.raw_values = raw_values
+        self.out_values = out_values
+        self.counters = counters
+        if sequence is not None:
+            self.sequence = sequence
+        self.diagnostics.counters = counters
+
+    def latency_snapshot(self):
+        """Latenz-Histogramme pro Pipeline (picklebar)"""
+        return {self.latency.name: self.latency.snapshot()}
+
     def create_device(self):
         """Erstellt das Enhanced Pedal Device mit Buttons"""
+        if self.sink is not None:
+            # Eigener Sink (z.B. CaptureSink) statt uinput
+            self.uinput = self.sink
+            return True
+
         try:
             # Define capabilities
             cap = {
@@ -46,19 +157,25 @@ class PedalEnhancer:
                 ]
             }
 
-            # Create UInput device
-            self.uinput = UInput(
-                events=cap,
-                name=self.device_name,
+            # Get (or reuse) UInput device
+            self.uinput = self.device_manager.acquire(
+                self.device_name,
+                cap,
                 vendor=0xDDFD,   # Simsonn Vendor ID
                 product=0x6012,  # Neue Product ID (damit es anders als Original ist)
                 version=2,
                 bustype=e.BUS_USB
             )
 
+            if self.direct_output:
+                # Setup bleibt bei python-evdev, geschrieben wird direkt auf dessen fd
+                self.uinput = UInputFrameSink(self.uinput.fd)
+
             return True
 
         except Exception as ex:
+            print(f"Error creating virtual device: {ex}")
+            self.diagnostics.record(COUNTER_DEVICE_ERRORS, error_number(ex))
             return False
 
     def write_event(self, event_type, code, value):
@@ -69,8 +186,9 @@ class PedalEnhancer:
         try:
             self.uinput.write(event_type, code, value)
             self.uinput.syn()
+            self.counters[COUNTER_EVENTS_OUT] += 1
         except Exception as ex:
-            pass
+            self.diagnostics.record(COUNTER_WRITE_ERRORS, error_number(ex))
 
     def start(self):
         """Startet den Enhancer"""
@@ -80,30 +198,121 @@ class PedalEnhancer:
         if not self.create_device():
             return False
 
+        # evdev Quellen und Resampling gibt es nur im optimierten Loop
+        source_format = self.source.event_format if self.source else self.input_format
+        if self.optimized or source_format == FORMAT_EVDEV or self.output_rate:
+            # Tabellen vorab bauen, damit der Reader nie rechnen muss
+            if self.calibrator:
+                self.calibrator.compile()
+            target = self._reader_loop_optimized
+        else:
+            target = self._reader_loop
+
+        self.reader_target = target
         self.is_running = True
-        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
-        self.reader_thread.start()
+        self._start_reader()
+
+        return True
+
+    def restart_reader(self):
+        """
+        Startet nur den Reader-Thread neu (virtuelles Device bleibt bestehen)
 
+        Ein hängender Reader wird nicht abgewartet: er endet, sobald er wieder
+        aufwacht und sieht, dass seine Generation veraltet ist.
+        """
+        if self.uinput is None or self.reader_target is None:
+            return False
+
+        self.reader_generation += 1
+        if self.reader_thread:
+            self.reader_thread.join(timeout=RESTART_JOIN_TIMEOUT)
+
+        self.is_running = True
+        self._start_reader()
+        self.diagnostics.record(COUNTER_READER_RESTARTS)
         return True
 
+    def reader_alive(self):
+        return self.reader_thread is not None and self.reader_thread.is_alive()
+
+    def _start_reader(self):
+        self.reader_generation += 1
+        self.failure = None
+        self.counters[COUNTER_HEARTBEAT] = time.monotonic_ns()
+        self.reader_thread = threading.Thread(
+            target=self.reader_target,
+            args=(self.reader_generation,),
+            daemon=True,
+            name="pedal-reader"
+        )
+        self.reader_thread.start()
+
+    def _reader_failed(self, generation, ex):
+        """Merkt sich die Ursache (nur für den aktuellen Reader, nicht für abgelöste)"""
+        if generation != self.reader_generation:
+            return
+        self.failure = f"{type(ex).__name__}: {ex}"
+        self.is_running = False
+        self.diagnostics.record(COUNTER_READER_ERRORS, error_number(ex))
+        print(f"Error in pedal reader: {self.failure}")
+
     def stop(self):
         """Stoppt den Enhancer"""
         self.is_running = False
+        self.reader_generation += 1
 
         if self.reader_thread:
             self.reader_thread.join(timeout=2)
 
-        if self.uinput:
-            try:
-                self.uinput.close()
-            except:
-                pass
+        if self.uinput is self.sink:
             self.uinput = None
+        elif self.uinput:
+            if self.owns_device_manager:
+                self.device_manager.close_all()
+            else:
+                # Device bleibt registriert, nur Achsen auf Ruheposition
+                self.device_manager.release(self.device_name)
+            self.uinput = None
+
+    def _open_source(self):
+        """Öffnet die Input-Quelle (Standard: js Device unter pedals_path)"""
+        if self.source:
+            source = self.source
+            source.open()
+        else:
+            source = None
+            event_path = event_path_for_js(self.pedals_path) if self.input_format == FORMAT_EVDEV else None
+            if event_path:
+                try:
+                    source = EvdevSource(event_path)
+                    source.open()
+                except OSError as ex:
+                    print(f"Cannot read {event_path} ({ex}), falling back to {self.pedals_path}")
+                    source.close()
+                    source = None
+            if source is None:
+                source = JoystickSource(self.pedals_path)
+                source.open()
+        self.active_source = source
+        return source
+
+    def _close_source(self, source):
+        """Schließt die Quelle des Readers, sofern sie nicht vom Aufrufer stammt"""
+        if source is not None and source is not self.source:
+            source.close()
+        if self.active_source is source:
+            self.active_source = None
 
-    def _reader_loop(self):
+    def _reader_loop(self, generation):
         """Liest Events von Pedalen und schreibt sie enhanced"""
+        self._setup_reader_thread()
+        source = None
+        counters = self.counters
+
         try:
-            pedals_fd = os.open(self.pedals_path, os.O_RDONLY | os.O_NONBLOCK)
+            source = self._open_source()
+            pedals_fd = source.fileno()
 
             # Axis mapping: Input Achse → Output Achse
             axis_map = {
@@ -112,35 +321,545 @@ class PedalEnhancer:
                 2: e.ABS_Z,   # Kupplung
             }
 
-            while self.is_running:
+            while self.reader_generation == generation:
+                counters[COUNTER_HEARTBEAT] = time.monotonic_ns()
+
                 # Read from pedals
                 try:
                     data = os.read(pedals_fd, JS_EVENT_SIZE)
+                    read_time = time.monotonic_ns()
+                    if self.reader_generation != generation:
+                        # Abgelöst, während read() hing: nicht mehr aufs Device schreiben
+                        break
                     if len(data) == JS_EVENT_SIZE:
-                        self._process_pedal_event(data, axis_map)
+                        if self._process_pedal_event(data, axis_map):
+                            self.latency.record(time.monotonic_ns() - read_time)
+                    elif data:
+                        self.diagnostics.record(COUNTER_SHORT_READS, len(data))
                 except BlockingIOError:
+                    # Nicht-blockierendes Polling im 1 ms Takt, kein Fehler
                     pass
 
                 time.sleep(0.001)
 
-            os.close(pedals_fd)
+        except Exception as ex:
+            self._reader_failed(generation, ex)
+
+        finally:
+            self._close_source(source)
+
+    def _reader_loop_optimized(self, generation):
+        """
+        Allokationsfreie Variante von _reader_loop
+
+        Liest Batches per readv() in einen festen Puffer, dekodiert direkt
+        aus dem Puffer und kalibriert über die kompilierten Tabellen.
+        Pro Event entstehen keine Tuples/Dicts mehr, die den GC antreiben.
+        """
+        self._setup_reader_thread()
+        source = None
+        timer = None
+
+        try:
+            source = self._open_source()
+            if self.output_rate:
+                timer = TimerFd(self.output_rate).open()
+            if source.event_format == FORMAT_EVDEV:
+                self._run_evdev(source, generation, timer)
+            else:
+                self._run_js(source, generation, timer)
 
         except Exception as ex:
-            self.is_running = False
+            self._reader_failed(generation, ex)
+
+        finally:
+            if timer:
+                timer.close()
+            self._close_source(source)
+            # Ein abgelöster Reader endet evtl. erst, wenn der neue schon läuft:
+            # GC-Zustand (prozessweit) gehört dann dem neuen
+            if threading.current_thread() is self.reader_thread:
+                self._unfreeze_gc()
+
+    def _frame_writer(self, output_axes, generation):
+        """
+        Schreibt beim Timer-Tick den letzten Ausgabe-Zustand (Resampling)
+
+        Returns:
+            flush(dirty, frame_start) → geschriebene Achsen; nur Achsen, deren
+            Wert sich seit dem letzten Frame geändert hat, ein SYN pro Frame
+        """
+        write = self.uinput.write
+        syn = self.uinput.syn
+        out_values = self.out_values
+        counters = self.counters
+        record_latency = self.latency.record
+        record_error = self.diagnostics.record
+        now = time.monotonic_ns
+        ev_abs = e.EV_ABS
+        written = array('i', [0x7FFFFFFF] * len(output_axes))
+
+        def flush(dirty, frame_start):
+            count = 0
+            if self.reader_generation != generation:
+                return count
+            try:
+                for axis in range(len(output_axes)):
+                    if dirty & (1 << axis) and out_values[axis] != written[axis]:
+                        write(ev_abs, output_axes[axis], out_values[axis])
+                        written[axis] = out_values[axis]
+                        count += 1
+                if count:
+                    syn()
+                    counters[COUNTER_EVENTS_OUT] += count
+                    record_latency(now() - frame_start)
+            except OSError as ex:
+                record_error(COUNTER_WRITE_ERRORS, ex.errno or 0)
+            return count
+
+        return flush
+
+    def _run_js(self, source, generation, timer=None):
+        """Optimized Loop für js_events (mit timer: Ausgabe im Takt des Timers)"""
+        pedals_fd = source.fileno()
+
+        # Alles vor dem Loop anlegen
+        buffer = bytearray(JS_EVENT_SIZE * JS_READ_BATCH)
+        buffers = [buffer]
+        values = memoryview(buffer).cast('h')   # int16 Sicht, value = Index 4*n + 2
+        output_axes = (e.ABS_X, e.ABS_Y, e.ABS_Z)
+        axis_count = len(output_axes)
+        calibrator = self.calibrator
+        tables = calibrator.tables if calibrator else None
+        write = self.uinput.write
+        syn = self.uinput.syn
+        raw_values = self.raw_values
+        out_values = self.out_values
+        counters = self.counters
+        sequence = self.sequence
+        record_latency = self.latency.record
+        record_error = self.diagnostics.record
+        now = time.monotonic_ns
+        ev_abs = e.EV_ABS
+        readv = os.readv
+
+        poller = select.poll()
+        poller.register(pedals_fd, select.POLLIN)
+
+        # Resampling: Änderungen sammeln (Bitmaske), Timer-Tick schreibt den Frame
+        resample = timer is not None
+        timer_fd = timer.fileno() if resample else -1
+        timer_buffers = [bytearray(8)]
+        flush = self._frame_writer(output_axes, generation) if resample else None
+        dirty = 0
+        frame_start = 0
+        if resample:
+            poller.register(timer_fd, select.POLLIN)
+
+        self._freeze_gc()
+
+        while self.reader_generation == generation:
+            ready = poller.poll(POLL_TIMEOUT_MS)
+            counters[COUNTER_HEARTBEAT] = now()
+            if not ready:
+                continue
+
+            if resample:
+                input_ready = False
+                for fd, _ in ready:
+                    if fd != timer_fd:
+                        input_ready = True
+                    else:
+                        try:
+                            readv(timer_fd, timer_buffers)
+                        except BlockingIOError:
+                            record_error(COUNTER_READ_AGAIN)
+                            continue
+                        if dirty:
+                            flush(dirty, frame_start)
+                            dirty = 0
+                if not input_ready:
+                    continue
+
+            try:
+                length = readv(pedals_fd, buffers)
+                read_time = now()
+            except BlockingIOError:
+                # poll meldete Daten, read nicht (EAGAIN)
+                record_error(COUNTER_READ_AGAIN)
+                continue
+
+            if length == 0:
+                # Kein Writer (z.B. FIFO/Pipe) → nicht busy-loopen
+                time.sleep(0.001)
+                continue
+            if length % JS_EVENT_SIZE:
+                record_error(COUNTER_SHORT_READS, length)
+
+            for offset in range(0, length - length % JS_EVENT_SIZE, JS_EVENT_SIZE):
+                counters[COUNTER_EVENTS_IN] += 1
+
+                if (buffer[offset + 6] & ~JS_EVENT_INIT) != JS_EVENT_AXIS:
+                    continue
+
+                number = buffer[offset + 7]
+                if number >= axis_count:
+                    continue
+
+                # Abgelöster Reader (Watchdog-Neustart) fasst weder Seqlock noch Device an
+                if self.reader_generation != generation:
+                    break
+
+                raw = values[(offset >> 1) + 2]
+                value = raw
+
+                if calibrator is not None:
+                    auto_calibration = calibrator.auto_calibration
+                    if auto_calibration is not None:
+                        auto_calibration.update(number, raw, read_time)
+
+                if calibrator is not None and calibrator.enabled:
+                    table = tables[number]
+                    if table is not None:
+                        value = table[value + TABLE_OFFSET]
+                    else:
+                        value = calibrator.calibrate_value(value, PEDAL_NAMES[number])
+
+                # Seqlock: ungerade während raw/out/update_ns geschrieben werden
+                seq = sequence[0] + 1
+                sequence[0] = seq
+                raw_values[number] = raw
+                out_values[number] = value
+                sequence[1] = read_time
+                sequence[0] = seq + 1
+
+                record = self.record_event
+                if record is not None:
+                    record(read_time, number, raw, value)
+
+                if resample:
+                    if not dirty:
+                        frame_start = read_time
+                    dirty |= 1 << number
+                    continue
+
+                try:
+                    write(ev_abs, output_axes[number], value)
+                    syn()
+                    counters[COUNTER_EVENTS_OUT] += 1
+                    record_latency(now() - read_time)
+                except OSError as ex:
+                    record_error(COUNTER_WRITE_ERRORS, ex.errno or 0)
+
+    def _run_evdev(self, source, generation, timer=None):
+        """
+        Optimized Loop für input_events (evdev Quelle)
+
+        Achswerte werden pro Event geschrieben, SYN erst beim SYN_REPORT des
+        Geräts, damit ein Frame auch als ein Frame beim Spiel ankommt.
+        Mit timer bestimmt der Timer-Tick die Frames (SYN_REPORT des Geräts
+        wird dann ignoriert).
+        Bei SYN_DROPPED (Kernel-Puffer übergelaufen) wird der Zustand aller
+        Achsen per EVIOCGABS neu gelesen und sofort als ein Frame ausgegeben,
+        die Events bis zum nächsten SYN_REPORT sind veraltet und werden verworfen.
+        Die Latenz zählt ab Event-Timestamp (CLOCK_MONOTONIC), falls verfügbar.
+        """
+        pedals_fd = source.fileno()
+
+        buffer = bytearray(EVDEV_EVENT_SIZE * EVDEV_READ_BATCH)
+        buffers = [buffer]
+        view = memoryview(buffer)
+        longs = view.cast('l')     # tv_sec, tv_usec
+        shorts = view.cast('H')    # type, code
+        ints = view.cast('i')      # value
+        long_stride = EVDEV_EVENT_SIZE // longs.itemsize
+        short_stride = EVDEV_EVENT_SIZE // 2
+        int_stride = EVDEV_EVENT_SIZE // 4
+        type_index = EVDEV_TYPE_OFFSET // 2
+        code_index = EVDEV_CODE_OFFSET // 2
+        value_index = EVDEV_VALUE_OFFSET // 4
+
+        code_to_axis = source.code_to_axis
+        axis_min = source.axis_min
+        axis_span = source.axis_span
+        event_clock = source.monotonic_clock
+
+        output_axes = (e.ABS_X, e.ABS_Y, e.ABS_Z)
+        axis_count = min(len(output_axes), len(source.axis_codes))
+
+        # Nur geroutete Achsen + SYN vom Kernel holen (Checks unten bleiben für alte Kernel)
+        source.mask_events(axis_count)
+        calibrator = self.calibrator
+        tables = calibrator.tables if calibrator else None
+        write = self.uinput.write
+        syn = self.uinput.syn
+        raw_values = self.raw_values
+        out_values = self.out_values
+        counters = self.counters
+        sequence = self.sequence
+        record_latency = self.latency.record
+        record_error = self.diagnostics.record
+        now = time.monotonic_ns
+        ev_abs = e.EV_ABS
+        readv = os.readv
+
+        poller = select.poll()
+        poller.register(pedals_fd, select.POLLIN)
+
+        pending = 0
+        frame_start = 0
+        discard = False
+
+        resample = timer is not None
+        timer_fd = timer.fileno() if resample else -1
+        timer_buffers = [bytearray(8)]
+        flush = self._frame_writer(output_axes, generation) if resample else None
+        dirty = 0
+        if resample:
+            poller.register(timer_fd, select.POLLIN)
+
+        self._freeze_gc()
+
+        while self.reader_generation == generation:
+            ready = poller.poll(POLL_TIMEOUT_MS)
+            counters[COUNTER_HEARTBEAT] = now()
+            if not ready:
+                continue
+
+            if resample:
+                input_ready = False
+                for fd, _ in ready:
+                    if fd != timer_fd:
+                        input_ready = True
+                    else:
+                        try:
+                            readv(timer_fd, timer_buffers)
+                        except BlockingIOError:
+                            record_error(COUNTER_READ_AGAIN)
+                            continue
+                        if dirty:
+                            flush(dirty, frame_start)
+                            dirty = 0
+                if not input_ready:
+                    continue
+
+            try:
+                length = readv(pedals_fd, buffers)
+                read_time = now()
+            except BlockingIOError:
+                # poll meldete Daten, read nicht (EAGAIN)
+                record_error(COUNTER_READ_AGAIN)
+                continue
+
+            if length % EVDEV_EVENT_SIZE:
+                record_error(COUNTER_SHORT_READS, length)
+
+            for index in range(length // EVDEV_EVENT_SIZE):
+                counters[COUNTER_EVENTS_IN] += 1
+                event_type = shorts[index * short_stride + type_index]
+
+                if discard:
+                    if event_type == EV_SYN and shorts[index * short_stride + code_index] == SYN_REPORT:
+                        discard = False
+                    continue
+
+                if event_type == ev_abs:
+                    code = shorts[index * short_stride + code_index]
+                    if code >= ABS_CNT:
+                        continue
+                    axis = code_to_axis[code]
+                    if axis < 0 or axis >= axis_count:
+                        continue
+
+                    # Abgelöster Reader (Watchdog-Neustart) fasst weder Seqlock noch Device an
+                    if self.reader_generation != generation:
+                        break
+
+                    # Geräte-Bereich → -32767..32767 (wie der Joystick-Treiber)
+                    value = (ints[index * int_stride + value_index] - axis_min[axis]) * 65534 // axis_span[axis] - 32767
+                    if value < -32767:
+                        value = -32767
+                    elif value > 32767:
+                        value = 32767
+                    raw = value
+
+                    if calibrator is not None:
+                        auto_calibration = calibrator.auto_calibration
+                        if auto_calibration is not None:
+                            auto_calibration.update(axis, raw, read_time)
+
+                    if calibrator is not None and calibrator.enabled:
+                        table = tables[axis]
+                        if table is not None:
+                            value = table[value + TABLE_OFFSET]
+                        else:
+                            value = calibrator.calibrate_value(value, PEDAL_NAMES[axis])
+
+                    seq = sequence[0] + 1
+                    sequence[0] = seq
+                    raw_values[axis] = raw
+                    out_values[axis] = value
+                    sequence[1] = read_time
+                    sequence[0] = seq + 1
+
+                    record = self.record_event
+                    if record is not None:
+                        record(read_time, axis, raw, value)
+
+                    if resample:
+                        if not dirty:
+                            if event_clock:
+                                base = index * long_stride
+                                frame_start = longs[base] * 1000000000 + longs[base + 1] * 1000
+                            else:
+                                frame_start = read_time
+                        dirty |= 1 << axis
+                        continue
+
+                    try:
+                        write(ev_abs, output_axes[axis], value)
+                    except OSError as ex:
+                        record_error(COUNTER_WRITE_ERRORS, ex.errno or 0)
+                        continue
+
+                    if pending == 0:
+                        if event_clock:
+                            base = index * long_stride
+                            frame_start = longs[base] * 1000000000 + longs[base + 1] * 1000
+                        else:
+                            frame_start = read_time
+                    pending += 1
+
+                elif event_type == EV_SYN:
+                    code = shorts[index * short_stride + code_index]
+                    if code == SYN_REPORT and pending:
+                        if self.reader_generation != generation:
+                            break
+                        try:
+                            syn()
+                            counters[COUNTER_EVENTS_OUT] += pending
+                            record_latency(now() - frame_start)
+                        except OSError as ex:
+                            record_error(COUNTER_WRITE_ERRORS, ex.errno or 0)
+                        pending = 0
+
+                    elif code == SYN_DROPPED:
+                        # Angefangener Frame ist unvollständig: Resync schreibt alle Achsen neu
+                        record_error(COUNTER_SYN_DROPPED)
+                        pending = 0
+                        discard = True
+                        resynced = self._resync_evdev(source, generation, output_axes, axis_count, read_time,
+                                                      resample)
+                        if resynced:
+                            if not dirty:
+                                frame_start = read_time
+                            dirty |= resynced
+
+    def _resync_evdev(self, source, generation, output_axes, axis_count, read_time, resample):
+        """
+        Holt nach SYN_DROPPED den aktuellen Zustand aller Achsen per EVIOCGABS
+
+        Ohne Resampling geht der korrigierte Zustand sofort als ein Frame raus,
+        mit Resampling liefert die Bitmaske die Achsen für den nächsten Tick.
+        """
+        if self.reader_generation != generation:
+            return 0
+
+        values = source.read_abs_values(axis_count)
+        calibrator = self.calibrator
+        sequence = self.sequence
+        record = self.record_event
+
+        for axis in range(axis_count):
+            raw = source.to_js_value(axis, values[axis])
+            value = raw
+            if calibrator is not None and calibrator.enabled:
+                table = calibrator.tables[axis]
+                if table is not None:
+                    value = table[value + TABLE_OFFSET]
+                else:
+                    value = calibrator.calibrate_value(value, PEDAL_NAMES[axis])
+
+            seq = sequence[0] + 1
+            sequence[0] = seq
+            self.raw_values[axis] = raw
+            self.out_values[axis] = value
+            sequence[1] = read_time
+            sequence[0] = seq + 1
+
+            if record is not None:
+                record(read_time, axis, raw, value)
+
+        if resample:
+            return (1 << axis_count) - 1
+
+        try:
+            for axis in range(axis_count):
+                self.uinput.write(e.EV_ABS, output_axes[axis], self.out_values[axis])
+            self.uinput.syn()
+            self.counters[COUNTER_EVENTS_OUT] += axis_count
+            self.latency.record(time.monotonic_ns() - read_time)
+        except OSError as ex:
+            self.diagnostics.record(COUNTER_WRITE_ERRORS, ex.errno or 0)
+        return 0
+
+    def _setup_reader_thread(self):
+        """Wendet den Real-time Mode auf den Reader-Thread an (falls aktiv)"""
+        if self.realtime:
+            self.realtime_report = apply_realtime(
+                priority=self.rt_priority,
+                cpus=self.cpu_affinity,
+                lock_memory=self.lock_memory
+            )
+
+    def _freeze_gc(self):
+        """Verschiebt alle Setup-Objekte in die permanente Generation"""
+        gc.collect()
+        if self.gc_threshold:
+            # Nach einem Neustart hat der alte Reader die Schwellen schon gesetzt
+            if self._saved_gc_threshold is None:
+                self._saved_gc_threshold = gc.get_threshold()
+            gc.set_threshold(*self.gc_threshold)
+        gc.freeze()
+
+    def _unfreeze_gc(self):
+        """Stellt den GC-Zustand nach dem Reader wieder her"""
+        gc.unfreeze()
+        if self._saved_gc_threshold:
+            gc.set_threshold(*self._saved_gc_threshold)
+            self._saved_gc_threshold = None
 
     def _process_pedal_event(self, data, axis_map):
-        """Verarbeitet Pedal Events"""
+        """Verarbeitet Pedal Events (True wenn ein Event geschrieben wurde)"""
+        self.counters[COUNTER_EVENTS_IN] += 1
+
+        # Buttons und nicht geroutete Achsen vor dem Dekodieren verwerfen (type/number Byte)
+        if (data[6] & ~JS_EVENT_INIT) != JS_EVENT_AXIS or data[7] not in axis_map:
+            return False
+
         timestamp, value, event_type, number = struct.unpack(JS_EVENT_FMT, data)
-        event_type &= ~JS_EVENT_INIT
 
-        if event_type == JS_EVENT_AXIS:
-            if number in axis_map:
-                output_axis = axis_map[number]
+        output_axis = axis_map[number]
+        raw = value
+
+        if self.calibrator and self.calibrator.auto_calibration is not None:
+            self.calibrator.auto_calibration.update(number, raw, time.monotonic_ns())
 
-                # Apply calibration if available and enabled
-                if self.calibrator and self.calibrator.enabled:
-                    pedal_names = {0: 'gas', 1: 'brake', 2: 'clutch'}
-                    if number in pedal_names:
-                        value = self.calibrator.calibrate_value(value, pedal_names[number])
+        # Apply calibration if available and enabled
+        if self.calibrator and self.calibrator.enabled:
+            pedal_names = {0: 'gas', 1: 'brake', 2: 'clutch'}
+            if number in pedal_names:
+                value = self.calibrator.calibrate_value(value, pedal_names[number])
 
-                self.write_event(e.EV_ABS, output_axis, value)
+        seq = self.sequence[0] + 1
+        self.sequence[0] = seq
+        self.raw_values[number] = raw
+        self.out_values[number] = value
+        self.sequence[1] = time.monotonic_ns()
+        self.sequence[0] = seq + 1
+
+        if self.record_event is not None:
+            self.record_event(time.monotonic_ns(), number, raw, value)
+
+        self.write_event(e.EV_ABS, output_axis, value)
+        return True
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Real-time Scheduling - SCHED_FIFO, CPU-Affinität und mlockall für den Reader
+Alles best-effort: was ohne Rechte nicht geht, wird im Report vermerkt.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import resource
+import threading
+
+# mlockall() Flags aus <sys/mman.h>
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+
+def apply_realtime(priority=50, cpus=None, lock_memory=True, fallback_nice=-10):
+    """
+    Hebt den aufrufenden Thread auf Echtzeit-Priorität
+
+    Muss im Reader-Thread selbst aufgerufen werden: unter Linux wirken
+    sched_setscheduler(0, ...) und sched_setaffinity(0, ...) pro Thread.
+
+    Args:
+        priority: SCHED_FIFO Priorität (1-99)
+        cpus: Iterable von CPU-Nummern oder None (nicht pinnen)
+        lock_memory: Speicher per mlockall() sperren
+        fallback_nice: Nice-Wert falls SCHED_FIFO nicht erlaubt ist
+
+    Returns:
+        Dict mit den tatsächlich erhaltenen Privilegien
+    """
+    report = {
+        'sched_fifo': False,
+        'priority': None,
+        'nice': None,
+        'affinity': None,
+        'mlockall': None,
+        'errors': []
+    }
+
+    tid = threading.get_native_id()
+
+    # 1. SCHED_FIFO, sonst wenigstens höhere Nice-Priorität
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        report['sched_fifo'] = True
+        report['priority'] = priority
+    except (PermissionError, OSError, AttributeError) as ex:
+        report['errors'].append(f"SCHED_FIFO: {ex}")
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, fallback_nice)
+            report['nice'] = fallback_nice
+        except OSError as nice_ex:
+            report['errors'].append(f"nice {fallback_nice}: {nice_ex}")
+            report['nice'] = os.getpriority(os.PRIO_PROCESS, tid)
+
+    # 2. CPU-Affinität
+    if cpus:
+        try:
+            os.sched_setaffinity(0, set(cpus))
+            report['affinity'] = sorted(os.sched_getaffinity(0))
+        except OSError as ex:
+            report['errors'].append(f"affinity {sorted(cpus)}: {ex}")
+
+    # 3. Speicher sperren (keine Page Faults im Hot-Path)
+    if lock_memory:
+        report['mlockall'] = _lock_memory(report['errors'])
+
+    return report
+
+
+def apply_background(nice=19):
+    """
+    Senkt den aufrufenden Thread auf Hintergrund-Priorität (z.B. Exporter)
+
+    Nur ein Nice-Wert, bewusst kein SCHED_IDLE: Threads in der Engine halten
+    beim Arbeiten den GIL, und ein unter SCHED_IDLE verdrängter GIL-Halter
+    würde den Reader beliebig lange warten lassen. Wirkt pro Thread.
+
+    Returns:
+        'nice <n>' oder None
+    """
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+        return f"nice {nice}"
+    except OSError:
+        return None
+
+
+def _lock_memory(errors):
+    """
+    Ruft mlockall() auf
+
+    MCL_FUTURE nur bei unbegrenztem RLIMIT_MEMLOCK, sonst würden spätere
+    Allokationen am Limit scheitern statt nur nicht gesperrt zu sein.
+
+    Returns:
+        'current+future', 'current' oder False
+    """
+    libc_name = ctypes.util.find_library('c')
+    if not libc_name:
+        errors.append("mlockall: libc not found")
+        return False
+
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_MEMLOCK)
+
+    if soft_limit == resource.RLIM_INFINITY:
+        flags, result = MCL_CURRENT | MCL_FUTURE, 'current+future'
+    else:
+        flags, result = MCL_CURRENT, 'current'
+
+    if libc.mlockall(flags) != 0:
+        errno = ctypes.get_errno()
+        errors.append(f"mlockall: {os.strerror(errno)}")
+        return False
+
+    return result
+
+
+def format_realtime_report(report):
+    """Kurzbeschreibung für GUI/Log, z.B. 'FIFO 50 | CPUs 2,3 | mlock current'"""
+    if not report:
+        return "off"
+
+    parts = []
+    if report['sched_fifo']:
+        parts.append(f"FIFO {report['priority']}")
+    else:
+        parts.append(f"nice {report['nice']}")
+
+    if report['affinity']:
+        parts.append("CPUs " + ",".join(str(cpu) for cpu in report['affinity']))
+
+    if report['mlockall']:
+        parts.append(f"mlock {report['mlockall']}")
+    elif report['mlockall'] is False:
+        parts.append("no mlock")
+
+    return " | ".join(parts)
@@ -7,6 +7,54 @@ import os
 import struct
 from pathlib import Path
 
+SYSFS_INPUT = Path("/sys/class/input")
+
+
+def device_identity(device_path):
+    """
+    Identität eines js-Devices aus sysfs (Name, Bus, Vendor, Product)
+
+    Kostet nur ein paar kleine sysfs-Reads, kein Parsen von /proc/bus/input/devices.
+
+    Returns:
+        Dict mit path, name, bustype, vendor, product oder None
+    """
+    device_dir = SYSFS_INPUT / Path(device_path).name / "device"
+    try:
+        identity = {
+            'path': str(device_path),
+            'name': (device_dir / "name").read_text().strip()
+        }
+        for key in ('bustype', 'vendor', 'product'):
+            identity[key] = (device_dir / "id" / key).read_text().strip()
+    except OSError:
+        return None
+    return identity
+
+
+def find_device(identity):
+    """
+    Sucht ein bekanntes Device ohne Scan und Klassifizierung
+
+    Erst am gespeicherten Pfad, danach (js-Nummer hat sich geändert) unter
+    allen js* in sysfs.
+
+    Returns:
+        Aktueller Pfad (/dev/input/jsN) oder None
+    """
+    def matches(path):
+        current = device_identity(path)
+        return current is not None and all(current[key] == identity[key] for key in ('name', 'bustype', 'vendor', 'product'))
+
+    if matches(identity['path']):
+        return identity['path']
+    for sysfs_path in sorted(SYSFS_INPUT.glob("js*")):
+        path = f"/dev/input/{sysfs_path.name}"
+        if path != identity['path'] and matches(path):
+            return path
+    return None
+
+
 class DeviceScanner:
     def __init__(self):
         self.devices = []
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Session Analytics - Fahrer-Statistiken pro Session mit konstantem Speicher
+Ein eigener Thread tastet die kalibrierten Ausgabewerte alle 1/ANALYTICS_RATE
+Sekunden aus dem Telemetrie-Block ab (Seqlock, wie TelemetryReader) - der
+Reader-Thread macht dafür keinen Handgriff. Jede Abtastung ist O(1) und
+gewichtet mit der vergangenen Zeit:
+
+- zeitgewichtetes Positions-Histogramm (HISTOGRAM_BINS × 5%) pro Achse
+- Zeit gedrückt / voll durchgedrückt, Anzahl Betätigungen (mit Hysterese), Spitzenwert
+- Überlappung Gas + Bremse (Zeit und Anzahl)
+
+Rohsamples werden nie gespeichert: eine mehrstündige Langstrecke belegt
+denselben Speicher wie ein 5-Minuten-Test. Eine Session reicht von RESUME
+bis PAUSE (START/STOP in der GUI); bei PAUSE und beim Beenden der Engine
+landet die Zusammenfassung als sessions/<Datum-Uhrzeit>.summary.json.
+"""
+
+import json
+import threading
+import time
+from array import array
+
+from config.presets import atomic_write
+from device.calibration import PEDAL_NAMES, TABLE_OFFSET, TABLE_SIZE
+from device.engine_process import STATUS_RUNNING
+from device.telemetry import MAX_READ_RETRIES
+
+ANALYTICS_RATE = 250
+HISTOGRAM_BINS = 20
+
+# Betätigung beginnt über PRESSED_ON und endet unter PRESSED_OFF (Prozent)
+PRESSED_ON = 5.0
+PRESSED_OFF = 2.0
+FULL_THRESHOLD = 98.0
+
+# Gas + Bremse gleichzeitig gedrückt
+OVERLAP_PEDALS = ('gas', 'brake')
+
+# Längere Lücken (Suspend, blockierter Thread) zählen nur bis hierhin
+MAX_GAP_NS = 100000000
+
+SUMMARY_SUFFIX = '.summary.json'
+
+
+def _axis_value(percentage):
+    """Prozent → Achswert (wie PedalCalibrator.percentage_to_value)"""
+    return int((percentage / 100.0) * 65534 - 32767)
+
+
+def _percentage(value):
+    return round(((value + 32767) / 65534) * 100.0, 1)
+
+
+class SessionAnalytics:
+    """
+    Statistiken über die Ausgabewerte einer Engine-Session
+
+    Gezählt wird nur, solange die Engine läuft (status STATUS_RUNNING).
+    Nach write_summary() beginnt reset() die nächste Session.
+    """
+
+    def __init__(self, out, sequence, status, rate=ANALYTICS_RATE):
+        self.out = out
+        self.sequence = sequence
+        self.status = status
+        self.interval = 1.0 / rate
+        self.thread = None
+        self.wakeup = threading.Event()
+
+        self.axes = len(PEDAL_NAMES)
+        self.pressed_on = _axis_value(PRESSED_ON)
+        self.pressed_off = _axis_value(PRESSED_OFF)
+        self.full = _axis_value(FULL_THRESHOLD)
+        self.overlap_axes = tuple(PEDAL_NAMES.index(name) for name in OVERLAP_PEDALS)
+        self.reset()
+
+    def reset(self):
+        """Verwirft alle Statistiken (neue Session, nur bei gestopptem Thread)"""
+        axes = self.axes
+        self.histogram_ns = array('Q', bytes(8 * axes * HISTOGRAM_BINS))
+        self.pressed_ns = array('Q', bytes(8 * axes))
+        self.full_ns = array('Q', bytes(8 * axes))
+        self.applications = array('Q', bytes(8 * axes))
+        self.peak = array('i', [-32767] * axes)
+        self.weighted = array('d', bytes(8 * axes))
+        self.pressed = array('B', bytes(axes))
+        self.overlapping = False
+        self.overlap_ns = 0
+        self.overlaps = 0
+
+        self.started = time.time()
+        self.running_ns = 0
+        self.samples = 0
+        self.torn_reads = 0
+        self.last_ns = None
+
+    def start(self):
+        if self.thread:
+            return False
+        self.wakeup.clear()
+        self.last_ns = None
+        if not self.running_ns:
+            self.started = time.time()
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="session-analytics")
+        self.thread.start()
+        return True
+
+    def stop(self):
+        if not self.thread:
+            return
+        self.wakeup.set()
+        self.thread.join(timeout=1)
+        self.thread = None
+
+    def sample(self, now_ns):
+        """Eine Abtastung: Werte seit der letzten Abtastung gelten für die vergangene Zeit"""
+        last_ns = self.last_ns
+        self.last_ns = now_ns
+        if self.status[0] != STATUS_RUNNING:
+            return
+
+        sequence = self.sequence
+        for _ in range(MAX_READ_RETRIES):
+            seq = sequence[0]
+            if seq & 1:
+                continue
+            values = self.out.tolist()
+            if sequence[0] == seq:
+                break
+        else:
+            self.torn_reads += 1
+            return
+
+        dt = min(now_ns - last_ns, MAX_GAP_NS) if last_ns is not None else 0
+        self.running_ns += dt
+        self.samples += 1
+
+        pressed = self.pressed
+        for axis in range(self.axes):
+            value = values[axis]
+            self.histogram_ns[axis * HISTOGRAM_BINS + (value + TABLE_OFFSET) * HISTOGRAM_BINS // TABLE_SIZE] += dt
+            self.weighted[axis] += value * dt
+            if value > self.peak[axis]:
+                self.peak[axis] = value
+            if value >= self.full:
+                self.full_ns[axis] += dt
+
+            if pressed[axis]:
+                if value < self.pressed_off:
+                    pressed[axis] = 0
+                else:
+                    self.pressed_ns[axis] += dt
+            elif value > self.pressed_on:
+                pressed[axis] = 1
+                self.applications[axis] += 1
+
+        first, second = self.overlap_axes
+        overlapping = pressed[first] and pressed[second]
+        if overlapping:
+            self.overlap_ns += dt
+            if not self.overlapping:
+                self.overlaps += 1
+        self.overlapping = overlapping
+
+    def summary(self):
+        """Zusammenfassung (picklebar, JSON-tauglich)"""
+        running_s = self.running_ns / 1e9
+        pedals = {}
+        for axis, name in enumerate(PEDAL_NAMES):
+            histogram = self.histogram_ns[axis * HISTOGRAM_BINS:(axis + 1) * HISTOGRAM_BINS]
+            pedals[name] = {
+                'applications': self.applications[axis],
+                'pressed_s': round(self.pressed_ns[axis] / 1e9, 3),
+                'full_s': round(self.full_ns[axis] / 1e9, 3),
+                'full_pct': round(100.0 * self.full_ns[axis] / self.running_ns, 2) if self.running_ns else 0.0,
+                'peak_pct': _percentage(self.peak[axis]) if self.samples else 0.0,
+                'mean_pct': _percentage(self.weighted[axis] / self.running_ns) if self.running_ns else 0.0,
+                # Zeitanteil (%) pro 100/HISTOGRAM_BINS %-Bereich der Pedalstellung
+                'histogram_pct': [round(100.0 * ns / self.running_ns, 2) if self.running_ns else 0.0
+                                  for ns in histogram]
+            }
+
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'duration_s': round(time.time() - self.started, 1),
+            'running_s': round(running_s, 1),
+            'samples': self.samples,
+            'rate_hz': round(1.0 / self.interval),
+            'pedals': pedals,
+            'overlap': {
+                'pedals': list(OVERLAP_PEDALS),
+                'count': self.overlaps,
+                'time_s': round(self.overlap_ns / 1e9, 3)
+            }
+        }
+
+    def write_summary(self, path):
+        """Schreibt summary() als JSON (nur wenn die Engine überhaupt lief)"""
+        if not self.running_ns:
+            return False
+        try:
+            atomic_write(path, json.dumps(self.summary(), indent=2).encode())
+            return True
+        except OSError as e:
+            print(f"Error writing session summary: {e}")
+            return False
+
+    def _loop(self):
+        while not self.wakeup.wait(self.interval):
+            self.sample(time.monotonic_ns())
+
+
+def format_summary(summary):
+    """Eine Zeile pro Pedal, z.B. 'brake: 42 applications, peak 87.3%, full 0.4 s, pressed 61.2 s'"""
+    lines = [f"{summary['running_s']:.0f} s running"]
+    for name, pedal in summary['pedals'].items():
+        lines.append(f"  {name}: {pedal['applications']} applications, peak {pedal['peak_pct']:.1f}%, "
+                     f"full {pedal['full_s']:.1f} s ({pedal['full_pct']:.1f}%), pressed {pedal['pressed_s']:.1f} s")
+    overlap = summary['overlap']
+    lines.append(f"  {'+'.join(overlap['pedals'])} overlap: {overlap['count']}×, {overlap['time_s']:.1f} s")
+    return "\n".join(lines)
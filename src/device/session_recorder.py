@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Session Recorder - Zeichnet Pedal-Events (roh + kalibriert) in eine Binärdatei auf
+Der Hot-Path schreibt nur in einen Ringpuffer, ein Writer-Thread packt die
+Records in vorab allokierte Chunks. SessionReader mappt die Datei per mmap
+und liefert die Records ohne Kopie (memoryview oder NumPy, falls installiert).
+
+Datei-Layout (little endian):
+    Header (64 Bytes): magic, version, record_size, chunk_records, start_ns, wall_ns
+    Chunk:  base_ns (int64), count (uint32), reserviert (uint32)
+            chunk_records × Record (uint32 ts_us seit base_ns, int16 raw, int16 out, uint8 axis)
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from device.io_backends import JS_EVENT_FMT, JS_EVENT_AXIS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SESSION_SUFFIX = '.pcrec'
+MAGIC = b'PCREC\x00\x00\x00'
+VERSION = 1
+
+HEADER_FMT = '<8sIIIxxxxqq'
+HEADER_SIZE = 64
+CHUNK_HEADER_FMT = '<qII'
+CHUNK_HEADER_SIZE = struct.calcsize(CHUNK_HEADER_FMT)
+RECORD_FMT = '<IhhB'
+RECORD_SIZE = struct.calcsize(RECORD_FMT)
+CHUNK_RECORDS = 65536
+
+# Ringpuffer zwischen Hot-Path und Writer: int64 time_ns, int16 raw, int16 out, uint8 axis
+RING_FMT = '<qhhB'
+RING_SIZE = struct.calcsize(RING_FMT)
+RING_RECORDS = 16384
+FLUSH_INTERVAL = 0.05
+
+# ts_us ist relativ zum Chunk-Start, längere Pausen beginnen einen neuen Chunk
+MAX_CHUNK_SPAN_US = 0xFFFFFFFF
+
+if np is not None:
+    RECORD_DTYPE = np.dtype([('ts_us', '<u4'), ('raw', '<i2'), ('out', '<i2'), ('axis', 'u1')])
+    CHUNK_DTYPE = np.dtype([
+        ('base_ns', '<i8'),
+        ('count', '<u4'),
+        ('reserved', '<u4'),
+        ('records', RECORD_DTYPE, (CHUNK_RECORDS,))
+    ])
+else:
+    RECORD_DTYPE = None
+    CHUNK_DTYPE = None
+
+
+def default_session_path(suffix=SESSION_SUFFIX):
+    """sessions/<Datum-Uhrzeit><suffix> im Projektverzeichnis (Standard: .pcrec)"""
+    base_dir = Path(__file__).parent.parent.parent / "sessions"
+    base_dir.mkdir(exist_ok=True)
+    return str(base_dir / f"{time.strftime('%Y%m%d-%H%M%S')}{suffix}")
+
+
+class SessionRecorder:
+    """
+    Nimmt Pedal-Events auf
+
+    record() ist für den Reader-Thread gedacht (ein Producer), alles andere
+    läuft im Writer-Thread. Ist der Ring voll, werden Events verworfen und
+    in dropped gezählt statt den Reader zu blockieren.
+    """
+
+    def __init__(self, path, chunk_records=CHUNK_RECORDS, ring_records=RING_RECORDS):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.chunk_bytes = CHUNK_HEADER_SIZE + chunk_records * RECORD_SIZE
+        self.ring_records = ring_records
+        self.ring = bytearray(RING_SIZE * ring_records)
+        self.ring_pack = struct.Struct(RING_FMT).pack_into
+
+        # Producer-/Consumer-Position (monoton steigend, Index = pos % ring_records)
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.records = 0
+
+        self.fd = None
+        self.writer_thread = None
+        self.is_running = False
+        self.wakeup = threading.Event()
+
+        # Aktueller Chunk (im Writer-Thread)
+        self.chunk_index = -1
+        self.chunk_base_ns = 0
+        self.chunk_count = 0
+        self.chunk_buffer = bytearray(chunk_records * RECORD_SIZE)
+
+    def start(self):
+        """Legt die Datei an und startet den Writer-Thread"""
+        if self.is_running:
+            return False
+
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        header = bytearray(HEADER_SIZE)
+        struct.pack_into(HEADER_FMT, header, 0, MAGIC, VERSION, RECORD_SIZE, self.chunk_records,
+                         time.monotonic_ns(), time.time_ns())
+        os.pwrite(self.fd, header, 0)
+
+        self.is_running = True
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True, name="session-writer")
+        self.writer_thread.start()
+        return True
+
+    def record(self, time_ns, axis, raw, out):
+        """Hot-Path: ein Event in den Ring (keine I/O, kein Lock)"""
+        head = self.head
+        if head - self.tail >= self.ring_records:
+            self.dropped += 1
+            return
+        self.ring_pack(self.ring, (head % self.ring_records) * RING_SIZE, time_ns, raw, out, axis)
+        self.head = head + 1
+
+    def stop(self):
+        """Schreibt den Rest und schließt die Datei"""
+        if not self.is_running:
+            return self.stats()
+
+        self.is_running = False
+        self.wakeup.set()
+        if self.writer_thread:
+            self.writer_thread.join(timeout=2)
+
+        os.fsync(self.fd)
+        os.close(self.fd)
+        self.fd = None
+        return self.stats()
+
+    def stats(self):
+        return {'path': self.path, 'records': self.records, 'dropped': self.dropped}
+
+    def _writer_loop(self):
+        """Leert den Ring periodisch in die Datei"""
+        while self.is_running:
+            self.wakeup.wait(FLUSH_INTERVAL)
+            self.wakeup.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        head = self.head
+        tail = self.tail
+        if head == tail:
+            return
+
+        unpack = struct.Struct(RING_FMT).unpack_from
+        pack = struct.Struct(RECORD_FMT).pack_into
+        first_dirty = self.chunk_count
+
+        for position in range(tail, head):
+            time_ns, raw, out, axis = unpack(self.ring, (position % self.ring_records) * RING_SIZE)
+            ts_us = (time_ns - self.chunk_base_ns) // 1000
+
+            if self.chunk_index < 0 or self.chunk_count >= self.chunk_records or not 0 <= ts_us <= MAX_CHUNK_SPAN_US:
+                self._write_chunk(first_dirty)
+                self._new_chunk(time_ns)
+                first_dirty = 0
+                ts_us = 0
+
+            pack(self.chunk_buffer, self.chunk_count * RECORD_SIZE, ts_us, raw, out, axis)
+            self.chunk_count += 1
+            self.records += 1
+
+        # Ring-Plätze erst nach dem Kopieren freigeben
+        self.tail = head
+        self._write_chunk(first_dirty)
+
+    def _chunk_offset(self):
+        return HEADER_SIZE + self.chunk_index * self.chunk_bytes
+
+    def _new_chunk(self, base_ns):
+        """Beginnt einen neuen, vorab allokierten Chunk"""
+        self.chunk_index += 1
+        self.chunk_base_ns = base_ns
+        self.chunk_count = 0
+        offset = self._chunk_offset()
+        try:
+            os.posix_fallocate(self.fd, offset, self.chunk_bytes)
+        except OSError:
+            # z.B. tmpfs ohne fallocate: Datei wächst beim Schreiben
+            os.ftruncate(self.fd, offset + self.chunk_bytes)
+
+    def _write_chunk(self, first_dirty):
+        """Schreibt neue Records und den Chunk-Header (count) des aktuellen Chunks"""
+        if self.chunk_index < 0 or first_dirty >= self.chunk_count:
+            return
+
+        offset = self._chunk_offset()
+        view = memoryview(self.chunk_buffer)
+        os.pwrite(self.fd, view[first_dirty * RECORD_SIZE:self.chunk_count * RECORD_SIZE],
+                  offset + CHUNK_HEADER_SIZE + first_dirty * RECORD_SIZE)
+        os.pwrite(self.fd, struct.pack(CHUNK_HEADER_FMT, self.chunk_base_ns, self.chunk_count, 0), offset)
+
+
+class SessionReader:
+    """
+    Liest eine Aufnahme per mmap (ohne die Datei zu kopieren)
+
+    Von chunks()/arrays() gelieferte Sichten müssen vor close() freigegeben
+    werden, sonst meldet mmap einen BufferError.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(f"{path}: not a session recording")
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, record_size, chunk_records, start_ns, wall_ns = struct.unpack_from(HEADER_FMT, self.mm, 0)
+        if magic != MAGIC or record_size != RECORD_SIZE:
+            self.mm.close()
+            raise ValueError(f"{path}: not a session recording")
+
+        self.version = version
+        self.chunk_records = chunk_records
+        self.chunk_bytes = CHUNK_HEADER_SIZE + chunk_records * RECORD_SIZE
+        self.start_ns = start_ns
+        self.wall_ns = wall_ns
+        self.chunk_count = (size - HEADER_SIZE) // self.chunk_bytes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return sum(self._chunk_header(index)[1] for index in range(self.chunk_count))
+
+    def _chunk_header(self, index):
+        return struct.unpack_from(CHUNK_HEADER_FMT, self.mm, HEADER_SIZE + index * self.chunk_bytes)
+
+    def chunks(self):
+        """
+        Iteriert über die Chunks
+
+        Yields:
+            (base_ns, memoryview auf count × RECORD_SIZE Bytes)
+        """
+        view = memoryview(self.mm)
+        try:
+            for index in range(self.chunk_count):
+                base_ns, count, _ = self._chunk_header(index)
+                start = HEADER_SIZE + index * self.chunk_bytes + CHUNK_HEADER_SIZE
+                yield base_ns, view[start:start + count * RECORD_SIZE]
+        finally:
+            view.release()
+
+    def iter_records(self):
+        """
+        Iteriert über alle Records
+
+        Yields:
+            (time_ns, axis, raw, out) mit time_ns relativ zum Aufnahmestart
+        """
+        for base_ns, records in self.chunks():
+            offset_ns = base_ns - self.start_ns
+            for ts_us, raw, out, axis in struct.iter_unpack(RECORD_FMT, records):
+                yield offset_ns + ts_us * 1000, axis, raw, out
+            records.release()
+
+    def arrays(self):
+        """
+        NumPy Sicht pro Chunk (ohne Kopie)
+
+        Returns:
+            Liste von (base_ns, strukturiertes Array mit ts_us/raw/out/axis)
+        """
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        return [(base_ns, np.frombuffer(records, dtype=RECORD_DTYPE)) for base_ns, records in self.chunks()]
+
+    def chunk_array(self):
+        """
+        Die ganze Datei als Array von Chunks (ohne Kopie)
+
+        Nur die ersten chunk['count'] Records eines Chunks sind gültig.
+        """
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        if self.chunk_records != CHUNK_RECORDS:
+            raise ValueError("chunk_array() needs the default chunk size")
+        return np.frombuffer(self.mm, dtype=CHUNK_DTYPE, count=self.chunk_count, offset=HEADER_SIZE)
+
+    def to_js_events(self, field='raw'):
+        """
+        Wandelt die Aufnahme in js_event Bytes (z.B. als Benchmark-Trace)
+
+        Args:
+            field: 'raw' oder 'out'
+        """
+        js_event = struct.Struct(JS_EVENT_FMT)
+        use_out = field == 'out'
+        data = bytearray()
+        for time_ns, axis, raw, out in self.iter_records():
+            data += js_event.pack((time_ns // 1000000) & 0xFFFFFFFF, out if use_out else raw, JS_EVENT_AXIS, axis)
+        return bytes(data)
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Telemetry - Live-Werte der Engine als Shared Memory unter /dev/shm/pedalc0re
+Feste Struktur (native Byte-Order), geschützt durch einen Sequenz-Zähler
+(Seqlock): der Reader-Thread der Engine ist der einzige Schreiber, beliebig
+viele Leser (Overlays, Dashboards) pollen ohne Syscalls und ohne Locks.
+
+Layout:
+    0   char[8] magic "PEDALC0R"
+    8   uint32  version
+    12  uint32  axes
+    16  uint32  status (STATUS_*)
+    20  uint32  Einstellungs-Generation (Preset-Wechsel/Änderung in der Engine)
+    24  uint64  seq (ungerade = Schreiben läuft)
+    32  uint64  update_ns (CLOCK_MONOTONIC, Lesezeitpunkt des letzten Events)
+    40  int32   raw[axes]
+    ..  int32   out[axes]
+    ..  uint64  counters[COUNTER_NAMES] (8-Byte aligned)
+
+raw/out/update_ns werden zwischen zwei seq-Erhöhungen geschrieben. Ein Leser
+merkt sich seq, kopiert und prüft, ob seq gleich (und gerade) geblieben ist.
+Die Zähler steigen monoton und liegen außerhalb des Seqlocks. heartbeat_ns
+setzt der Reader bei jedem Aufwachen (CLOCK_MONOTONIC, auch ohne Events) -
+steht er, hängt die Engine.
+
+Den Block besitzt, wer TELEMETRY_LOCK_PATH per flock hält (die GUI-Seite der
+Engine, bis shutdown() oder bis der Prozess stirbt).
+"""
+
+import mmap
+import os
+import struct
+
+from device.calibration import PEDAL_NAMES
+
+TELEMETRY_NAME = "pedalc0re"
+TELEMETRY_PATH = f"/dev/shm/{TELEMETRY_NAME}"
+TELEMETRY_LOCK_PATH = f"{TELEMETRY_PATH}.lock"
+MAGIC = b'PEDALC0R'
+VERSION = 4
+
+# Live-State Zähler (Index in PedalEnhancer.counters)
+COUNTER_EVENTS_IN = 0
+COUNTER_EVENTS_OUT = 1
+COUNTER_READER_RESTARTS = 2
+COUNTER_HEARTBEAT = 3
+# Fehlerzähler (zugleich Codes im Diagnose-Ring, siehe device.diagnostics)
+COUNTER_WRITE_ERRORS = 4
+COUNTER_READ_AGAIN = 5
+COUNTER_SHORT_READS = 6
+COUNTER_READER_ERRORS = 7
+COUNTER_DEVICE_ERRORS = 8
+COUNTER_SYN_DROPPED = 9
+COUNTER_NAMES = ('events_in', 'events_out', 'reader_restarts', 'heartbeat_ns',
+                 'write_errors', 'read_again', 'short_reads', 'reader_errors', 'device_errors', 'syn_dropped')
+
+HEADER_FMT = '8sII'
+AXES = len(PEDAL_NAMES)
+STATUS_OFFSET = 16
+SEQUENCE_OFFSET = 24
+RAW_OFFSET = 40
+OUT_OFFSET = RAW_OFFSET + 4 * AXES
+COUNTERS_OFFSET = (OUT_OFFSET + 4 * AXES + 7) & ~7
+STATE_SIZE = COUNTERS_OFFSET + 8 * len(COUNTER_NAMES)
+
+# Leser geben nach so vielen kollidierenden Versuchen auf (Schreiber ist nie lange ungerade)
+MAX_READ_RETRIES = 100
+
+
+def write_header(buf):
+    """Schreibt magic/version/axes in einen neuen Block"""
+    struct.pack_into(HEADER_FMT, buf, 0, MAGIC, VERSION, AXES)
+
+
+def state_views(buf):
+    """
+    Typisierte Sichten auf den Block
+
+    Returns:
+        (status + Generation, raw, out, counters, seq + update_ns)
+    """
+    return (
+        buf[STATUS_OFFSET:SEQUENCE_OFFSET].cast('I'),
+        buf[RAW_OFFSET:OUT_OFFSET].cast('i'),
+        buf[OUT_OFFSET:OUT_OFFSET + 4 * AXES].cast('i'),
+        buf[COUNTERS_OFFSET:STATE_SIZE].cast('Q'),
+        buf[SEQUENCE_OFFSET:RAW_OFFSET].cast('Q'),
+    )
+
+
+class TelemetryReader:
+    """
+    Liest /dev/shm/pedalc0re (read-only mmap)
+
+    read() macht keine Syscalls. Nach status 'stopped' ist die Engine weg,
+    eine neue Engine legt den Block neu an → Reader neu öffnen.
+    """
+
+    def __init__(self, path=TELEMETRY_PATH):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.mm) < STATE_SIZE:
+            self.mm.close()
+            raise ValueError(f"{path}: too small for telemetry")
+        magic, version, axes = struct.unpack_from(HEADER_FMT, self.mm, 0)
+        if magic != MAGIC or version != VERSION or axes != AXES:
+            self.mm.close()
+            raise ValueError(f"{path}: unsupported telemetry layout")
+
+        self.buf = memoryview(self.mm)
+        self.status, self.raw, self.out, self.counters, self.sequence = state_views(self.buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def seq(self):
+        """Aktueller Sequenz-Zähler (ändert sich bei jedem neuen Wert)"""
+        return self.sequence[0]
+
+    def read(self):
+        """
+        Konsistenter Snapshot
+
+        Returns:
+            Dict mit seq, update_ns, status, generation, raw, out, counters
+            oder None, wenn der Schreiber MAX_READ_RETRIES mal dazwischenkam
+        """
+        sequence = self.sequence
+        for _ in range(MAX_READ_RETRIES):
+            seq = sequence[0]
+            if seq & 1:
+                continue
+            update_ns = sequence[1]
+            raw = self.raw.tolist()
+            out = self.out.tolist()
+            if sequence[0] == seq:
+                return {
+                    'seq': seq,
+                    'update_ns': update_ns,
+                    'status': self.status[0],
+                    'generation': self.status[1],
+                    'raw': dict(zip(PEDAL_NAMES, raw)),
+                    'out': dict(zip(PEDAL_NAMES, out)),
+                    'counters': dict(zip(COUNTER_NAMES, self.counters.tolist()))
+                }
+        return None
+
+    def close(self):
+        if self.mm is None:
+            return
+        for view in (self.status, self.raw, self.out, self.counters, self.sequence, self.buf):
+            view.release()
+        self.mm.close()
+        self.mm = None
+
+
+def exists(path=TELEMETRY_PATH):
+    """True, wenn eine Engine Telemetrie anbietet"""
+    return os.path.exists(path)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+TimerFd - Periodischer Timer als File Descriptor (timerfd, CLOCK_MONOTONIC)
+Lässt sich wie eine Input-Quelle in select.poll registrieren, der Loop
+braucht so keinen zweiten Thread und keine Sleep-Schätzung.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+
+CLOCK_MONOTONIC = 1
+TFD_NONBLOCK = 0o4000
+TFD_CLOEXEC = 0o2000000
+
+# Erlaubte Ausgaberaten des Resamplers
+OUTPUT_RATES = (250, 500, 1000)
+
+
+class _Timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+class _Itimerspec(ctypes.Structure):
+    _fields_ = [('it_interval', _Timespec), ('it_value', _Timespec)]
+
+
+class TimerFd:
+    """
+    Feuert rate_hz mal pro Sekunde
+
+    os.timerfd_create (Python 3.13+) wenn vorhanden, sonst libc per ctypes.
+    """
+
+    def __init__(self, rate_hz):
+        if rate_hz <= 0:
+            raise ValueError(f"invalid timer rate {rate_hz}")
+        self.rate_hz = rate_hz
+        self.interval_ns = 1000000000 // rate_hz
+        self.fd = -1
+
+    def open(self):
+        seconds, nanoseconds = divmod(self.interval_ns, 1000000000)
+
+        if hasattr(os, 'timerfd_create'):
+            self.fd = os.timerfd_create(os.CLOCK_MONOTONIC, flags=os.TFD_NONBLOCK | os.TFD_CLOEXEC)
+            os.timerfd_settime_ns(self.fd, initial=self.interval_ns, interval=self.interval_ns)
+            return self
+
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("timerfd: libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        fd = libc.timerfd_create(CLOCK_MONOTONIC, TFD_NONBLOCK | TFD_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"timerfd_create: {os.strerror(errno)}")
+
+        period = _Timespec(seconds, nanoseconds)
+        spec = _Itimerspec(period, period)
+        if libc.timerfd_settime(fd, 0, ctypes.byref(spec), None) != 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"timerfd_settime: {os.strerror(errno)}")
+
+        self.fd = fd
+        return self
+
+    def fileno(self):
+        return self.fd
+
+    def read(self):
+        """Anzahl abgelaufener Perioden seit dem letzten read() (0 wenn keine)"""
+        try:
+            return struct.unpack('Q', os.read(self.fd, 8))[0]
+        except BlockingIOError:
+            return 0
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
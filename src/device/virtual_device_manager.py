@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Virtual Device Manager - Hält uinput Devices über STOP/START hinweg registriert
+Ein Device wird pro Session nur einmal erstellt und nur neu gebaut,
+wenn sich die Capabilities wirklich ändern.
+"""
+
+import glob
+import os
+import threading
+from evdev import UInput, ecodes as e
+
+from device.diagnostics import DiagnosticLog, error_number
+from device.telemetry import COUNTER_DEVICE_ERRORS, COUNTER_WRITE_ERRORS
+
+
+def _capability_key(events):
+    """Erzeugt einen hashbaren Schlüssel aus einem Capability-Dict"""
+    key = []
+    for event_type in sorted(events):
+        codes = []
+        for code in events[event_type]:
+            if isinstance(code, tuple):
+                # (ABS_X, AbsInfo(...)) → hashbar machen
+                codes.append((code[0], tuple(code[1])))
+            else:
+                codes.append((code,))
+        key.append((event_type, tuple(sorted(codes))))
+    return tuple(key)
+
+
+class VirtualDeviceManager:
+    """Verwaltet persistente virtuelle Devices einer Session"""
+
+    def __init__(self, diagnostics=None):
+        # name → {'uinput': UInput, 'key': capability key, 'rest': [(code, value)]}
+        self.devices = {}
+        self._lock = threading.Lock()
+
+        # Fehler beim Ruhe-Frame/Schließen landen im Diagnose-Ring des Besitzers
+        self.diagnostics = diagnostics if diagnostics is not None else DiagnosticLog()
+
+    def acquire(self, name, events, vendor, product, version, bustype=e.BUS_USB, rest_values=None):
+        """
+        Liefert das Device für diesen Namen, erstellt es nur falls nötig
+
+        Args:
+            name: Device-Name (zugleich Slot-Schlüssel)
+            events: Capability-Dict wie bei UInput
+            vendor, product, version, bustype: Device-IDs
+            rest_values: Optional {abs_code: value} für Ruhepositionen
+                (Standard: Achsen-Minimum = Pedal losgelassen)
+
+        Returns:
+            UInput Instanz
+        """
+        key = (vendor, product, version, bustype, _capability_key(events))
+
+        with self._lock:
+            entry = self.devices.get(name)
+            if entry and entry['key'] == key:
+                return entry['uinput']
+
+            # Capabilities geändert → altes Device abbauen
+            if entry:
+                self._close_entry(entry)
+
+            uinput = UInput(
+                events=events,
+                name=name,
+                vendor=vendor,
+                product=product,
+                version=version,
+                bustype=bustype
+            )
+
+            # Ruhewerte für Achsen merken (Minimum = Pedal losgelassen)
+            rest_values = rest_values or {}
+            rest = [(code, rest_values.get(code, absinfo[1])) for code, absinfo in
+                    (c for c in events.get(e.EV_ABS, []) if isinstance(c, tuple))]
+
+            self.devices[name] = {'uinput': uinput, 'key': key, 'rest': rest}
+            return uinput
+
+    def release(self, name):
+        """
+        Gibt das Device frei, ohne es zu schließen
+
+        Die Achsen werden auf Ruheposition gesetzt, damit im Spiel
+        kein Pedal "hängen" bleibt, solange die Pipeline pausiert.
+        """
+        with self._lock:
+            entry = self.devices.get(name)
+            if not entry:
+                return
+
+            try:
+                for code, value in entry['rest']:
+                    entry['uinput'].write(e.EV_ABS, code, value)
+                entry['uinput'].syn()
+            except OSError as ex:
+                self.diagnostics.record(COUNTER_WRITE_ERRORS, error_number(ex))
+
+    def is_registered(self, name):
+        """True wenn das Device bereits existiert"""
+        return name in self.devices
+
+    def get_js_node(self, name):
+        """
+        Ermittelt den js* Node des Devices (z.B. /dev/input/js2)
+
+        Returns:
+            Pfad oder None falls nicht ermittelbar
+        """
+        entry = self.devices.get(name)
+        if not entry:
+            return None
+
+        try:
+            event_path = entry['uinput'].device.path
+        except Exception:
+            return None
+
+        event_name = os.path.basename(event_path)
+        nodes = glob.glob(f"/sys/class/input/{event_name}/device/js*")
+        if nodes:
+            return f"/dev/input/{os.path.basename(nodes[0])}"
+
+        return None
+
+    def close(self, name):
+        """Schließt ein einzelnes Device"""
+        with self._lock:
+            entry = self.devices.pop(name, None)
+            if entry:
+                self._close_entry(entry)
+
+    def close_all(self):
+        """Schließt alle Devices (Session-Ende)"""
+        with self._lock:
+            for entry in self.devices.values():
+                self._close_entry(entry)
+            self.devices = {}
+
+    def _close_entry(self, entry):
+        try:
+            entry['uinput'].close()
+        except Exception as ex:
+            print(f"Error closing virtual device: {ex}")
+            self.diagnostics.record(COUNTER_DEVICE_ERRORS, error_number(ex))
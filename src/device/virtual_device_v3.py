@@ -7,8 +7,13 @@ Die einfachste und zuverlässigste Methode!
 import struct
 import threading
 import time
-from evdev import UInput, AbsInfo, ecodes as e
+from evdev import AbsInfo, ecodes as e
 from device.calibration import PedalCalibrator
+from device.diagnostics import PIPELINE_PEDALS, PIPELINE_WHEELBASE, DiagnosticLog, error_number
+from device.io_backends import JoystickSource
+from device.latency import LatencyHistogram
+from device.telemetry import COUNTER_DEVICE_ERRORS, COUNTER_READER_ERRORS, COUNTER_WRITE_ERRORS
+from device.virtual_device_manager import VirtualDeviceManager
 
 # Joystick event format
 JS_EVENT_FMT = 'IhBB'
@@ -21,7 +26,8 @@ JS_EVENT_INIT = 0x80
 class VirtualRacingDevice:
     """Erstellt ein virtuelles Racing-Device mit python-evdev"""
 
-    def __init__(self, wheelbase_path, pedals_path, name="Simsonn Virtual Racing", calibrator=None):
+    def __init__(self, wheelbase_path, pedals_path, name="Simsonn Virtual Racing", calibrator=None, device_manager=None,
+                 wheelbase_source=None, pedals_source=None, sink=None):
         self.wheelbase_path = wheelbase_path
         self.pedals_path = pedals_path
         self.device_name = name
@@ -30,6 +36,24 @@ class VirtualRacingDevice:
         self.reader_thread = None
         self.calibrator = calibrator if calibrator else PedalCalibrator()
 
+        # I/O Backends (js-Format), übergebene Quellen schließt der Aufrufer
+        self.wheelbase_source = wheelbase_source
+        self.pedals_source = pedals_source
+        self.sink = sink
+
+        # Latenz read → uinput write pro Pipeline (ns)
+        self.latency = {
+            'wheelbase': LatencyHistogram('wheelbase'),
+            'pedals': LatencyHistogram('pedals'),
+        }
+
+        # Fehlerzähler + Ring der letzten Fehler (wie PedalEnhancer)
+        self.diagnostics = DiagnosticLog()
+
+        # Geteilter Manager hält das Device über STOP/START am Leben
+        self.owns_device_manager = device_manager is None
+        self.device_manager = device_manager if device_manager else VirtualDeviceManager(self.diagnostics)
+
         # Axis mapping
         # ABS Codes werden numerisch sortiert: ABS_X(0), ABS_Y(1), ABS_Z(2), ABS_RX(3), ABS_RY(4), ABS_RZ(5)
         # Daher: ABS_X=js0, ABS_Y=js1, ABS_Z=js2, ABS_RX=js3
@@ -42,6 +66,10 @@ class VirtualRacingDevice:
 
     def create_device(self):
         """Erstellt das virtuelle uinput Device"""
+        if self.sink is not None:
+            self.uinput = self.sink
+            return True
+
         try:
             # Define capabilities
             cap = {
@@ -54,25 +82,29 @@ class VirtualRacingDevice:
                 ]
             }
 
-            # Create UInput device
-            self.uinput = UInput(
-                events=cap,
-                name=self.device_name,
+            # Get (or reuse) UInput device
+            self.uinput = self.device_manager.acquire(
+                self.device_name,
+                cap,
                 vendor=0xDDFD,   # Simsonn Vendor ID
                 product=0x6011,  # Simsonn Product ID
                 version=1,
-                bustype=e.BUS_USB
+                bustype=e.BUS_USB,
+                rest_values={e.ABS_X: 0}   # Lenkung ruht in der Mitte
             )
 
-            # Device created successfully
-
             return True
 
         except Exception as ex:
-            # Silent fail
+            print(f"Error creating virtual device: {ex}")
+            self.diagnostics.record(COUNTER_DEVICE_ERRORS, error_number(ex))
             return False
 
-    def write_event(self, event_type, code, value):
+    def latency_snapshot(self):
+        """Latenz-Histogramme pro Pipeline (picklebar)"""
+        return {name: histogram.snapshot() for name, histogram in self.latency.items()}
+
+    def write_event(self, event_type, code, value, pipeline=PIPELINE_PEDALS):
         """Schreibt ein Event auf das virtuelle Device"""
         if not self.uinput:
             return
@@ -81,7 +113,7 @@ class VirtualRacingDevice:
             self.uinput.write(event_type, code, value)
             self.uinput.syn()
         except Exception as ex:
-            pass  # Silent
+            self.diagnostics.record(COUNTER_WRITE_ERRORS, error_number(ex), pipeline)
 
     def start(self):
         """Startet das Event-Merging"""
@@ -104,62 +136,79 @@ class VirtualRacingDevice:
         if self.reader_thread:
             self.reader_thread.join(timeout=2)
 
-        if self.uinput:
-            try:
-                self.uinput.close()
-            except:
-                pass
+        if self.uinput is self.sink:
+            self.uinput = None
+        elif self.uinput:
+            if self.owns_device_manager:
+                self.device_manager.close_all()
+            else:
+                self.device_manager.release(self.device_name)
             self.uinput = None
 
     def _reader_loop(self):
         """Liest Events von beiden Devices und merged sie"""
         import os
 
+        wheelbase_source = self.wheelbase_source or JoystickSource(self.wheelbase_path)
+        pedals_source = self.pedals_source or JoystickSource(self.pedals_path)
+
         try:
-            wheelbase_fd = os.open(self.wheelbase_path, os.O_RDONLY | os.O_NONBLOCK)
-            pedals_fd = os.open(self.pedals_path, os.O_RDONLY | os.O_NONBLOCK)
+            wheelbase_fd = wheelbase_source.open()
+            pedals_fd = pedals_source.open()
 
             while self.is_running:
                 # Read from wheelbase
                 try:
                     data = os.read(wheelbase_fd, JS_EVENT_SIZE)
+                    read_time = time.monotonic_ns()
                     if len(data) == JS_EVENT_SIZE:
-                        self._process_wheelbase_event(data)
+                        if self._process_wheelbase_event(data):
+                            self.latency['wheelbase'].record(time.monotonic_ns() - read_time)
                 except BlockingIOError:
                     pass
 
                 # Read from pedals
                 try:
                     data = os.read(pedals_fd, JS_EVENT_SIZE)
+                    read_time = time.monotonic_ns()
                     if len(data) == JS_EVENT_SIZE:
-                        self._process_pedal_event(data)
+                        if self._process_pedal_event(data):
+                            self.latency['pedals'].record(time.monotonic_ns() - read_time)
                 except BlockingIOError:
                     pass
 
                 time.sleep(0.001)
 
-            os.close(wheelbase_fd)
-            os.close(pedals_fd)
-
         except Exception as ex:
-            # Silent error handling
+            print(f"Error in racing device reader: {type(ex).__name__}: {ex}")
+            self.diagnostics.record(COUNTER_READER_ERRORS, error_number(ex))
             self.is_running = False
 
+        finally:
+            if wheelbase_source is not self.wheelbase_source:
+                wheelbase_source.close()
+            if pedals_source is not self.pedals_source:
+                pedals_source.close()
+
     def _process_wheelbase_event(self, data):
-        """Verarbeitet Wheelbase Events"""
+        """Verarbeitet Wheelbase Events (True wenn ein Event geschrieben wurde)"""
         timestamp, value, event_type, number = struct.unpack(JS_EVENT_FMT, data)
         event_type &= ~JS_EVENT_INIT
 
         if event_type == JS_EVENT_AXIS:
             if number in self.wheelbase_axis_map:
                 virtual_axis = self.wheelbase_axis_map[number]
-                self.write_event(e.EV_ABS, virtual_axis, value)
+                self.write_event(e.EV_ABS, virtual_axis, value, PIPELINE_WHEELBASE)
+                return True
 
         elif event_type == JS_EVENT_BUTTON:
-            self.write_event(e.EV_KEY, e.BTN_JOYSTICK + number, value)
+            self.write_event(e.EV_KEY, e.BTN_JOYSTICK + number, value, PIPELINE_WHEELBASE)
+            return True
+
+        return False
 
     def _process_pedal_event(self, data):
-        """Verarbeitet Pedal Events"""
+        """Verarbeitet Pedal Events (True wenn ein Event geschrieben wurde)"""
         timestamp, value, event_type, number = struct.unpack(JS_EVENT_FMT, data)
         event_type &= ~JS_EVENT_INIT
 
@@ -173,3 +222,6 @@ class VirtualRacingDevice:
                     value = self.calibrator.calibrate_value(value, pedal_names[number])
 
                 self.write_event(e.EV_ABS, virtual_axis, value)
+                return True
+
+        return False
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Warm Start - Startet die Engine mit dem gespeicherten Zustand, noch während die GUI aufgebaut wird
+Lief die Engine beim letzten Beenden, sucht ein Thread die gespeicherten
+Pedale direkt über sysfs (device.scanner.find_device, kein Scan), aktiviert
+das letzte Preset und startet den Enhancer. Die GUI übernimmt die laufende
+Engine per take() - ohne START-Klick und ohne Erfolgs-Dialog.
+
+Die Zeit bis zu funktionierenden Pedalen wird bei jedem Programmstart
+geloggt (auch beim Kaltstart über START) und mit WARM_START_BUDGET_MS verglichen.
+"""
+
+import threading
+import time
+
+from config.rig_state import load_rig_state
+from device.calibration import PedalCalibrator
+from device.engine_process import EngineProcess
+from device.scanner import find_device
+
+# Ziel für Programmstart → Pedale funktionieren
+WARM_START_BUDGET_MS = 1000
+
+ENGINE_DEVICE_NAME = "Enhanced Pedals"
+
+
+class WarmStart:
+    """
+    Engine-Start im Hintergrund beim Programmstart
+
+    calibrator trägt die gespeicherte Kalibrierung schon vor start() und kann
+    direkt als gemeinsamer Calibrator der GUI dienen.
+    """
+
+    def __init__(self, started=None, state_path=None):
+        self.started = started if started is not None else time.monotonic()
+        self.state = load_rig_state(state_path)
+        self.calibrator = PedalCalibrator()
+        if self.state:
+            self.calibrator.apply_snapshot(self.state['calibration'], compile=False)
+        self.engine = None
+        self.status = None
+        self.thread = None
+        self.done = threading.Event()
+        self.logged = False
+
+    def start(self):
+        """
+        Startet den Engine-Thread, falls die Engine beim letzten Mal lief
+
+        Returns:
+            True wenn ein Warm-Start läuft
+        """
+        if not self.state or not self.state['running'] or not self.state['pedals']:
+            self.done.set()
+            return False
+
+        self.thread = threading.Thread(target=self._run, daemon=True, name="warm-start")
+        self.thread.start()
+        return True
+
+    def take(self):
+        """
+        Übergibt die gestartete Engine (einmalig, nach done)
+
+        Returns:
+            (EngineProcess, Status-Dict) oder (None, None)
+        """
+        engine, status = self.engine, self.status
+        self.engine = None
+        self.status = None
+        return engine, status
+
+    def pedals_working(self, how):
+        """Loggt die Zeit seit Programmstart (nur beim ersten Aufruf)"""
+        if self.logged:
+            return
+        self.logged = True
+        elapsed_ms = (time.monotonic() - self.started) * 1000
+        verdict = "within" if elapsed_ms <= WARM_START_BUDGET_MS else "OVER"
+        print(f"Startup: pedals working after {elapsed_ms:.0f} ms ({how}, {verdict} budget of {WARM_START_BUDGET_MS} ms)")
+
+    def _run(self):
+        try:
+            state = self.state
+            pedals_path = find_device(state['pedals'])
+            if not pedals_path:
+                print(f"Warm start: {state['pedals']['name']} not connected, waiting for START")
+                return
+
+            # Eigener Calibrator: der GUI-Thread darf self.calibrator parallel ändern
+            calibrator = PedalCalibrator()
+            calibrator.apply_snapshot(state['calibration'], compile=False)
+
+            engine = EngineProcess(pedals_path=pedals_path, name=ENGINE_DEVICE_NAME)
+            status = engine.start(calibrator, options=state['options'], preset=state['preset'])
+            if status and status['running']:
+                self.engine = engine
+                self.status = status
+                self.pedals_working("warm start")
+            else:
+                engine.shutdown()
+                print("Warm start: engine did not start, waiting for START")
+
+        except Exception as e:
+            print(f"Error in warm start: {e}")
+
+        finally:
+            self.done.set()
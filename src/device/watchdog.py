@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Reader Watchdog - Überwacht den Reader-Thread des PedalEnhancer
+Erkennt einen toten Reader (Exception im Loop) und einen hängenden Reader
+(Heartbeat älter als das Budget) und startet nur den Reader neu - das
+virtuelle Device bleibt registriert, das Spiel merkt vom Neustart nichts.
+"""
+
+import collections
+import threading
+import time
+
+from device.pedal_enhancer import POLL_TIMEOUT_MS
+from device.telemetry import COUNTER_HEARTBEAT
+
+DEFAULT_BUDGET_MS = 50
+
+# Prüfungen pro Budget (Erkennung spätestens nach budget * (1 + 1/CHECKS_PER_BUDGET))
+CHECKS_PER_BUDGET = 4
+
+# Mehr Neustarts in RESTART_WINDOW Sekunden → aufgeben (z.B. Pedale abgesteckt)
+MAX_RESTARTS = 5
+RESTART_WINDOW = 10.0
+
+# Letzte Neustarts (Zeitpunkt, Ursache) für status/stats
+HISTORY_SIZE = 16
+
+
+class ReaderWatchdog:
+    """
+    Prüft den Reader alle budget/CHECKS_PER_BUDGET in einem eigenen Thread
+
+    Der Heartbeat kommt aus counters[COUNTER_HEARTBEAT], den der Reader bei
+    jedem Aufwachen setzt (spätestens alle POLL_TIMEOUT_MS) - das Budget
+    muss also größer sein. Nach MAX_RESTARTS Neustarts in RESTART_WINDOW
+    gibt der Watchdog auf und setzt failed (die Engine meldet dann FAILED).
+    """
+
+    def __init__(self, enhancer, budget_ms=DEFAULT_BUDGET_MS):
+        if budget_ms <= POLL_TIMEOUT_MS:
+            raise ValueError(f"watchdog budget must exceed the reader poll timeout ({POLL_TIMEOUT_MS} ms)")
+        self.enhancer = enhancer
+        self.budget_ns = int(budget_ms * 1000000)
+        self.interval = budget_ms / 1000 / CHECKS_PER_BUDGET
+        self.is_running = False
+        self.thread = None
+        self.wakeup = threading.Event()
+
+        self.restarts = 0
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self.recent = collections.deque()
+        self.failed = None
+
+    def start(self):
+        if self.is_running:
+            return False
+        self.is_running = True
+        self.wakeup.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True, name="reader-watchdog")
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Vor enhancer.stop() aufrufen, sonst gilt der gestoppte Reader als tot"""
+        self.is_running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=1)
+            self.thread = None
+
+    def check(self):
+        """
+        Prüft den Reader einmal
+
+        Returns:
+            Ursache ('crashed: ...', 'exited', 'stalled ...') oder None
+        """
+        enhancer = self.enhancer
+        if not enhancer.reader_alive():
+            if enhancer.failure:
+                return f"crashed: {enhancer.failure}"
+            # Ohne Exception beendet, obwohl niemand stop() gerufen hat
+            return "exited" if enhancer.is_running else None
+
+        age = time.monotonic_ns() - enhancer.counters[COUNTER_HEARTBEAT]
+        if age > self.budget_ns:
+            return f"stalled {age // 1000000} ms"
+        return None
+
+    def report(self):
+        """Neustarts und Ursachen (picklebar, für status/stats)"""
+        return {
+            'budget_ms': self.budget_ns / 1000000,
+            'restarts': self.restarts,
+            'last_cause': self.history[-1][1] if self.history else None,
+            'history': [{'time': when, 'cause': cause} for when, cause in self.history],
+            'failed': self.failed
+        }
+
+    def _restart(self, cause):
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] > RESTART_WINDOW:
+            self.recent.popleft()
+        if len(self.recent) >= MAX_RESTARTS:
+            self.failed = f"{cause} ({MAX_RESTARTS} restarts in {RESTART_WINDOW:.0f} s)"
+            print(f"Watchdog: giving up on pedal reader: {self.failed}")
+            self.is_running = False
+            return
+
+        print(f"Watchdog: restarting pedal reader ({cause})")
+        if self.enhancer.restart_reader():
+            self.recent.append(now)
+            self.restarts += 1
+            self.history.append((time.time(), cause))
+
+    def _loop(self):
+        interval_ns = int(self.interval * 1e9)
+        last = time.monotonic_ns()
+        while self.is_running:
+            if self.wakeup.wait(self.interval):
+                break
+
+            # Selbst zu spät geweckt (Suspend, überlastetes System): der Reader
+            # hatte dann auch keine Chance - erst beim nächsten Takt urteilen
+            now = time.monotonic_ns()
+            late = now - last > interval_ns + self.budget_ns
+            last = now
+            if late:
+                continue
+
+            cause = self.check()
+            if cause:
+                self._restart(cause)
@@ -17,21 +17,31 @@ from gui.start_tab_ctk import StartTab
 from gui.settings_tab_ctk import SettingsTab
 
 class LinuxPedalManagerApp:
-    def __init__(self, root):
+    def __init__(self, root, warm_start=None):
         self.root = root
+        self.warm_start = warm_start
 
         # Device scanner
         self.scanner = DeviceScanner()
 
-        # Shared calibrator for all tabs
-        self.calibrator = PedalCalibrator()
+        # Shared calibrator for all tabs (warm start already restored the last session into it)
+        self.calibrator = warm_start.calibrator if warm_start else PedalCalibrator()
 
         # Setup UI
         self.setup_ui()
 
+        # Engine process (and its virtual device) ends with the window
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         # Initial scan
         self.scan_devices()
 
+        # Engine may already be running since before the window existed
+        if warm_start:
+            if warm_start.state:
+                self.settings_tab.show_restored_state(warm_start.state['preset'])
+            self.start_tab.adopt_warm_start(warm_start)
+
     def setup_ui(self):
         """Setup the main UI"""
         # Main container with padding
@@ -90,7 +100,7 @@ class LinuxPedalManagerApp:
 
         # Initialize tab content (pass self to start_tab for rescan)
         self.start_tab = StartTab(self.tabview.tab("🏠 Start"), self.scanner, self.calibrator, main_window=self)
-        self.settings_tab = SettingsTab(self.tabview.tab("⚙️ Settings"), self.scanner, self.calibrator)
+        self.settings_tab = SettingsTab(self.tabview.tab("⚙️ Settings"), self.scanner, self.calibrator, main_window=self)
 
         # Status bar
         status_frame = ctk.CTkFrame(main_container, fg_color=("#2b2b2b", "#1a1a1a"), corner_radius=0, height=40)
@@ -105,6 +115,11 @@ class LinuxPedalManagerApp:
         )
         self.status_label.pack(side="left", padx=20, pady=10)
 
+    def on_close(self):
+        """Stop engine process and remove virtual devices on exit"""
+        self.start_tab.shutdown()
+        self.root.destroy()
+
     def scan_devices(self):
         """Scan for devices"""
         self.scanner.scan()
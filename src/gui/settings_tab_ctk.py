@@ -8,18 +8,31 @@ import customtkinter as ctk
 from tkinter import messagebox
 import sys
 import os
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from config.presets import PresetManager
+from device.game_watcher import KNOWN_GAMES
+
+# Auto-calibration: how long the engine watches the pedals
+AUTO_CALIBRATION_SECONDS = 10
+AUTO_CALIBRATION_PRESET = "auto_calibration"
+
+# Ctrl+1..9 selects the Nth preset
+PRESET_HOTKEYS = 9
 
 class SettingsTab:
-    def __init__(self, parent, scanner, calibrator):
+    def __init__(self, parent, scanner, calibrator, main_window=None):
         self.parent = parent
         self.scanner = scanner
         self.calibrator = calibrator
+        self.main_window = main_window
         self.preset_manager = PresetManager()
         self.pedal_controls = {}
+        self.auto_dialog = None
+        self.preset_before_game = None
         self.setup_ui()
+        self.setup_hotkeys()
 
     def setup_ui(self):
         """Setup compact grid UI"""
@@ -28,7 +41,7 @@ class SettingsTab:
         top_bar.pack(fill="x", padx=15, pady=15)
 
         # Toggle links
-        self.enabled_var = ctk.BooleanVar(value=False)
+        self.enabled_var = ctk.BooleanVar(value=self.calibrator.enabled)
         ctk.CTkSwitch(
             top_bar,
             text="Enable",
@@ -43,14 +56,15 @@ class SettingsTab:
         self.preset_name_to_file = {p['name']: p['filename'] for p in presets}
 
         self.preset_var = ctk.StringVar(value=preset_names[0] if preset_names else "")
-        ctk.CTkOptionMenu(
+        self.preset_dropdown = ctk.CTkOptionMenu(
             top_bar,
             variable=self.preset_var,
             values=preset_names,
             width=200,
             height=28,
             font=ctk.CTkFont(size=11)
-        ).pack(side="left", padx=5, pady=10)
+        )
+        self.preset_dropdown.pack(side="left", padx=5, pady=10)
 
         ctk.CTkButton(
             top_bar,
@@ -83,6 +97,36 @@ class SettingsTab:
             hover_color=("#bd2130", "#a71d2a")
         ).pack(side="left", padx=3, pady=10)
 
+        # Wheel-Button Belegung für den Preset-Wechsel
+        ctk.CTkButton(
+            top_bar,
+            text="Bind",
+            command=self.bind_preset_button,
+            width=55,
+            height=28,
+            font=ctk.CTkFont(size=11)
+        ).pack(side="left", padx=3, pady=10)
+
+        # Spiel-Prozess für den automatischen Preset-Wechsel
+        ctk.CTkButton(
+            top_bar,
+            text="Game",
+            command=self.bind_preset_game,
+            width=60,
+            height=28,
+            font=ctk.CTkFont(size=11)
+        ).pack(side="left", padx=3, pady=10)
+
+        # Auto-Kalibrierung (rechts)
+        ctk.CTkButton(
+            top_bar,
+            text="🎯 Auto",
+            command=self.start_auto_calibration,
+            width=80,
+            height=28,
+            font=ctk.CTkFont(size=11)
+        ).pack(side="right", padx=15, pady=10)
+
         # 3x1 Grid - 3 Pedale nebeneinander
         grid = ctk.CTkFrame(self.parent, fg_color="transparent")
         grid.pack(fill="x", expand=False, padx=15, pady=5)
@@ -229,20 +273,130 @@ class SettingsTab:
         """Update invert"""
         self.calibrator.set_pedal_setting(pedal_name, 'invert', inverted)
 
-    def load_preset(self):
+    def setup_hotkeys(self):
+        """Ctrl+1..9 → Nth preset (only while the window has focus)"""
+        for number in range(1, PRESET_HOTKEYS + 1):
+            self.parent.bind_all(f"<Control-Key-{number}>", lambda event, index=number - 1: self.select_preset(index))
+
+    def select_preset(self, index):
+        """Switch to the Nth preset of the dropdown without a dialog"""
+        preset_names = list(self.preset_name_to_file)
+        if index < len(preset_names):
+            self.preset_var.set(preset_names[index])
+            self.load_preset(quiet=True)
+
+    def load_preset(self, quiet=False):
         """Load preset"""
         preset_name = self.preset_var.get()
         if not preset_name or preset_name not in self.preset_name_to_file:
             return
 
         filename = self.preset_name_to_file[preset_name]
-        preset_data = self.preset_manager.load_preset(filename)
 
-        if preset_data:
+        # Running engine switches to its precompiled tables right away
+        engine = self._engine()
+        active = engine.activate_preset(filename) if engine else None
+        if active:
+            self.apply_engine_preset(active)
+        else:
+            preset_data = self.preset_manager.load_preset(filename)
+            if not preset_data:
+                return
             self.preset_manager.apply_preset_to_calibrator(preset_data, self.calibrator)
             self.update_all_ui_from_settings()
+
+        if not quiet:
             messagebox.showinfo("Success", f"Preset '{preset_name}' loaded!")
 
+    def bind_preset_game(self):
+        """Switch to the selected preset automatically while a game runs"""
+        preset_name = self.preset_var.get()
+        if preset_name not in self.preset_name_to_file:
+            return
+        filename = self.preset_name_to_file[preset_name]
+
+        dialog = ctk.CTkInputDialog(
+            text=f"Game for '{preset_name}' ({', '.join(KNOWN_GAMES)}\nor process name, empty = remove):",
+            title="Game"
+        )
+        answer = dialog.get_input()
+        if answer is None:
+            return
+
+        games = {game: preset for game, preset in self.preset_manager.load_games().items() if preset != filename}
+        if answer.strip():
+            games[answer.strip()] = filename
+
+        self.preset_manager.save_games(games)
+        start_tab = getattr(self.main_window, 'start_tab', None) if self.main_window else None
+        if start_tab:
+            start_tab.send_bindings()
+
+    def switch_for_game(self, filename):
+        """Game started (filename) or stopped (None, back to the preset used before)"""
+        if filename:
+            if self.preset_before_game is None:
+                self.preset_before_game = self.preset_var.get()
+            names = [name for name, preset in self.preset_name_to_file.items() if preset == filename]
+            name = names[0] if names else None
+        else:
+            name = self.preset_before_game
+            self.preset_before_game = None
+
+        if name in self.preset_name_to_file:
+            self.preset_var.set(name)
+            self.load_preset(quiet=True)
+
+    def current_preset_file(self):
+        """Filename of the preset selected in the dropdown (or None)"""
+        return self.preset_name_to_file.get(self.preset_var.get())
+
+    def show_restored_state(self, filename):
+        """Show the restored preset and calibration from the last session (no engine round trip)"""
+        names = [name for name, preset in self.preset_name_to_file.items() if preset == filename]
+        if names:
+            self.preset_var.set(names[0])
+        self.enabled_var.set(self.calibrator.enabled)
+        self.update_all_ui_from_settings()
+
+    def apply_engine_preset(self, active):
+        """Mirror a preset the engine switched to (dropdown, sliders, calibrator)"""
+        self.calibrator.apply_snapshot({'enabled': self.calibrator.enabled, 'settings': active['settings']}, compile=False)
+        self.update_all_ui_from_settings()
+        if active['name'] in self.preset_name_to_file:
+            self.preset_var.set(active['name'])
+
+    def bind_preset_button(self):
+        """Bind a wheel button to the selected preset (or next/prev)"""
+        preset_name = self.preset_var.get()
+        dialog = ctk.CTkInputDialog(
+            text=f"Wheel button number for '{preset_name}'\n(or 'next <n>' / 'prev <n>', empty = clear all):",
+            title="Bind"
+        )
+        answer = dialog.get_input()
+        if answer is None:
+            return
+
+        bindings = self.preset_manager.load_bindings()
+        parts = answer.split()
+        try:
+            if not parts:
+                bindings = {}
+            elif len(parts) == 2 and parts[0] in ('next', 'prev'):
+                bindings[int(parts[1])] = parts[0]
+            elif len(parts) == 1 and preset_name in self.preset_name_to_file:
+                bindings[int(parts[0])] = self.preset_name_to_file[preset_name]
+            else:
+                raise ValueError(answer)
+        except ValueError:
+            messagebox.showerror("Error", f"Invalid button: {answer}")
+            return
+
+        self.preset_manager.save_bindings(bindings)
+        start_tab = getattr(self.main_window, 'start_tab', None) if self.main_window else None
+        if start_tab:
+            start_tab.send_bindings()
+
     def save_preset(self):
         """Save preset"""
         dialog = ctk.CTkInputDialog(text="Preset name:", title="Save")
@@ -253,6 +407,7 @@ class SettingsTab:
             preset_data = self.preset_manager.get_preset_from_calibrator(self.calibrator, name=name, description=f"Custom - {name}")
 
             if self.preset_manager.save_preset(filename, preset_data, overwrite=True):
+                self.refresh_presets(selected=name)
                 messagebox.showinfo("Success", f"Saved!")
             else:
                 messagebox.showerror("Error", "Failed!")
@@ -268,17 +423,95 @@ class SettingsTab:
         # Confirm deletion
         if messagebox.askyesno("Delete Preset", f"Delete preset '{preset_name}'?"):
             if self.preset_manager.delete_preset(filename):
-                # Refresh preset list
-                presets = self.preset_manager.list_presets()
-                preset_names = [p['name'] for p in presets]
-                self.preset_name_to_file = {p['name']: p['filename'] for p in presets}
-                self.preset_dropdown.configure(values=preset_names)
-                if preset_names:
-                    self.preset_var.set(preset_names[0])
+                self.refresh_presets()
                 messagebox.showinfo("Deleted", f"Preset '{preset_name}' deleted!")
             else:
                 messagebox.showerror("Error", "Failed to delete preset!")
 
+    def refresh_presets(self, selected=None):
+        """Reload preset list into the dropdown"""
+        presets = self.preset_manager.list_presets()
+        preset_names = [p['name'] for p in presets]
+        self.preset_name_to_file = {p['name']: p['filename'] for p in presets}
+        self.preset_dropdown.configure(values=preset_names)
+        if selected in preset_names:
+            self.preset_var.set(selected)
+        elif preset_names:
+            self.preset_var.set(preset_names[0])
+
+    def _engine(self):
+        """Running engine process of the start tab (or None)"""
+        start_tab = getattr(self.main_window, 'start_tab', None) if self.main_window else None
+        if start_tab and start_tab.is_running and start_tab.engine:
+            return start_tab.engine
+        return None
+
+    def start_auto_calibration(self):
+        """Let the engine watch one pedal sweep, then propose settings"""
+        engine = self._engine()
+        if not engine:
+            messagebox.showerror("Auto Calibration", "Start the enhancer first!")
+            return
+
+        if self.auto_dialog or not engine.start_auto_calibration():
+            return
+
+        self.auto_dialog = ctk.CTkToplevel(self.parent)
+        self.auto_dialog.title("Auto Calibration")
+        self.auto_dialog.geometry("380x170")
+        self.auto_dialog.resizable(False, False)
+
+        ctk.CTkLabel(
+            self.auto_dialog,
+            text="Press every pedal fully a few times,\nthen let them rest.",
+            font=ctk.CTkFont(size=13)
+        ).pack(pady=(25, 10))
+
+        countdown = ctk.CTkLabel(self.auto_dialog, text="", font=ctk.CTkFont(size=18, weight="bold"))
+        countdown.pack(pady=10)
+
+        deadline = time.monotonic() + AUTO_CALIBRATION_SECONDS
+
+        def tick():
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                countdown.configure(text=f"{remaining:.0f}s")
+                self.parent.after(200, tick)
+            else:
+                self.auto_dialog.destroy()
+                self.auto_dialog = None
+                self.finish_auto_calibration(engine)
+
+        tick()
+
+    def finish_auto_calibration(self, engine):
+        """Show the proposal, apply it and save it as a preset"""
+        proposal = engine.finish_auto_calibration()
+        lines = []
+        for pedal, values in (proposal or {}).items():
+            if values:
+                lines.append(f"{pedal}: {values['min']:.1f}-{values['max']:.1f}%  "
+                             f"DZ {values['deadzone']:.1f}%{'  inverted' if values['invert'] else ''}")
+            else:
+                lines.append(f"{pedal}: not moved enough")
+
+        if not proposal or not any(proposal.values()):
+            messagebox.showerror("Auto Calibration", "No pedal sweep detected!\n\n" + "\n".join(lines))
+            return
+
+        if not messagebox.askyesno("Auto Calibration", "\n".join(lines) + "\n\nApply and save as preset?"):
+            return
+
+        self.calibrator.apply_auto_calibration(proposal)
+        self.calibrator.enabled = True
+        self.enabled_var.set(True)
+        self.update_all_ui_from_settings()
+
+        name = f"Auto {time.strftime('%Y-%m-%d %H:%M')}"
+        preset_data = self.preset_manager.get_preset_from_calibrator(self.calibrator, name=name, description="Auto calibration")
+        if self.preset_manager.save_preset(AUTO_CALIBRATION_PRESET, preset_data, overwrite=True):
+            self.refresh_presets(selected=name)
+
     def reset_all(self):
         """Reset all"""
         self.calibrator.reset_all()
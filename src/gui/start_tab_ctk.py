@@ -8,9 +8,34 @@ import customtkinter as ctk
 from tkinter import messagebox
 import sys
 import os
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from device.pedal_enhancer import PedalEnhancer
+from config.rig_state import save_rig_state
+from device.calibration import PEDAL_NAMES
+from device.diagnostics import format_record
+from device.engine_process import EngineProcess, STATUS_FAILED, STATUS_PAUSED, STATUS_RUNNING
+from device.game_watcher import GameWatcher
+from device.io_backends import default_input_format
+from device.realtime import format_realtime_report
+from device.scanner import device_identity
+from device.session_recorder import default_session_path
+from device.timerfd import OUTPUT_RATES
+from device.warm_start import ENGINE_DEVICE_NAME
+
+# Live monitor refresh (reads engine shared memory, no IPC)
+MONITOR_INTERVAL_MS = 33
+
+# Reader heartbeat older than this while running → engine hangs (watchdog handles shorter stalls)
+ENGINE_STALL_MS = 500
+
+OUTPUT_PASSTHROUGH = "Passthrough"
+
+# Diagnostics dialog shows the newest records (full dump goes to stdout)
+DIAGNOSTICS_DIALOG_RECORDS = 15
+
+# How often the GUI checks whether the warm start finished
+WARM_START_POLL_MS = 50
 
 class StartTab:
     def __init__(self, parent, scanner, calibrator, main_window=None):
@@ -20,9 +45,19 @@ class StartTab:
         self.main_window = main_window
         self.is_running = False
         self.is_monitoring = False
-        self.enhancer = None
-        self.monitor_thread = None
+        self.engine = None
+        self.monitor_job = None
+        self.last_values = None
         self.pedal_displays = {}
+        self.recording = None
+        self.preset_generation = 0
+        self.engine_status = None
+        self.reader_restarts = 0
+        self.game_watcher = None
+        self.game_generation = 0
+        self.engine_options = None
+        self.warm_start = None
+        self.warm_job = None
 
         self.setup_ui()
 
@@ -98,6 +133,54 @@ class StartTab:
         )
         self.toggle_btn.pack(side="left", padx=10)
 
+        # Real-time mode (opt-in, needs CAP_SYS_NICE / rtprio limits for FIFO)
+        self.realtime_var = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            control_frame,
+            text="⚡ Real-time",
+            variable=self.realtime_var,
+            font=ctk.CTkFont(size=11)
+        ).pack(side="left", padx=10)
+
+        self.realtime_label = ctk.CTkLabel(
+            control_frame,
+            text="",
+            font=ctk.CTkFont(size=10),
+            text_color="gray60"
+        )
+        self.realtime_label.pack(side="left", padx=5)
+
+        # Output rate: passthrough (1:1) or fixed-rate frames (timerfd)
+        self.output_rate_var = ctk.StringVar(value=OUTPUT_PASSTHROUGH)
+        ctk.CTkOptionMenu(
+            control_frame,
+            variable=self.output_rate_var,
+            values=[OUTPUT_PASSTHROUGH] + [f"{rate} Hz" for rate in OUTPUT_RATES],
+            width=110,
+            height=28,
+            font=ctk.CTkFont(size=11)
+        ).pack(side="left", padx=10)
+
+        # Session recording (sessions/*.pcrec, for diagnosis and benchmark traces)
+        self.record_var = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(
+            control_frame,
+            text="⏺ Record",
+            variable=self.record_var,
+            command=self.toggle_recording,
+            font=ctk.CTkFont(size=11)
+        ).pack(side="left", padx=10)
+
+        # Error counters and recent diagnostic records of the engine
+        ctk.CTkButton(
+            control_frame,
+            text="🩺 Diagnostics",
+            command=self.show_diagnostics,
+            width=110,
+            height=28,
+            font=ctk.CTkFont(size=11)
+        ).pack(side="left", padx=10)
+
         # Live Monitor Card
         monitor_card = ctk.CTkFrame(self.parent, corner_radius=10)
         monitor_card.pack(fill="both", expand=True, padx=20, pady=10)
@@ -181,6 +264,10 @@ class StartTab:
 
     def start_enhancer(self):
         """Start Pedal Enhancer"""
+        # Warm start still bringing the engine up → it is adopted when ready
+        if self.warm_job:
+            return
+
         pedals = self.scanner.get_pedal_device()
 
         if not pedals:
@@ -190,28 +277,37 @@ class StartTab:
             )
             return
 
-        # Create enhancer
-        self.enhancer = PedalEnhancer(
-            pedals_path=pedals['path'],
-            name="Enhanced Pedals",
-            calibrator=self.calibrator
-        )
+        # Engine process lives for the whole session, pedals changed → new engine
+        if self.engine and self.engine.pedals_path != pedals['path']:
+            self.engine.shutdown()
+            self.engine = None
+
+        if not self.engine:
+            self.engine = EngineProcess(pedals_path=pedals['path'], name=ENGINE_DEVICE_NAME)
+
+        # Start (or resume) in the engine process
+        self.engine_options = {
+            'optimized': True,
+            'realtime': self.realtime_var.get(),
+            'output_rate': self._output_rate(),
+            'direct_output': True,
+            # event* node when readable: kernel-side event mask and SYN_DROPPED resync
+            'input_format': default_input_format(pedals['path'])
+        }
+        status = self.engine.start(self.calibrator, options=self.engine_options)
 
-        # Start
-        if self.enhancer.start():
-            self.is_running = True
-            self.toggle_btn.configure(
-                text="⏹️  STOP",
-                fg_color=("#dc3545", "#c82333"),
-                hover_color=("#bd2130", "#a71d2a")
-            )
-            self.status_indicator.configure(
-                text="✅ Running",
-                text_color=("#28a745", "#1e7e34")
-            )
+        if status and status['running']:
+            self._show_running(status)
+            if self.main_window and self.main_window.warm_start:
+                self.main_window.warm_start.pedals_working("cold start, START clicked")
+            self.save_rig_state()
+
+            # Device already registered this session? Then skip the dialog
+            if status['reused']:
+                return
 
-            # Start live monitoring automatically
-            self.start_live_monitoring()
+            js_node = status['js_node'] or "/dev/input/js2"
+            js_name = os.path.basename(js_node)
 
             # Modern success dialog
             success_dialog = ctk.CTkToplevel(self.parent)
@@ -228,7 +324,7 @@ class StartTab:
 
             ctk.CTkLabel(
                 success_dialog,
-                text="New device: /dev/input/js2",
+                text=f"New device: {js_node}",
                 font=ctk.CTkFont(size=12)
             ).pack(pady=5)
 
@@ -237,7 +333,7 @@ class StartTab:
 
             ctk.CTkLabel(
                 info_frame,
-                text="In your game:\n• Wheelbase: js0\n• Pedals: js2",
+                text=f"In your game:\n• Wheelbase: js0\n• Pedals: {js_name}",
                 font=ctk.CTkFont(size=12),
                 justify="left"
             ).pack(padx=20, pady=15)
@@ -268,11 +364,71 @@ class StartTab:
                 "  sudo chmod 666 /dev/uinput"
             )
 
+    def _show_running(self, status):
+        """Switch the dashboard to the running engine"""
+        self.is_running = True
+        self.toggle_btn.configure(
+            text="⏹️  STOP",
+            fg_color=("#dc3545", "#c82333"),
+            hover_color=("#bd2130", "#a71d2a")
+        )
+        self.status_indicator.configure(
+            text="✅ Running",
+            text_color=("#28a745", "#1e7e34")
+        )
+
+        # Start live monitoring automatically
+        self.start_live_monitoring()
+
+        if status['realtime']:
+            self._show_realtime_report(status['realtime'])
+
+        if self.record_var.get():
+            self.start_recording()
+
+        self.send_bindings()
+
+    def adopt_warm_start(self, warm_start):
+        """Take over the engine the warm start brought up (no START click, no dialog)"""
+        self.warm_job = None
+        if not warm_start.done.is_set():
+            self.status_indicator.configure(text="⏳ Starting...", text_color="gray60")
+            self.warm_job = self.parent.after(WARM_START_POLL_MS, lambda: self.adopt_warm_start(warm_start))
+            return
+
+        engine, status = warm_start.take()
+        if not engine:
+            self.status_indicator.configure(text="⏹️ Stopped", text_color="gray60")
+            return
+
+        options = warm_start.state['options']
+        self.realtime_var.set(bool(options.get('realtime')))
+        rate = options.get('output_rate')
+        self.output_rate_var.set(f"{rate} Hz" if rate in OUTPUT_RATES else OUTPUT_PASSTHROUGH)
+        self.engine = engine
+        self.engine_options = options
+        self._show_running(status)
+
+    def save_rig_state(self, running=None):
+        """Remember pedals, preset, options and calibration for the next warm start"""
+        if not self.engine or self.engine_options is None:
+            return
+        settings_tab = getattr(self.main_window, 'settings_tab', None) if self.main_window else None
+        save_rig_state(
+            device_identity(self.engine.pedals_path),
+            settings_tab.current_preset_file() if settings_tab else None,
+            self.is_running if running is None else running,
+            self.engine_options,
+            self.calibrator.snapshot()
+        )
+
     def stop_enhancer(self):
-        """Stop enhancer"""
-        if self.enhancer:
-            self.enhancer.stop()
-            self.enhancer = None
+        """Stop enhancer (engine keeps the virtual device registered)"""
+        self.stop_recording()
+        self.stop_game_watcher()
+        if self.engine:
+            self.engine.pause()
+        self.save_rig_state(running=False)
 
         self.is_running = False
         self.toggle_btn.configure(
@@ -284,6 +440,7 @@ class StartTab:
             text="⏹️ Stopped",
             text_color="gray60"
         )
+        self.realtime_label.configure(text="")
 
         # Stop live monitoring
         self.stop_live_monitoring()
@@ -292,60 +449,182 @@ class StartTab:
         if self.main_window and hasattr(self.main_window, 'scan_devices'):
             self.parent.after(100, self.main_window.scan_devices)
 
-    def start_live_monitoring(self):
-        """Start live pedal monitoring"""
-        pedal_device = self.scanner.get_pedal_device()
-        if not pedal_device:
+    def toggle_recording(self):
+        """Record switch: takes effect immediately while running"""
+        if not self.is_running:
             return
+        if self.record_var.get():
+            self.start_recording()
+        else:
+            self.stop_recording()
+
+    def start_recording(self):
+        """Start recording pedal events in the engine"""
+        if self.engine and not self.recording:
+            self.recording = self.engine.start_recording(default_session_path())
+
+    def stop_recording(self):
+        """Stop recording and report where the session went"""
+        if self.engine and self.recording:
+            stats = self.engine.stop_recording()
+            if stats:
+                print(f"Session recorded: {stats['path']} "
+                      f"({stats['records']} events, {stats['dropped']} dropped)")
+        self.recording = None
+
+    def show_diagnostics(self):
+        """Dump the engine's error counters and diagnostic ring"""
+        report = self.engine.diagnostics() if self.engine else None
+        if report is None:
+            messagebox.showinfo("Diagnostics", "Engine is not running.")
+            return
+
+        counters = "\n".join(f"{name}: {count}" for name, count in report['errors'].items())
+        records = [format_record(record) for record in report['records']]
+        for line in records:
+            print(f"Diagnostics {line}")
+
+        recent = "\n".join(records[-DIAGNOSTICS_DIALOG_RECORDS:]) if records else "No errors recorded."
+        messagebox.showinfo("Diagnostics", f"{counters}\n\n{recent}")
 
+    def shutdown(self):
+        """Stop the engine process and remove the virtual device"""
+        self.stop_live_monitoring()
+        self.stop_recording()
+        self.stop_game_watcher()
+        self.save_rig_state()
+
+        # Window closed before the warm start finished → its engine is ours to stop
+        if self.warm_job:
+            self.parent.after_cancel(self.warm_job)
+            self.warm_job = None
+            warm_start = self.main_window.warm_start
+            warm_start.done.wait(timeout=10)
+            engine, _ = warm_start.take()
+            if engine:
+                engine.shutdown()
+
+        if self.engine:
+            self.engine.shutdown()
+            self.engine = None
+
+    def _show_realtime_report(self, report):
+        """Show which real-time privileges the reader actually got"""
+        self.realtime_label.configure(text=format_realtime_report(report))
+        for error in report['errors']:
+            print(f"Real-time: {error}")
+
+    def start_live_monitoring(self):
+        """Start polling the engine's shared-memory state"""
         self.is_monitoring = True
-        import threading
-        self.monitor_thread = threading.Thread(
-            target=self._monitor_loop,
-            args=(pedal_device['path'],),
-            daemon=True
-        )
-        self.monitor_thread.start()
+        self.last_values = None
+        self._poll_engine()
 
     def stop_live_monitoring(self):
         """Stop live monitoring"""
         self.is_monitoring = False
+        if self.monitor_job:
+            self.parent.after_cancel(self.monitor_job)
+            self.monitor_job = None
+
+    def _output_rate(self):
+        """Selected output rate in Hz (None = passthrough)"""
+        value = self.output_rate_var.get()
+        return None if value == OUTPUT_PASSTHROUGH else int(value.split()[0])
+
+    def send_bindings(self):
+        """Hand the wheel button bindings to the engine and (re)arm the game watcher"""
+        settings_tab = getattr(self.main_window, 'settings_tab', None) if self.main_window else None
+        if not self.engine or not self.is_running or not settings_tab:
+            return
+        bindings = settings_tab.preset_manager.load_bindings()
+        wheelbase = self.scanner.get_wheelbase_device()
+        self.engine.set_bindings(wheelbase['path'] if wheelbase and bindings else None, bindings)
+
+        # Game detection runs in its own thread of the GUI process, away from the engine
+        games = settings_tab.preset_manager.load_games()
+        if not games:
+            self.stop_game_watcher()
+        elif self.game_watcher:
+            self.game_watcher.set_games(games)
+        else:
+            self.game_watcher = GameWatcher(games)
+            self.game_watcher.start()
+            self.game_generation = 0
+
+    def stop_game_watcher(self):
+        if self.game_watcher:
+            self.game_watcher.stop()
+            self.game_watcher = None
+
+    def _poll_engine(self):
+        """Push calibration changes and refresh monitor bars (GUI thread)"""
+        self.monitor_job = None
+        if not self.is_monitoring or not self.engine:
+            return
+
+        self.engine.sync_calibration(self.calibrator)
 
-    def _monitor_loop(self, device_path):
-        """Monitor loop for live updates"""
-        import struct
-        JS_EVENT_FMT = 'IhBB'
-        JS_EVENT_SIZE = struct.calcsize(JS_EVENT_FMT)
-        JS_EVENT_AXIS = 0x02
-        JS_EVENT_INIT = 0x80
-
-        try:
-            import os
-            fd = os.open(device_path, os.O_RDONLY | os.O_NONBLOCK)
-
-            while self.is_monitoring:
-                try:
-                    data = os.read(fd, JS_EVENT_SIZE)
-                    if len(data) == JS_EVENT_SIZE:
-                        timestamp, value, event_type, number = struct.unpack(JS_EVENT_FMT, data)
-                        event_type &= ~JS_EVENT_INIT
-
-                        if event_type == JS_EVENT_AXIS:
-                            percentage = ((value + 32767) / 65534) * 100
-                            pedal_names = {0: 'gas', 1: 'brake', 2: 'clutch'}
-
-                            if number in pedal_names and pedal_names[number] in self.pedal_displays:
-                                pedal = pedal_names[number]
-                                self.parent.after(0, self._update_monitor, pedal, percentage)
-                except BlockingIOError:
-                    pass
-
-                import time
-                time.sleep(0.001)
-
-            os.close(fd)
-        except:
-            pass
+        engine_status = self.engine.status()
+        state = self.engine.read_state()
+        if not self.engine.is_alive() or engine_status == STATUS_FAILED:
+            self.status_indicator.configure(
+                text="⚠️ Engine stopped",
+                text_color=("#ff4444", "#cc0000")
+            )
+            self.engine_status = None
+        elif (engine_status == STATUS_RUNNING and state
+              and time.monotonic_ns() - state['counters']['heartbeat_ns'] > ENGINE_STALL_MS * 1000000):
+            self.status_indicator.configure(
+                text="⚠️ Engine not responding",
+                text_color=("#ff4444", "#cc0000")
+            )
+            self.engine_status = None
+        else:
+            # Paused/resumed through the control socket
+            engine_status_changed = engine_status != self.engine_status
+            if engine_status_changed:
+                if engine_status == STATUS_PAUSED:
+                    self.status_indicator.configure(text="⏸️ Paused (remote)", text_color="gray60")
+                elif engine_status == STATUS_RUNNING:
+                    self.status_indicator.configure(text="✅ Running", text_color=("#28a745", "#1e7e34"))
+            self.engine_status = engine_status
+
+            # Watchdog restarted the pedal reader → show why
+            restarts = state['counters']['reader_restarts'] if state else 0
+            if restarts != self.reader_restarts or (restarts and engine_status_changed):
+                self.reader_restarts = restarts
+                if restarts and engine_status == STATUS_RUNNING:
+                    status = self.engine.request('status')
+                    watchdog = status.get('watchdog') if status else None
+                    cause = watchdog['last_cause'] if watchdog else None
+                    self.status_indicator.configure(
+                        text=f"✅ Running (reader restarted ×{restarts}{': ' + cause if cause else ''})",
+                        text_color=("#e0a800", "#c69500")
+                    )
+
+            # Preset/setting changed in the engine (wheel button, control socket) → mirror it in the GUI
+            generation = self.engine.preset_generation()
+            if generation != self.preset_generation:
+                self.preset_generation = generation
+                active = self.engine.current_preset()
+                settings_tab = getattr(self.main_window, 'settings_tab', None) if self.main_window else None
+                if active and settings_tab:
+                    settings_tab.apply_engine_preset(active)
+
+            # Game started/stopped → switch preset through the settings tab
+            if self.game_watcher and self.game_watcher.generation != self.game_generation:
+                self.game_generation = self.game_watcher.generation
+                settings_tab = getattr(self.main_window, 'settings_tab', None) if self.main_window else None
+                if settings_tab:
+                    settings_tab.switch_for_game(self.game_watcher.preset())
+
+            if state and state['raw'] != self.last_values:
+                self.last_values = state['raw']
+                for pedal_name, value in zip(PEDAL_NAMES, state['raw']):
+                    self._update_monitor(pedal_name, ((value + 32767) / 65534) * 100)
+
+        self.monitor_job = self.parent.after(MONITOR_INTERVAL_MS, self._poll_engine)
 
     def _update_monitor(self, pedal_name, percentage):
         """Update monitor display"""
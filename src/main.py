@@ -11,17 +11,33 @@ Features:
 - Universal device support
 """
 
-import customtkinter as ctk
 import sys
 import os
+import time
 
 # Pfad zum src-Verzeichnis hinzufügen
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from gui.main_window_ctk import LinuxPedalManagerApp
-
 def main():
     """Main entry point"""
+    started = time.monotonic()
+
+    # CLI Subcommands (ohne GUI-Abhängigkeiten)
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        from benchmarks.cli import main as bench_main
+        sys.exit(bench_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'ctl':
+        from device.control_socket import main as ctl_main
+        sys.exit(ctl_main(sys.argv[2:]))
+
+    # Engine mit dem letzten Zustand starten, parallel zum GUI-Aufbau
+    from device.warm_start import WarmStart
+    warm_start = WarmStart(started)
+    warm_start.start()
+
+    import customtkinter as ctk
+    from gui.main_window_ctk import LinuxPedalManagerApp
+
     # Set appearance and color theme
     ctk.set_appearance_mode("dark")  # "dark", "light", "system"
     ctk.set_default_color_theme("blue")  # "blue", "green", "dark-blue"
@@ -32,7 +48,7 @@ def main():
     root.geometry("1280x880")
     root.resizable(False, False)  # Fixed size
 
-    app = LinuxPedalManagerApp(root)
+    app = LinuxPedalManagerApp(root, warm_start=warm_start)
     root.mainloop()
 
 if __name__ == "__main__":